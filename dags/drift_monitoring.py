@@ -7,6 +7,8 @@ It checks for:
 2. Data Quality Issues
 3. Feature-level drift detection
 
+Drift is computed daily from mergeable per-column sketches (utils/drift_sketches.py);
+the full Evidently report is only generated when a threshold trips.
 Reports are saved as HTML and key metrics are logged to MLflow.
 
 Author: MLOps Team
@@ -25,10 +27,16 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from utils.drift_detection import (
     load_training_reference_data,
+    load_reference_sketch,
     load_production_data,
     calculate_drift_report,
     check_drift_threshold
 )
+from utils.drift_sketches import drift_summary, update_daily_sketches, window_sketch
+
+INFERENCE_LOG_PATH = "/opt/airflow/data/inference_logs"
+DAILY_SKETCH_PATH = "/opt/airflow/data/drift_sketches"
+DRIFT_WINDOW_DAYS = 7
 
 # Default arguments for the DAG
 default_args = {
@@ -54,28 +62,30 @@ dag = DAG(
 
 def check_data_drift(**context):
     """
-    Check for data drift using Evidently AI.
-    
+    Check for data drift from per-column sketches, escalating to Evidently AI.
+
     This function:
-    1. Loads reference (training) data
-    2. Loads recent production data (last 7 days)
-    3. Runs Evidently drift detection
-    4. Generates HTML report
+    1. Loads (or builds once) the reference sketch from training data
+    2. Sketches the new daily inference log partitions and merges the last 7 days
+    3. Computes PSI / JS distance per column from the sketches
+    4. Only if drift exceeds the threshold, runs Evidently on the raw frames and generates the HTML report
     5. Returns drift metrics
     """
     logger = logging.getLogger(__name__)
-    logger.info("Starting Evidently AI data drift check...")
-    
+    logger.info("Starting sketch-based data drift check...")
+
     try:
-        # Load data
-        logger.info("Loading reference data...")
-        reference_data = load_training_reference_data()
-        
-        logger.info("Loading production data (last 7 days)...")
-        current_data = load_production_data(days=7)
-        
+        logger.info("Loading reference sketch...")
+        reference_sketch = load_reference_sketch()
+
+        logger.info(f"Updating daily sketches (last {DRIFT_WINDOW_DAYS} days)...")
+        current_sketch = None
+        if reference_sketch is not None:
+            paths = update_daily_sketches(reference_sketch, INFERENCE_LOG_PATH, DAILY_SKETCH_PATH, days=DRIFT_WINDOW_DAYS)
+            current_sketch = window_sketch(paths)
+
         # Check if we have data
-        if reference_data.empty or current_data.empty:
+        if reference_sketch is None or current_sketch is None or current_sketch.rows == 0 or not current_sketch.columns:
             logger.warning("Insufficient data for drift detection. Skipping...")
             return {
                 "status": "skipped",
@@ -83,22 +93,31 @@ def check_data_drift(**context):
                 "dataset_drift": False,
                 "drift_share": 0.0
             }
-        
-        # Calculate drift
-        logger.info("Calculating drift metrics with Evidently...")
-        report, drift_summary = calculate_drift_report(reference_data, current_data)
-        
+
+        drift_summary_result = drift_summary(reference_sketch, current_sketch)
+        drift_summary_result['report_path'] = None
+        logger.info(f"Sketch drift share: {drift_summary_result['drift_share']:.2%} over {current_sketch.rows} rows")
+
+        # Full Evidently report only when the sketches say something changed
+        if drift_summary_result['dataset_drift'] or check_drift_threshold(drift_summary_result, threshold=0.15):
+            logger.info("Drift threshold tripped. Calculating full report with Evidently...")
+            reference_data = load_training_reference_data()
+            current_data = load_production_data(days=DRIFT_WINDOW_DAYS)
+            columns = [c for c in current_sketch.columns if c in reference_data.columns and c in current_data.columns]
+            _, evidently_summary = calculate_drift_report(reference_data[columns], current_data[columns])
+            drift_summary_result['evidently'] = {k: v for k, v in evidently_summary.items() if k != "report_path"}
+            drift_summary_result['report_path'] = evidently_summary['report_path']
+
         logger.info(f"Drift detection completed!")
-        logger.info(f"Dataset drift detected: {drift_summary['dataset_drift']}")
-        logger.info(f"Drift share: {drift_summary['drift_share']:.2%}")
-        logger.info(f"Drifted columns: {drift_summary['number_of_drifted_columns']}")
-        logger.info(f"Report saved to: {drift_summary['report_path']}")
-        
+        logger.info(f"Dataset drift detected: {drift_summary_result['dataset_drift']}")
+        logger.info(f"Drifted columns: {drift_summary_result['number_of_drifted_columns']}")
+        logger.info(f"Report saved to: {drift_summary_result['report_path']}")
+
         # Add status
-        drift_summary['status'] = 'ok'
-        
-        return drift_summary
-        
+        drift_summary_result['status'] = 'ok'
+
+        return drift_summary_result
+
     except Exception as e:
         logger.error(f"Error during drift detection: {e}", exc_info=True)
         return {
@@ -164,7 +183,7 @@ def generate_drift_report(**context):
     Dataset Drift Detected: {data_drift_result.get('dataset_drift', 'N/A')}
     Drift Share: {data_drift_result.get('drift_share', 0):.2%}
     Drifted Columns: {data_drift_result.get('number_of_drifted_columns', 'N/A')}
-    Report: {data_drift_result.get('report_path', 'N/A')}
+    Report: {data_drift_result.get('report_path') or 'N/A'}
     
     🎯 MODEL PERFORMANCE
     ────────────────────────────────────────────────────────────
@@ -7,12 +7,15 @@ in production inference data compared to training data.
 
 import pandas as pd
 import polars as pl
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from evidently.report import Report
 from evidently.metric_preset import DataDriftPreset, DataQualityPreset
 from evidently.metrics import DatasetDriftMetric, ColumnDriftMetric
 
+from utils.drift_sketches import DatasetSketch
+
 
 def load_training_reference_data(data_path: str = "/opt/airflow/data/curated") -> pd.DataFrame:
     """
@@ -40,28 +43,73 @@ def load_training_reference_data(data_path: str = "/opt/airflow/data/curated") -
     return df
 
 
+def load_reference_sketch(data_path: str = "/opt/airflow/data/curated") -> Optional[DatasetSketch]:
+    """
+    Load the reference (training) drift sketch, building it once from the reference parquet.
+
+    The sketch is cached next to the parquet and rebuilt only when the parquet is newer.
+
+    Args:
+        data_path: Path to curated data directory
+
+    Returns:
+        DatasetSketch, or None if there is no reference dataset
+    """
+    reference_path = Path(data_path) / "training_reference.parquet"
+    sketch_path = Path(data_path) / "training_reference.sketch.json"
+    if not reference_path.exists():
+        print(f"Warning: Reference data not found at {reference_path}")
+        return None
+
+    if sketch_path.exists() and sketch_path.stat().st_mtime >= reference_path.stat().st_mtime:
+        return DatasetSketch.load(sketch_path)
+
+    print(f"Building reference sketch from {reference_path}...")
+    sketch = DatasetSketch.fit(pl.scan_parquet(reference_path))
+    sketch.save(sketch_path)
+    return sketch
+
+
 def load_production_data(days: int = 7, data_path: str = "/opt/airflow/data") -> pd.DataFrame:
     """
     Load recent production inference data.
-    
+
+    Reads the inference log written by the serving API (`serving/inference_logger.py`),
+    laid out as `<data_path>/inference_logs/dt=YYYY-MM-DD/*.parquet`. Only the partitions
+    inside the window are scanned (lazily), so the cost does not grow with the log history.
+    List columns (raw skill phrases) are dropped; drift is computed on the flat columns.
+
     Args:
         days: Number of days of recent data to load
         data_path: Path to data directory
-        
+
     Returns:
-        pandas DataFrame with production data
+        pandas DataFrame with production data (empty if nothing was logged in the window)
     """
-    # In a real implementation, you would:
-    # 1. Query your inference logs/database
-    # 2. Filter by date range
-    # 3. Return the data
-    
-    # Placeholder implementation
-    print(f"Loading last {days} days of production data...")
-    # This should be replaced with actual data loading logic
-    df = pd.DataFrame()
-    
-    return df
+    log_root = Path(data_path) / "inference_logs"
+    now = datetime.now(timezone.utc)
+    first_day = (now - timedelta(days=days)).date().isoformat()
+
+    # Partition pruning: pick the dt= directories in the window before touching any file
+    files = [
+        str(part_file)
+        for partition in sorted(log_root.glob("dt=*"))
+        if partition.name[len("dt="):] >= first_day
+        for part_file in sorted(partition.glob("*.parquet"))
+    ]
+    print(f"Loading last {days} days of production data ({len(files)} files)...")
+    if not files:
+        return pd.DataFrame()
+
+    lazy = pl.concat([pl.scan_parquet(f) for f in files], how="diagonal")
+    flat_columns = [name for name, dtype in lazy.schema.items() if not isinstance(dtype, pl.List)]
+    df = (
+        lazy
+        .filter(pl.col("ts") >= pl.lit(now - timedelta(days=days)))
+        .select(flat_columns)
+        .collect()
+    )
+    return df.to_pandas()
 
 
 def calculate_drift_report(
@@ -0,0 +1,323 @@
+"""
+Sketch-based Drift Statistics
+
+Mergeable per-column sketches so drift can be tracked without materializing the
+reference and production frames:
+
+- numeric columns: fixed-edge histograms (edges taken from reference quantiles)
+- categorical columns: counts over the reference top-k categories, everything else
+  folded into an "other" bucket
+
+Both keep a separate null bucket and merge by adding counts, so a window sketch is the
+sum of its daily sketches. PSI / Jensen-Shannon distances are computed from the counts
+in O(columns x buckets). The full Evidently report is only needed when a threshold trips.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import polars as pl
+
+SKETCH_VERSION = 1
+DEFAULT_BINS = 20
+DEFAULT_TOP_K = 50
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+
+class NumericSketch:
+    """Histogram over fixed inner edges: buckets (-inf, e0), [e0, e1), ..., [en, +inf), plus nulls."""
+
+    kind = "numeric"
+
+    def __init__(self, edges: Iterable[float], counts: Optional[Iterable[int]] = None, nulls: int = 0):
+        self.edges = np.asarray(list(edges), dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None else np.asarray(list(counts), dtype=np.int64)
+        self.nulls = int(nulls)
+
+    @classmethod
+    def fit(cls, values: pl.Series, bins: int = DEFAULT_BINS) -> "NumericSketch":
+        """Reference sketch: inner edges at the reference quantiles (duplicates collapsed)."""
+        finite = values.drop_nulls().cast(pl.Float64).to_numpy()
+        finite = finite[np.isfinite(finite)]
+        edges = np.unique(np.quantile(finite, np.linspace(0, 1, bins + 1))[1:-1]) if len(finite) else []
+        return cls(edges).update(values)
+
+    def empty_like(self) -> "NumericSketch":
+        return NumericSketch(self.edges)
+
+    def update(self, values: pl.Series) -> "NumericSketch":
+        self.nulls += values.null_count()
+        present = values.drop_nulls().cast(pl.Float64).to_numpy()
+        buckets = np.searchsorted(self.edges, present, side="right")
+        self.counts += np.bincount(buckets, minlength=len(self.counts))
+        return self
+
+    def merge(self, other: "NumericSketch") -> "NumericSketch":
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge numeric sketches with different bin edges")
+        return NumericSketch(self.edges, self.counts + other.counts, self.nulls + other.nulls)
+
+    def distribution(self) -> np.ndarray:
+        return np.append(self.counts, self.nulls)
+
+    def to_dict(self) -> Dict:
+        return {"kind": self.kind, "edges": self.edges.tolist(), "counts": self.counts.tolist(), "nulls": self.nulls}
+
+
+class CategoricalSketch:
+    """Counts over a fixed category vocabulary (reference top-k), with an "other" and a null bucket."""
+
+    kind = "categorical"
+
+    def __init__(self, categories: Iterable[str], counts: Optional[Iterable[int]] = None, nulls: int = 0):
+        self.categories = [str(c) for c in categories]
+        self._position = {c: i for i, c in enumerate(self.categories)}
+        size = len(self.categories) + 1  # + "other"
+        self.counts = np.zeros(size, dtype=np.int64) if counts is None else np.asarray(list(counts), dtype=np.int64)
+        self.nulls = int(nulls)
+
+    @classmethod
+    def fit(cls, values: pl.Series, top_k: int = DEFAULT_TOP_K) -> "CategoricalSketch":
+        frequent = values.drop_nulls().cast(pl.Utf8).value_counts(sort=True).head(top_k)
+        return cls(frequent.to_series(0).to_list()).update(values)
+
+    def empty_like(self) -> "CategoricalSketch":
+        return CategoricalSketch(self.categories)
+
+    def update(self, values: pl.Series) -> "CategoricalSketch":
+        self.nulls += values.null_count()
+        counts = values.drop_nulls().cast(pl.Utf8).value_counts()
+        for category, count in zip(counts.to_series(0).to_list(), counts.to_series(1).to_list()):
+            self.counts[self._position.get(category, len(self.categories))] += count
+        return self
+
+    def merge(self, other: "CategoricalSketch") -> "CategoricalSketch":
+        if self.categories != other.categories:
+            raise ValueError("Cannot merge categorical sketches with different categories")
+        return CategoricalSketch(self.categories, self.counts + other.counts, self.nulls + other.nulls)
+
+    def distribution(self) -> np.ndarray:
+        return np.append(self.counts, self.nulls)
+
+    def to_dict(self) -> Dict:
+        return {"kind": self.kind, "categories": self.categories, "counts": self.counts.tolist(), "nulls": self.nulls}
+
+
+Sketch = Union[NumericSketch, CategoricalSketch]
+
+
+def _sketch_from_dict(data: Dict) -> Sketch:
+    if data["kind"] == NumericSketch.kind:
+        return NumericSketch(data["edges"], data["counts"], data["nulls"])
+    return CategoricalSketch(data["categories"], data["counts"], data["nulls"])
+
+
+class DatasetSketch:
+    """Column name -> sketch. Serializable to JSON and mergeable column by column."""
+
+    def __init__(self, columns: Dict[str, Sketch], rows: int = 0, reference: Optional[str] = None,
+                 source: Optional[List[list]] = None):
+        self.columns = columns
+        self.rows = rows
+        # Bucket fingerprint of the reference this sketch was bucketed with (None for a reference itself)
+        self.reference = reference
+        # [file name, size, mtime_ns] of the log part files a daily sketch was built from
+        self.source = source
+
+    def bucket_fingerprint(self) -> str:
+        """Hash of the bin edges / categories: sketches are only comparable under the same fingerprint."""
+        buckets = {name: [sketch.kind, sketch.edges.tolist() if sketch.kind == NumericSketch.kind else sketch.categories]
+                   for name, sketch in sorted(self.columns.items())}
+        return hashlib.sha256(json.dumps(buckets).encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def fit(cls, df: Frame, columns: Optional[List[str]] = None, bins: int = DEFAULT_BINS,
+            top_k: int = DEFAULT_TOP_K) -> "DatasetSketch":
+        """
+        Reference sketch from training data.
+
+        Args:
+            df: Reference frame (eager or lazy)
+            columns: Columns to track (default: every numeric, string, categorical or boolean column)
+            bins: Histogram buckets for numeric columns
+            top_k: Categories kept per categorical column
+
+        Returns:
+            DatasetSketch whose bin edges / categories define the buckets for production sketches
+        """
+        frame = df.collect() if isinstance(df, pl.LazyFrame) else df
+        sketches = {}
+        for name in columns or frame.columns:
+            dtype = frame.schema.get(name)
+            if dtype in pl.NUMERIC_DTYPES:
+                sketches[name] = NumericSketch.fit(frame.get_column(name), bins)
+            elif dtype in (pl.Utf8, pl.Categorical, pl.Boolean):
+                sketches[name] = CategoricalSketch.fit(frame.get_column(name), top_k)
+        return cls(sketches, frame.height)
+
+    def empty_like(self) -> "DatasetSketch":
+        return DatasetSketch({name: sketch.empty_like() for name, sketch in self.columns.items()},
+                             reference=self.bucket_fingerprint())
+
+    def sketch(self, df: Frame) -> "DatasetSketch":
+        """Sketch of `df` bucketed like this (reference) sketch. Columns absent from `df` are skipped."""
+        result = self.empty_like()
+        names = df.columns
+        present = [name for name in result.columns if name in names]
+        frame = df.select(present).collect() if isinstance(df, pl.LazyFrame) else df.select(present)
+        for name in present:
+            result.columns[name].update(frame.get_column(name))
+        result.columns = {name: result.columns[name] for name in present}
+        result.rows = frame.height
+        return result
+
+    def merge(self, other: "DatasetSketch") -> "DatasetSketch":
+        shared = set(self.columns) & set(other.columns)
+        merged = {name: self.columns[name].merge(other.columns[name]) for name in self.columns if name in shared}
+        merged.update({name: sketch for name, sketch in self.columns.items() if name not in shared})
+        merged.update({name: sketch for name, sketch in other.columns.items() if name not in shared})
+        return DatasetSketch(merged, self.rows + other.rows, self.reference or other.reference)
+
+    def to_dict(self) -> Dict:
+        return {"version": SKETCH_VERSION, "rows": self.rows, "reference": self.reference, "source": self.source,
+                "columns": {name: sketch.to_dict() for name, sketch in self.columns.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DatasetSketch":
+        if data.get("version") != SKETCH_VERSION:
+            raise ValueError(f"Unsupported sketch version {data.get('version')}")
+        return cls({name: _sketch_from_dict(s) for name, s in data["columns"].items()}, data["rows"],
+                   data.get("reference"), data.get("source"))
+
+    def save(self, path: Union[str, Path]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional["DatasetSketch"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        return cls.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _probabilities(counts: np.ndarray, eps: float) -> np.ndarray:
+    counts = counts.astype(np.float64) + eps
+    return counts / counts.sum()
+
+
+def psi(reference: np.ndarray, current: np.ndarray, eps: float = 1e-4) -> float:
+    """Population Stability Index between two bucket count vectors."""
+    p, q = _probabilities(reference, eps), _probabilities(current, eps)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def js_distance(reference: np.ndarray, current: np.ndarray, eps: float = 1e-12) -> float:
+    """Jensen-Shannon distance (base 2, in [0, 1]) between two bucket count vectors."""
+    p, q = _probabilities(reference, eps), _probabilities(current, eps)
+    m = (p + q) / 2
+    divergence = 0.5 * np.sum(p * np.log2(p / m)) + 0.5 * np.sum(q * np.log2(q / m))
+    return float(np.sqrt(max(divergence, 0.0)))
+
+
+def drift_summary(reference: DatasetSketch, current: DatasetSketch, psi_threshold: float = 0.2,
+                  dataset_drift_share: float = 0.5) -> Dict:
+    """
+    Per-column PSI / JS distance from two sketches.
+
+    Args:
+        reference: Reference (training) sketch
+        current: Production sketch, bucketed like the reference
+        psi_threshold: A column is drifted when its PSI exceeds this value
+        dataset_drift_share: Dataset drift is flagged when this share of columns drifted
+
+    Returns:
+        Dict with the same summary keys as `calculate_drift_report` plus per-column stats
+    """
+    columns = {}
+    for name, sketch in current.columns.items():
+        if name not in reference.columns or sketch.distribution().sum() == 0:
+            continue
+        ref, cur = reference.columns[name].distribution(), sketch.distribution()
+        column_psi = psi(ref, cur)
+        columns[name] = {"psi": column_psi, "js": js_distance(ref, cur), "drifted": column_psi > psi_threshold}
+
+    drifted = sum(c["drifted"] for c in columns.values())
+    drift_share = drifted / len(columns) if columns else 0.0
+    return {
+        "dataset_drift": bool(columns) and drift_share >= dataset_drift_share,
+        "drift_share": drift_share,
+        "number_of_drifted_columns": drifted,
+        "rows": current.rows,
+        "columns": columns,
+    }
+
+
+def _partition_source(files: List[Path]) -> List[list]:
+    """[name, size, mtime_ns] of each part file: changes whenever the logger adds or replaces a file."""
+    source = []
+    for f in files:
+        stat = f.stat()
+        source.append([f.name, stat.st_size, stat.st_mtime_ns])
+    return source
+
+
+def update_daily_sketches(reference: DatasetSketch, log_root: Union[str, Path], sketch_root: Union[str, Path],
+                          days: int = 7) -> List[Path]:
+    """
+    Sketches each `dt=YYYY-MM-DD` inference log partition in the window.
+
+    A cached sketch is reused only while it was bucketed with this reference and the partition
+    still has the part files it was built from (name, size, mtime); a day that received more
+    logs after it was sketched (e.g. today's partition at the time of the run) is re-sketched.
+
+    Args:
+        reference: Reference sketch (defines buckets)
+        log_root: Inference log root (`<data>/inference_logs`)
+        sketch_root: Where daily sketches are stored (`<sketch_root>/dt=YYYY-MM-DD.json`)
+        days: Window size in days
+
+    Returns:
+        Paths of the daily sketches inside the window
+    """
+    log_root, sketch_root = Path(log_root), Path(sketch_root)
+    today = datetime.now(timezone.utc).date()
+    first_day = (today - timedelta(days=days)).isoformat()
+
+    fingerprint = reference.bucket_fingerprint()
+
+    paths = []
+    for partition in sorted(log_root.glob("dt=*")):
+        day = partition.name[len("dt="):]
+        if day < first_day:
+            continue
+        path = sketch_root / f"{partition.name}.json"
+        files = sorted(partition.glob("*.parquet"))
+        cached = DatasetSketch.load(path)
+        if files:
+            source = _partition_source(files)
+            if cached is None or cached.reference != fingerprint or cached.source != source:
+                lazy = pl.concat([pl.scan_parquet(f) for f in files], how="diagonal")
+                cached = reference.sketch(lazy)
+                cached.source = source
+                cached.save(path)
+        # Stale sketches whose logs are gone cannot be re-sketched: leave them out of the window
+        if cached is not None and cached.reference == fingerprint:
+            paths.append(path)
+    return paths
+
+
+def window_sketch(paths: Iterable[Union[str, Path]]) -> DatasetSketch:
+    """Merges daily sketches into one window sketch."""
+    merged = DatasetSketch({})
+    for path in paths:
+        merged = merged.merge(DatasetSketch.load(path))
+    return merged
@@ -1,10 +1,18 @@
 import polars as pl
 import json
 import os
-import concurrent.futures
+import argparse
+import asyncio
+import hashlib
+import sqlite3
+import multiprocessing
+from pathlib import Path
+from typing import Iterable, List
 from tqdm import tqdm
-from pipe.features.prompts import chamar_llm, prompt_candidato
+from pipe.features.prompts import achamar_llm, prompt_candidato
+from data_pipeline.infra.llm_gateway import aclose_llm_provider
 from pipe.features.free_text_transform import CandidatoEstruturado, extrair_json_limpo
+from pipe.features.dedup import CAMPOS_TEXTO_CANDIDATO, hash_texto, planejar_deduplicacao
 import logging
 
 # Setup Logger
@@ -13,15 +21,70 @@ logger = logging.getLogger("batch_extraction")
 
 # Configuration
 INPUT_FILE = "data/curated/applicants.parquet"
-OUTPUT_FILE = "data/feature_store/extracted_resumes_batch.jsonl"
-MAX_WORKERS = 4  # Adjust based on system resources
+OUTPUT_DIR = "data/feature_store/extracted_resumes_batch"
+CHECKPOINT_FILE = "checkpoint.sqlite"
+# Single-file output of earlier releases; its IDs count as done (main_profile_index still reads it)
+LEGACY_OUTPUT_FILE = OUTPUT_DIR + ".jsonl"
+# In-flight LLM requests are capped per provider by the gateway (LLM_MAX_CONCURRENCY / <PROVIDER>_MAX_CONCURRENCY)
+DEFAULT_CONCURRENCY = 4
 
-def process_single_candidate(row):
+def shard_of(key, n_shards: int) -> int:
+    """
+    Stable shard assignment (independent of PYTHONHASHSEED and of the Polars version).
+    """
+    digest = hashlib.md5(str(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % n_shards
+
+class ExtractionCheckpoint:
+    """
+    Indexed record of extracted candidate IDs (SQLite primary key -> O(log n) lookup per ID).
+    Shared by all shard processes; WAL lets them commit concurrently.
+    """
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS done (codigo_candidato TEXT PRIMARY KEY, shard INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def is_done(self, candidate_id) -> bool:
+        row = self.conn.execute("SELECT 1 FROM done WHERE codigo_candidato = ?", (str(candidate_id),)).fetchone()
+        return row is not None
+
+    def pending(self, candidate_ids: Iterable) -> List:
+        return [cid for cid in candidate_ids if not self.is_done(cid)]
+
+    def mark_done(self, candidate_id, shard: int):
+        self.conn.execute("INSERT OR IGNORE INTO done VALUES (?, ?)", (str(candidate_id), shard))
+
+    def seed_from_jsonl(self, path: Path) -> int:
+        """
+        One-time import of the IDs already extracted into a legacy JSONL output (shard -1).
+        Re-runs are no-ops once the file has been imported.
+        """
+        if not path.exists():
+            return 0
+        key = f"seeded:{path.resolve()}"
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            return 0
+        before = self.count()
+        with path.open("r", encoding="utf-8") as f:
+            ids = ((str(json.loads(line)["codigo_candidato"]), -1) for line in f if line.strip())
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR IGNORE INTO done VALUES (?, ?)", ids)
+            self.conn.execute("INSERT OR IGNORE INTO meta VALUES (?, '1')", (key,))
+            self.conn.execute("COMMIT")
+        return self.count() - before
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM done").fetchone()[0]
+
+async def process_single_candidate(row):
     """
     Process a single candidate row: generate prompt -> call LLM -> parse JSON.
     """
     candidate_id = row['codigo_candidato']
-    
+
     # Generate Prompt
     try:
         prompt = prompt_candidato(row)
@@ -31,23 +94,26 @@ def process_single_candidate(row):
 
     # Call LLM
     try:
-        # Using the simple chamar_llm from prompts.py
+        # Async gateway call: the event loop keeps other candidates in flight while this one generates
         # You might want to implement retry logic here similar to free_text_transform if reliability is low
-        response_text = chamar_llm(prompt, model_name="gemma3:1b")
-        
+        response_text = await achamar_llm(prompt, model_name="gemma3:1b")
+
         # Parse and Validate
         try:
             data_dict = extrair_json_limpo(response_text)
         except Exception as e:
             logger.error(f"JSON parsing failed. Raw text: {response_text[:200]}...")
             return None
-        
+        if not data_dict:
+            logger.error(f"Empty extraction for {candidate_id}. Raw text: {response_text[:200]}...")
+            return None
+
         # Validate with Pydantic (optional but good for consistency)
         try:
             CandidatoEstruturado.model_validate(data_dict)
         except Exception as validation_error:
             logger.warning(f"Validation failed for {candidate_id}: {validation_error}. Saving raw anyway.")
-        
+
         # Add ID
         data_dict['codigo_candidato'] = candidate_id
         return data_dict
@@ -56,56 +122,123 @@ def process_single_candidate(row):
         logger.error(f"LLM call failed for {candidate_id}: {e}")
         return None
 
-def run_batch_extraction():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Input file not found: {INPUT_FILE}")
-        return
-
-    print(f"Reading {INPUT_FILE}...")
+def load_shard(shard_index: int, n_shards: int) -> pl.DataFrame:
     df = pl.read_parquet(INPUT_FILE)
-    
-    # Rename columns to match what prompt_candidato expects if needed
-    # prompt_candidato uses 'app_cv_pt'. 
-    # Check if we need to rename.
+
+    # prompt_candidato uses 'app_cv_pt'
     if 'cv_pt' in df.columns and 'app_cv_pt' not in df.columns:
          df = df.rename({'cv_pt': 'app_cv_pt'})
-    
-    # Filter already processed
-    processed_ids = set()
-    if os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, 'r') as f:
-            for line in f:
+
+    # Shard by resume text hash: identical CVs land in the same process and are extracted once
+    mask = [shard_of(hash_texto(row, CAMPOS_TEXTO_CANDIDATO), n_shards) == shard_index
+            for row in df.select(CAMPOS_TEXTO_CANDIDATO).iter_rows(named=True)]
+    return df.filter(pl.Series(mask, dtype=pl.Boolean))
+
+async def run_shard(shard_index: int, n_shards: int, concurrency: int, limit: int = None):
+    output_dir = Path(OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"shard-{shard_index:03d}.jsonl"
+    checkpoint = ExtractionCheckpoint(output_dir / CHECKPOINT_FILE)
+
+    df = load_shard(shard_index, n_shards)
+    pending_ids = set(checkpoint.pending(df['codigo_candidato'].to_list()))
+    candidates_to_process = df.filter(pl.col('codigo_candidato').is_in(list(pending_ids)))
+    if limit is not None:
+        # Global limit split across shards
+        candidates_to_process = candidates_to_process.head(-(-limit // n_shards))
+
+    logger.info(f"[shard {shard_index}/{n_shards}] {len(df) - len(pending_ids)} already processed, "
+                f"{len(candidates_to_process)} to process with concurrency {concurrency}")
+
+    # One LLM call per distinct resume text; the result is fanned out to every owning ID
+    plan = planejar_deduplicacao(candidates_to_process.iter_rows(named=True), 'codigo_candidato', CAMPOS_TEXTO_CANDIDATO)
+    logger.info(f"[shard {shard_index}/{n_shards}] {plan.resumo('candidato')}")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for text_hash, row in plan.representantes.items():
+        queue.put_nowait((row, plan.donos[text_hash]))
+
+    progress = tqdm(total=len(plan.representantes), desc=f"shard {shard_index}", position=shard_index)
+    failures = 0
+
+    with open(output_file, 'a', encoding='utf-8') as f:
+        async def worker():
+            nonlocal failures
+            while True:
                 try:
-                    rec = json.loads(line)
-                    processed_ids.add(rec['codigo_candidato'])
-                except:
-                    pass
-    
-    print(f"Already processed: {len(processed_ids)} records")
-    
-    # Candidates to process
-    candidates_to_process = df.filter(~pl.col('codigo_candidato').is_in(processed_ids))
-    
-    # For testing, assume we process a chunk or all. 
-    # Warning: Running all might take a long time on CPU only.
-    candidates_to_process = candidates_to_process.head(5) # Comment this out for full run
-    
-    print(f"Starting processing for {len(candidates_to_process)} records with {MAX_WORKERS} workers...")
-    
-    futures_map = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        for row in candidates_to_process.to_dicts():
-            future = executor.submit(process_single_candidate, row)
-            futures_map[future] = row['codigo_candidato']
-        
-        with open(OUTPUT_FILE, 'a') as f:
-            for future in tqdm(concurrent.futures.as_completed(futures_map), total=len(futures_map)):
-                result = future.result()
+                    row, owners = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await process_single_candidate(row)
                 if result:
-                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    for candidate_id in owners:
+                        f.write(json.dumps({**result, 'codigo_candidato': candidate_id}, ensure_ascii=False) + "\n")
                     f.flush()
+                    # Checkpoint only after the lines are on disk; failed rows are retried on the next run
+                    for candidate_id in owners:
+                        checkpoint.mark_done(candidate_id, shard_index)
+                else:
+                    failures += 1
+                progress.update(1)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    progress.close()
+    logger.info(f"[shard {shard_index}/{n_shards}] done ({failures} failures, "
+                f"{plan.chamadas_economizadas} LLM calls saved by dedup). Output: {output_file}")
+
+async def _run_shard_and_close(shard_index: int, n_shards: int, concurrency: int, limit: int = None):
+    try:
+        await run_shard(shard_index, n_shards, concurrency, limit)
+    finally:
+        # The async client is bound to this loop: release its connection pool before asyncio.run returns
+        await aclose_llm_provider()
+
+def shard_main(shard_index: int, n_shards: int, concurrency: int, limit: int = None):
+    # Each process owns its async LLM pool; size the gateway semaphore before the provider is built
+    os.environ["LLM_MAX_CONCURRENCY"] = str(concurrency)
+    asyncio.run(_run_shard_and_close(shard_index, n_shards, concurrency, limit))
+
+def run_batch_extraction(n_shards: int = 1, concurrency: int = DEFAULT_CONCURRENCY, limit: int = None,
+                         shard_index: int = None):
+    if not os.path.exists(INPUT_FILE):
+        print(f"Input file not found: {INPUT_FILE}")
+        return
+
+    # Seed before any shard starts so candidates extracted by the legacy single-file run are not re-sent to the LLM
+    seeded = ExtractionCheckpoint(Path(OUTPUT_DIR) / CHECKPOINT_FILE).seed_from_jsonl(Path(LEGACY_OUTPUT_FILE))
+    if seeded:
+        logger.info(f"Checkpoint seeded with {seeded} candidates from {LEGACY_OUTPUT_FILE}")
+
+    if shard_index is not None or n_shards == 1:
+        shard_main(shard_index or 0, n_shards, concurrency, limit)
+    else:
+        # spawn (not fork): Polars' thread pool is not fork-safe
+        ctx = multiprocessing.get_context("spawn")
+        processes = [
+            ctx.Process(target=shard_main, args=(i, n_shards, concurrency, limit), name=f"extract-shard-{i}")
+            for i in range(n_shards)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        failed = [p.name for p in processes if p.exitcode != 0]
+        if failed:
+            logger.error(f"Shards exited with errors: {failed} (re-run to resume)")
+
+    checkpoint = ExtractionCheckpoint(Path(OUTPUT_DIR) / CHECKPOINT_FILE)
+    print(f"Batch extraction complete. {checkpoint.count()} candidates extracted in {OUTPUT_DIR}")
 
-    print(f"Batch extraction complete. Results saved to {OUTPUT_FILE}")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sharded, resumable LLM extraction of applicant resumes.")
+    parser.add_argument("--shards", type=int, default=1, help="Number of worker processes (sharded by resume text hash, so identical CVs share a shard)")
+    parser.add_argument("--shard-index", type=int, default=None, help="Run only this shard in the current process")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="In-flight LLM requests per process")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most N pending candidates (smoke runs)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    run_batch_extraction()
+    args = parse_args()
+    run_batch_extraction(n_shards=args.shards, concurrency=args.concurrency, limit=args.limit,
+                         shard_index=args.shard_index)
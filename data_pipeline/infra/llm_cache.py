@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+# -------------------------------------------------------------------------
+# Content-addressed cache for LLM extractions
+# -------------------------------------------------------------------------
+
+class CachedResponse(NamedTuple):
+    raw: str
+    parsed: Optional[Dict[str, Any]]
+
+class LLMCache:
+    """
+    Durable SQLite cache of LLM generations keyed by (provider, model, prompt SHA-256, options).
+
+    Prompts are deterministic functions of the row text, so re-submitting a known
+    resume or job description is served from disk instead of re-running inference.
+    Entries expire after `ttl_seconds`; beyond `max_entries` the least recently
+    used ones are evicted. WAL mode lets several worker processes share the file.
+    """
+
+    def __init__(self, path: Optional[Path] = None, ttl_seconds: Optional[float] = 30 * 24 * 3600,
+                 max_entries: Optional[int] = 100_000, evict_every: int = 500):
+        self.path = Path(path or os.getenv("LLM_CACHE_PATH", "data/llm_cache/llm_cache.sqlite"))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.counters = {"hits": 0, "misses": 0, "writes": 0}
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                raw TEXT NOT NULL,
+                parsed TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        material = json.dumps([provider, model, prompt_hash, options or {}], sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT raw, parsed, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl_seconds is not None and now - row[2] > self.ttl_seconds):
+                self.counters["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.counters["hits"] += 1
+        return CachedResponse(row[0], json.loads(row[1]) if row[1] is not None else None)
+
+    def put(self, key: str, provider: str, model: str, raw: str, parsed: Optional[Dict[str, Any]] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, provider, model, raw, parsed, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, raw,
+                 json.dumps(parsed, ensure_ascii=False) if parsed is not None else None, now, now),
+            )
+            self.counters["writes"] += 1
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.evict_every:
+                self._evict_locked()
+
+    def evict(self):
+        """Drops expired entries, then the least recently used ones above `max_entries`."""
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if self.max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "  SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,),
+            )
+        self._writes_since_evict = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# -------------------------------------------------------------------------
+# Factory
+# -------------------------------------------------------------------------
+
+_default_cache: Optional[LLMCache] = None
+_default_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Process-wide cache configured by env vars:
+    LLM_CACHE_ENABLED (default true), LLM_CACHE_PATH, LLM_CACHE_TTL_DAYS (default 30),
+    LLM_CACHE_MAX_ENTRIES (default 100000).
+    """
+    global _default_cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = LLMCache(
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL_DAYS", "30")) * 24 * 3600,
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000")),
+                )
+            except sqlite3.Error as e:
+                print(f"[LLM Cache] Disabled, could not open store: {e}")
+                return None
+    return _default_cache
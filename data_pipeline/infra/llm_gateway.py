@@ -1,10 +1,58 @@
 import os
+import asyncio
+import threading
 import requests
+import httpx
 import json
 import time
 import psutil
-from typing import Protocol, Any, Dict, Optional
-from openai import OpenAI
+from functools import lru_cache
+from typing import Protocol, Any, Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from openai import OpenAI, AsyncOpenAI
+
+# -------------------------------------------------------------------------
+# Concurrency
+# -------------------------------------------------------------------------
+
+def get_max_concurrency(provider_name: str) -> int:
+    """
+    Max in-flight generations per provider.
+    '<PROVIDER>_MAX_CONCURRENCY' overrides the global 'LLM_MAX_CONCURRENCY' (default 4).
+    """
+    default = os.getenv("LLM_MAX_CONCURRENCY", "4")
+    return max(1, int(os.getenv(f"{provider_name.upper()}_MAX_CONCURRENCY", default)))
+
+class _LoopBound:
+    """
+    Holds asyncio resources (semaphore, async HTTP client) for the running event loop.
+    They are rebuilt if the adapter is reused from a different loop (e.g. successive asyncio.run calls);
+    call `aclose()` before each loop ends so the client's connection pool is released.
+    """
+    def __init__(self, factory, close):
+        self._factory = factory
+        self._close = close
+        self._loop = None
+        self._resources = None
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._resources is not None:
+                # Its transports belong to the previous loop: it can no longer be closed from here
+                print("Warning: async LLM client from a previous event loop was not closed; "
+                      "call aclose_llm_provider() before asyncio.run returns.")
+            self._resources = self._factory()
+            self._loop = loop
+        return self._resources
+
+    async def aclose(self):
+        """Closes the async client built for the running loop (no-op if none was built)."""
+        resources, loop = self._resources, self._loop
+        if resources is None or loop is not asyncio.get_running_loop():
+            return
+        self._resources = self._loop = None
+        await self._close(resources[1])
 
 # -------------------------------------------------------------------------
 # Interface Definition
@@ -28,6 +76,25 @@ class LLMProvider(Protocol):
         """
         ...
 
+    async def agenerate(self, prompt: str, model_name: Optional[str] = None, **kwargs) -> str:
+        """
+        Async variant of `generate`, backed by a pooled client and bounded by the provider semaphore.
+        """
+        ...
+
+    async def aclose(self) -> None:
+        """
+        Releases the async client of the running event loop. Call it before the loop ends.
+        """
+        ...
+
+    def generation_settings(self, model_name: Optional[str] = None, **kwargs) -> Tuple[str, Dict[str, Any]]:
+        """
+        Effective (model, generation options) a `generate` call with these arguments would use,
+        with the adapter's defaults resolved. The extraction cache keys on them.
+        """
+        ...
+
 # -------------------------------------------------------------------------
 # Adapters
 # -------------------------------------------------------------------------
@@ -35,18 +102,32 @@ class LLMProvider(Protocol):
 class OllamaAdapter:
     """
     Adapter for Local Ollama instance.
+    Keeps pooled keep-alive connections (requests.Session / httpx.AsyncClient).
     """
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", max_concurrency: Optional[int] = None):
         self.base_url = base_url
+        self.max_concurrency = max_concurrency or get_max_concurrency("ollama")
 
-    def generate(self, prompt: str, model_name: Optional[str] = None, **kwargs) -> str:
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=self.max_concurrency))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=self.max_concurrency))
+        self._sync_slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        self._async = _LoopBound(lambda: (
+            asyncio.Semaphore(self.max_concurrency),
+            httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=300,  # 5 min timeout for slow local inference
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            ),
+        ), close=lambda client: client.aclose())
+
+    def _payload(self, prompt: str, model_name: Optional[str], **kwargs) -> Dict[str, Any]:
         # Default to environment or hardcoded default
         model = model_name or os.getenv("LLM_MODEL_NAME", "gemma3:1b")
-        
-        start_time = time.time()
-        cpu_before = psutil.cpu_percent(interval=None)
-        
-        payload = {
+        return {
             "model": model,
             "prompt": prompt,
             "stream": False,
@@ -57,19 +138,32 @@ class OllamaAdapter:
             }
         }
 
+    async def aclose(self) -> None:
+        await self._async.aclose()
+
+    def generation_settings(self, model_name: Optional[str] = None, **kwargs) -> Tuple[str, Dict[str, Any]]:
+        payload = self._payload("", model_name, **kwargs)
+        return payload["model"], payload["options"]
+
+    def generate(self, prompt: str, model_name: Optional[str] = None, **kwargs) -> str:
+        payload = self._payload(prompt, model_name, **kwargs)
+        
+        start_time = time.time()
+        cpu_before = psutil.cpu_percent(interval=None)
+
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                headers={"Content-Type": "application/json"},
-                data=json.dumps(payload),
-                timeout=300 # 5 min timeout for slow local inference
-            )
+            with self._sync_slots:
+                response = self.session.post(
+                    f"{self.base_url}/api/generate",
+                    data=json.dumps(payload),
+                    timeout=300 # 5 min timeout for slow local inference
+                )
             response.raise_for_status()
             result = response.json()
             
             # Observability (Keep existing logs for now)
             exec_time = time.time() - start_time
-            print(f"[Ollama] Time: {exec_time:.2f}s | Model: {model}")
+            print(f"[Ollama] Time: {exec_time:.2f}s | Model: {payload['model']}")
             
             return result.get('response', '').strip()
             
@@ -77,30 +171,78 @@ class OllamaAdapter:
             print(f"[Ollama Error] Connection failed: {e}")
             raise RuntimeError(f"Ollama generation failed: {e}")
 
+    async def agenerate(self, prompt: str, model_name: Optional[str] = None, **kwargs) -> str:
+        payload = self._payload(prompt, model_name, **kwargs)
+        semaphore, client = self._async.get()
+
+        start_time = time.time()
+        try:
+            async with semaphore:
+                response = await client.post("/api/generate", json=payload)
+            response.raise_for_status()
+            result = response.json()
+
+            exec_time = time.time() - start_time
+            print(f"[Ollama] Time: {exec_time:.2f}s | Model: {payload['model']} (async)")
+
+            return result.get('response', '').strip()
+
+        except httpx.HTTPError as e:
+            print(f"[Ollama Error] Connection failed: {e}")
+            raise RuntimeError(f"Ollama generation failed: {e}")
+
 class DeepSeekAdapter:
     """
     Adapter for DeepSeek API (OpenAI Compatible).
     """
-    def __init__(self, api_key: Optional[str] = None):
+    BASE_URL = "https://api.deepseek.com/v1"
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: Optional[int] = None):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
              # Fallback or error - but we might lazily init
              pass
+        self.max_concurrency = max_concurrency or get_max_concurrency("deepseek")
         self.client = OpenAI(
             api_key=self.api_key or "sk-placeholder", 
-            base_url="https://api.deepseek.com/v1"
+            base_url=self.BASE_URL
         )
+        self._sync_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._async = _LoopBound(lambda: (
+            asyncio.Semaphore(self.max_concurrency),
+            AsyncOpenAI(api_key=self.api_key or "sk-placeholder", base_url=self.BASE_URL),
+        ), close=lambda client: client.close())
+
+    def _request(self, prompt: str, model_name: Optional[str], **kwargs) -> Dict[str, Any]:
+        return {
+            "model": model_name or "deepseek-chat",
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+            "temperature": kwargs.get("temperature", 0.1),
+            "max_tokens": kwargs.get("num_predict", 1536)
+        }
+
+    async def aclose(self) -> None:
+        await self._async.aclose()
+
+    def generation_settings(self, model_name: Optional[str] = None, **kwargs) -> Tuple[str, Dict[str, Any]]:
+        request = self._request("", model_name, **kwargs)
+        return request["model"], {"temperature": request["temperature"], "max_tokens": request["max_tokens"]}
 
     def generate(self, prompt: str, model_name: Optional[str] = None, **kwargs) -> str:
-        model = model_name or "deepseek-chat"
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                stream=False,
-                temperature=kwargs.get("temperature", 0.1),
-                max_tokens=kwargs.get("num_predict", 1536)
-            )
+            with self._sync_slots:
+                response = self.client.chat.completions.create(**self._request(prompt, model_name, **kwargs))
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"[DeepSeek Error] API call failed: {e}")
+            raise RuntimeError(f"DeepSeek generation failed: {e}")
+
+    async def agenerate(self, prompt: str, model_name: Optional[str] = None, **kwargs) -> str:
+        semaphore, client = self._async.get()
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(**self._request(prompt, model_name, **kwargs))
             return response.choices[0].message.content.strip()
         except Exception as e:
             print(f"[DeepSeek Error] API call failed: {e}")
@@ -110,17 +252,31 @@ class DeepSeekAdapter:
 # Factory
 # -------------------------------------------------------------------------
 
-def get_llm_provider() -> LLMProvider:
-    """
-    Returns the configured LLM Provider based on 'LLM_PROVIDER' env var.
-    Defaults to 'ollama'.
-    """
-    provider_name = os.getenv("LLM_PROVIDER", "ollama").lower()
-    
+@lru_cache(maxsize=None)
+def _cached_provider(provider_name: str) -> LLMProvider:
     if provider_name == "deepseek":
         return DeepSeekAdapter()
     elif provider_name == "ollama":
         return OllamaAdapter()
     else:
         print(f"Warning: Unknown provider '{provider_name}', defaulting to Ollama.")
-        return OllamaAdapter()
+        return _cached_provider("ollama")
+
+def get_llm_provider() -> LLMProvider:
+    """
+    Returns the configured LLM Provider based on 'LLM_PROVIDER' env var.
+    Defaults to 'ollama'. Adapters are process-wide singletons so their
+    connection pools and concurrency limits are shared by every caller.
+    """
+    provider_name = os.getenv("LLM_PROVIDER", "ollama").lower()
+    return _cached_provider(provider_name)
+
+async def aclose_llm_provider() -> None:
+    """
+    Closes the configured provider's async client for the running loop.
+    Await it at the end of every `asyncio.run` entry point (and on API shutdown).
+    """
+    provider = get_llm_provider()
+    aclose = getattr(provider, "aclose", None)
+    if aclose is not None:
+        await aclose()
@@ -3,13 +3,14 @@ from pathlib import Path
 
 from pipe.utils.logger import get_logger
 from pipe.utils.audit import save_quality_issues
-from pipe.ingest.read_raw import load_json_to_df, get_file_path
+from pipe.ingest.read_raw import get_file_path
+from pipe.ingest.stream_raw import iter_parquet_parts, scan_parquet_parts, stream_json_to_parquet
 from pipe.transform.curated_transform import flatten_struct_columns, normalize_dataframe
 from pipe.validation.schema_check import assert_valid_schema
 from pipe.validation.quality_rules import (
     check_required_columns,
     check_duplicates,
-    get_invalid_rows_for_required_columns,
+    invalid_required_mask,
 )
 from pipe.validation.schemas_curated.curated_jobs_schema import CuratedJobRecord
 from pipe.validation.schemas_curated.curated_prospects_schema import CuratedProspectRecord
@@ -18,16 +19,26 @@ from pipe.validation.schemas_curated.curated_applicants_schema import CuratedApp
 logger = get_logger("curated_main")
 OUTPUT_DIR = Path("data/curated")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+STAGING_DIR = Path("data/staging")
+
+
+def load_raw_flattened(file_name: str, folder: str, id_field: str, model, label: str) -> pl.LazyFrame:
+    """
+    Lê o dump raw em streaming: registros em lotes (RAW_INGEST_BATCH_SIZE), achatados com
+    `flatten_struct_columns` por lote e gravados em Parquet no staging, sem `json.load` do arquivo inteiro.
+    O schema é validado parte a parte e o retorno é um LazyFrame sobre o staging: checagens,
+    normalização e escrita (`sink_parquet`) rodam em streaming, com memória limitada ao lote.
+    """
+    staging = stream_json_to_parquet(get_file_path(file_name, folder), id_field, STAGING_DIR / folder,
+                                     transform=flatten_struct_columns)
+    assert_valid_schema(iter_parquet_parts(staging), model, label=label, id_field=id_field)
+    return scan_parquet_parts(staging)
 
 
 # ------------------------- JOBS ------------------------- #
 def process_jobs() -> None:
     logger.info("Processando: jobs.json")
-    df = load_json_to_df(get_file_path("jobs.json", "jobs"), "codigo_vaga")
-    df = flatten_struct_columns(df)
-
-    assert_valid_schema(df, CuratedJobRecord, label="jobs",
-                        id_field="codigo_vaga")
+    df = load_raw_flattened("jobs.json", "jobs", "codigo_vaga", CuratedJobRecord, label="jobs")
 
     issues = []
     issues += check_required_columns(df, ["codigo_vaga"])
@@ -45,29 +56,23 @@ def process_jobs() -> None:
     df = normalize_dataframe(df, date_columns=[
         "ib_data_requicisao", "ib_data_inicial", "ib_data_final", "ib_limite_esperado_para_contratacao"
     ])
-    df.write_parquet(OUTPUT_DIR / "jobs.parquet")
+    df.sink_parquet(OUTPUT_DIR / "jobs.parquet")
     logger.info("jobs.parquet gerado com sucesso.")
 
 
 # ----------------------- PROSPECTS ---------------------- #
 def process_prospects() -> None:
     logger.info("Processando: prospects.json")
-    df = load_json_to_df(get_file_path(
-        "prospects.json", "prospects"), "codigo_vaga")
-    df = flatten_struct_columns(df)
-
-    assert_valid_schema(df, CuratedProspectRecord,
-                        label="prospects", id_field="codigo_vaga")
+    df = load_raw_flattened("prospects.json", "prospects", "codigo_vaga", CuratedProspectRecord, label="prospects")
 
     # ----------- Tratamento de registros inválidos por campos obrigatórios nulos ----------- #
     issues = []
-    invalid_idx = get_invalid_rows_for_required_columns(
-        df, ["codigo_vaga", "p_codigo"])
-    if invalid_idx:
+    invalid = invalid_required_mask(df, ["codigo_vaga", "p_codigo"])
+    n_invalid = df.select(invalid.sum()).collect(streaming=True).item()
+    if n_invalid:
         issues.append(
-            f"{len(invalid_idx)} registros removidos por campos nulos ou inválidos.")
-        valid_idx = sorted(set(range(len(df))) - set(invalid_idx))
-        df = df[valid_idx]
+            f"{n_invalid} registros removidos por campos nulos ou inválidos.")
+        df = df.filter(~invalid)
         logger.warning(f"[PROSPECTS] {issues[-1]}")
         # Log apenas os removidos
         save_quality_issues(issues, label="prospects")
@@ -89,19 +94,15 @@ def process_prospects() -> None:
     df = normalize_dataframe(df, date_columns=[
         "p_data_candidatura", "p_ultima_atualizacao"
     ])
-    df.write_parquet(OUTPUT_DIR / "prospects.parquet")
+    df.sink_parquet(OUTPUT_DIR / "prospects.parquet")
     logger.info("prospects.parquet gerado com sucesso.")
 
 
 # ---------------------- APPLICANTS ---------------------- #
 def process_applicants() -> None:
     logger.info("Processando: applicants.json")
-    df = load_json_to_df(get_file_path(
-        "applicants.json", "applicants"), "codigo_candidato")
-    df = flatten_struct_columns(df)
-
-    assert_valid_schema(df, CuratedApplicantRecord,
-                        label="applicants", id_field="codigo_candidato")
+    df = load_raw_flattened("applicants.json", "applicants", "codigo_candidato", CuratedApplicantRecord,
+                            label="applicants")
 
     issues = []
     issues += check_required_columns(df, ["codigo_candidato", "ib_nome"])
@@ -121,7 +122,7 @@ def process_applicants() -> None:
                                  "ib_data_atualizacao", "ib_data_criacao"],
                              date_columns=["ip_data_nascimento"],
                              )
-    df.write_parquet(OUTPUT_DIR / "applicants.parquet")
+    df.sink_parquet(OUTPUT_DIR / "applicants.parquet")
     logger.info("applicants.parquet gerado com sucesso.")
 
 
@@ -1,41 +1,66 @@
 import polars as pl
 from pipe.utils.logger import get_logger
 from pipe.features.free_text_transform import processar_dataframe
-from pipe.features.cleanning_and_accurate import gerar_features
+from pipe.features.cleanning_and_accurate import gerar_features_lazy
+from pipe.features.incremental_store import (
+    FP_CANDIDATO, FP_PROSPECT, FP_VAGA, KEY_COLUMNS, IncrementalFeatureStore, with_fingerprint)
 
 logger = get_logger("main_feature_engineering")
 
+INCREMENTAL_STORE_DIR = "data/feature_store/incremental"
+LIMITE_POR_EXECUCAO = 1000  # pares processados pelo LLM por execução; o restante fica para as próximas
+
 if __name__ == "__main__":
     logger.info("Início do pipeline de engenharia de atributos")
 
-    logger.info("→ Lendo arquivos Parquet da camada curated")
-    df_job = pl.read_parquet("data/curated/jobs.parquet")
-    df_applicants = pl.read_parquet("data/curated/applicants.parquet")
-    df_prospects = pl.read_parquet("data/curated/prospects.parquet")
+    logger.info("→ Lendo arquivos Parquet da camada curated (lazy)")
+    df_job = pl.scan_parquet("data/curated/jobs.parquet")
+    df_applicants = pl.scan_parquet("data/curated/applicants.parquet")
+    df_prospects = pl.scan_parquet("data/curated/prospects.parquet")
 
-    logger.info(
-        f"→ Linhas carregadas: jobs={len(df_job)}, applicants={len(df_applicants)}, prospects={len(df_prospects)}")
+    logger.info("→ Calculando fingerprints das linhas de cada fonte")
+    df_job = with_fingerprint(df_job, FP_VAGA)
+    df_applicants = with_fingerprint(df_applicants, FP_CANDIDATO)
+    df_prospects = with_fingerprint(df_prospects, FP_PROSPECT)
 
     logger.info("→ Renomeando colunas para evitar conflitos de namespace")
     df_applicants = df_applicants.rename(
-        {col: f"app_{col}" for col in df_applicants.columns if col != "codigo_candidato"})
+        {col: f"app_{col}" for col in df_applicants.columns if col not in ("codigo_candidato", FP_CANDIDATO)})
     df_job = df_job.rename(
-        {col: f"job_{col}" for col in df_job.columns if col != "codigo_vaga"})
+        {col: f"job_{col}" for col in df_job.columns if col not in ("codigo_vaga", FP_VAGA)})
 
-    logger.info("→ Realizando joins entre prospects, applicants e jobs")
+    logger.info("→ Planejando joins entre prospects, applicants e jobs")
     df = (
         df_prospects
         .rename({"p_codigo": "codigo_candidato"})
         .join(df_applicants, on="codigo_candidato", how="inner")
         .join(df_job, on="codigo_vaga", how="inner")
     )
+
+    logger.info("→ Comparando fingerprints com o feature store incremental")
+    store = IncrementalFeatureStore(INCREMENTAL_STORE_DIR)
+    delta = store.plan(df)
+    logger.info(f"→ Pares novos/alterados: {delta.alterados.height} | removidos: {delta.removidos.height} | "
+                f"vagas alteradas: {len(delta.vagas_alteradas)} | candidatos alterados: {len(delta.candidatos_alterados)}")
+    if not len(delta) and not delta.removidos.height:
+        logger.info("✅ Feature store já atualizado, nada a processar")
+        raise SystemExit(0)
+
+    logger.info("→ Iniciando etapa de geração de features estruturadas (apenas o delta)")
+    chaves = delta.chaves(limite=LIMITE_POR_EXECUCAO).lazy()
+    # Features da data de referência da base ficam de fora: derivadas na leitura (aplicar_features_de_referencia),
+    # senão cada candidatura nova reescreveria todas as linhas do store
+    df = (
+        gerar_features_lazy(df, com_referencia=False)
+        .join(chaves, on=KEY_COLUMNS, how="semi")
+        .collect(streaming=True)
+    )
     logger.info(f"→ Total de registros após joins: {len(df)}")
     logger.debug(f"Colunas finais do DataFrame: {df.columns}")
 
-    logger.info("→ Iniciando etapa de geração de features estruturadas")
-    df = gerar_features(df)
-
     logger.info(
         "→ Iniciando etapa de processamento de texto livre (ex: embeddings)")
-    processar_dataframe(df[:1000])  # Teste com 1000 registros
-    logger.info(f"→ Processamento finalizado com")  # shape: {df_final.shape}")
+    processar_dataframe(df, reprocessar_vagas=delta.vagas_alteradas,
+                        reprocessar_candidatos=delta.candidatos_alterados,
+                        store=store, removidos=delta.removidos)
+    logger.info(f"→ Processamento finalizado: feature store na versão {store.version}")
@@ -0,0 +1,133 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import polars as pl
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pipe.utils.logger import get_logger
+from pipe.features.free_text_transform import carregar_jsonl
+from pipe.scoring.skills import SkillsScorer
+from pipe.scoring.cultural import CulturalScorer
+from pipe.scoring.model_registry import CULTURAL_MODEL, SKILLS_MODEL, shared_model_name
+from pipe.scoring.profile_index import ProfileIndex
+from pipe.scoring.ann_index import build_vector_index, load_vector_index, pooled_vectors, save_vector_index
+from pipe.scoring.open_jobs import data_referencia, sync_open_jobs
+
+logger = get_logger("main_profile_index")
+
+FEATURE_STORE_DIR = Path("data/feature_store")
+INDEX_DIR = Path(os.getenv("PROFILE_INDEX_DIR", "data/feature_store/indexes"))
+CURATED_JOBS_PATH = Path("data/curated/jobs.parquet")
+BATCH_EXTRACTION_DIR = FEATURE_STORE_DIR / "extracted_resumes_batch"
+
+# Pooling das skills de cada perfil no vetor do índice ANN (mean | max)
+ANN_POOLING = os.getenv("ANN_POOLING", "mean")
+
+# Colunas da camada curated copiadas para o índice de vagas
+JOB_EXTRA_COLUMNS = {"ib_titulo_vaga": "titulo", "ib_data_final": "data_final"}
+
+
+def job_records():
+    """Perfis extraídos de vagas_processadas.jsonl, enriquecidos com colunas da camada curated."""
+    extras = {}
+    if CURATED_JOBS_PATH.exists():
+        df_jobs = (
+            pl.read_parquet(CURATED_JOBS_PATH, columns=["codigo_vaga", *JOB_EXTRA_COLUMNS])
+            .rename(JOB_EXTRA_COLUMNS)
+        )
+        extras = {row.pop("codigo_vaga"): row for row in df_jobs.iter_rows(named=True)}
+    else:
+        logger.warning(f"{CURATED_JOBS_PATH} não encontrado; índice de vagas sem colunas extras")
+
+    for item in carregar_jsonl(FEATURE_STORE_DIR / "vagas_processadas.jsonl"):
+        cod = str(item["codigo_vaga"])
+        yield {
+            "id": cod,
+            "dados": item["dados"],
+            **{col: None for col in JOB_EXTRA_COLUMNS.values()},
+            **extras.get(cod, {}),
+        }
+
+
+def candidate_records():
+    """
+    Perfis de candidatos: candidatos_processados.jsonl ({"codigo_candidato", "dados"}) seguido
+    das saídas do batch_extraction (perfil plano + codigo_candidato), que prevalecem por serem mais recentes.
+    """
+    for item in carregar_jsonl(FEATURE_STORE_DIR / "candidatos_processados.jsonl"):
+        yield {"id": str(item["codigo_candidato"]), "dados": item["dados"]}
+
+    batch_files = sorted(BATCH_EXTRACTION_DIR.glob("shard-*.jsonl"))
+    legacy_file = BATCH_EXTRACTION_DIR.with_suffix(".jsonl")
+    if legacy_file.exists():
+        batch_files.insert(0, legacy_file)
+    for path in batch_files:
+        for item in carregar_jsonl(path):
+            dados = {k: v for k, v in item.items() if k != "codigo_candidato"}
+            yield {"id": str(item["codigo_candidato"]), "dados": dados}
+
+
+def build_job_index(skills_scorer, cultural_scorer) -> ProfileIndex:
+    index = ProfileIndex.build(INDEX_DIR / "jobs", job_records(), skills_scorer, cultural_scorer)
+    logger.info(f"Índice de vagas gerado em {index.directory} ({len(index)} vagas)")
+    build_open_jobs_index(index, INDEX_DIR / "open_jobs_ann")
+    return index
+
+
+def build_open_jobs_index(index: ProfileIndex, directory: Path):
+    """
+    Índice vetorial das vagas abertas na data de referência, atualizado incrementalmente:
+    o índice existente é reaproveitado, removendo vagas encerradas e inserindo as novas.
+    """
+    referencia = data_referencia()
+    ann = load_vector_index(directory)
+    rebuild = ann is not None and ann.meta.get("source_built_at") != index.meta["built_at"]
+    ann, inseridas, removidas = sync_open_jobs(ann, index, referencia, ANN_POOLING, rebuild_vectors=rebuild)
+    if ann is None:
+        logger.warning(f"Nenhuma vaga aberta em {referencia} com skills técnicas; índice de vagas abertas não gerado")
+        return None
+    save_vector_index(ann, directory, source_built_at=index.meta["built_at"], field="skills",
+                      pooling=ANN_POOLING, reference_date=referencia.isoformat())
+    logger.info(f"Índice de vagas abertas em {referencia} ({ann.backend}): {len(ann)} vagas "
+                f"(+{inseridas} / -{removidas})")
+    return ann
+
+
+def build_candidate_index(skills_scorer, cultural_scorer) -> ProfileIndex:
+    index = ProfileIndex.build(INDEX_DIR / "candidates", candidate_records(), skills_scorer, cultural_scorer)
+    logger.info(f"Índice de candidatos gerado em {index.directory} ({len(index)} candidatos)")
+    build_ann_index(index, INDEX_DIR / "candidates_ann")
+    return index
+
+
+def build_ann_index(index: ProfileIndex, directory: Path, field: str = "skills"):
+    """Índice ANN sobre o vetor agregado (pooling) das skills de cada perfil, para a etapa de retrieval."""
+    ids, vectors = pooled_vectors(index, field, ANN_POOLING)
+    if not ids:
+        logger.warning(f"Nenhum perfil com '{field}' em {index.directory}; índice ANN não gerado")
+        return None
+    ann = build_vector_index(ids, vectors)
+    save_vector_index(ann, directory, source_built_at=index.meta["built_at"], field=field, pooling=ANN_POOLING)
+    logger.info(f"Índice ANN ({ann.backend}) gerado em {directory} ({len(ann)} vetores)")
+    return ann
+
+
+INDEX_BUILDERS = {"jobs": build_job_index, "candidates": build_candidate_index}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os índices de perfis pré-computados usados pela API.")
+    parser.add_argument("--only", choices=list(INDEX_BUILDERS), action="append",
+                        help="Gera apenas o(s) índice(s) indicado(s) (default: todos)")
+    args = parser.parse_args()
+
+    logger.info("Início da geração dos índices de perfis")
+    # Mesmos modelos da API: o índice só é carregado se os modelos coincidirem
+    skills_scorer = SkillsScorer(model_name=shared_model_name() or SKILLS_MODEL)
+    cultural_scorer = CulturalScorer(model_name=shared_model_name() or CULTURAL_MODEL)
+
+    for name in args.only or INDEX_BUILDERS:
+        INDEX_BUILDERS[name](skills_scorer, cultural_scorer)
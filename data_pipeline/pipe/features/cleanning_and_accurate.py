@@ -1,9 +1,18 @@
+from rapidfuzz import process
 from rapidfuzz.fuzz import partial_ratio
 from pipe.utils.logger import get_logger
 import polars as pl
+from typing import Optional, Union
 
 logger = get_logger("feature_engineering")
 
+LOCAIS_CANDIDATO = ["app_ib_local", "app_ip_endereco"]
+LOCAIS_VAGA = ["job_pv_estado", "job_pv_cidade", "job_pv_bairro", "job_pv_regiao", "job_pv_local_trabalho"]
+SEPARADOR_PAR = "\x1f"
+
+# As etapas abaixo aceitam DataFrame ou LazyFrame (mesmas expressões nos dois modos)
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
 # Função auxiliar para gerar indicador booleano
 
 
@@ -28,7 +37,66 @@ def comparar_locais_com_fuzzy(locais_candidato: list[str], locais_vaga: list[str
     return False
 
 
-def remover_pii_e_engineering(df: pl.DataFrame) -> pl.DataFrame:
+def _locais_longos(lf: pl.LazyFrame, colunas: list[str], nome: str) -> pl.LazyFrame:
+    """(linha, local em caixa alta) para cada local não nulo e não vazio das colunas."""
+    return (
+        lf.select([pl.col(c).cast(pl.Utf8) for c in colunas]).with_row_count("_linha")
+        .melt(id_vars="_linha", value_vars=colunas, value_name=nome)
+        .filter(pl.col(nome).is_not_null() & (pl.col(nome) != ""))
+        .select("_linha", pl.col(nome).str.to_uppercase())
+    )
+
+
+def _chave_par(loc_candidato: pl.Expr, loc_vaga: pl.Expr) -> pl.Expr:
+    return pl.concat_str([loc_candidato, loc_vaga], separator=SEPARADOR_PAR)
+
+
+def chaves_localidade_com_match(df: Frame, threshold: int = 70) -> list[str]:
+    """
+    Pares (local candidato, local vaga) com partial_ratio >= threshold, como chaves "CANDIDATO\x1fVAGA".
+    Lê só as colunas de local; cada par distinto que ocorre em alguma linha é pontuado uma única vez,
+    em lote e em todos os núcleos (rapidfuzz `cpdist`, workers=-1).
+    """
+    lf = df.lazy()
+    distintos = (
+        _locais_longos(lf, LOCAIS_CANDIDATO, "loc_candidato")
+        .join(_locais_longos(lf, LOCAIS_VAGA, "loc_vaga"), on="_linha")
+        .select("loc_candidato", "loc_vaga")
+        .unique()
+        .collect()
+    )
+    if not distintos.height:
+        return []
+
+    scores = process.cpdist(
+        distintos["loc_candidato"].to_list(), distintos["loc_vaga"].to_list(),
+        scorer=partial_ratio, workers=-1,
+    )
+    return (
+        distintos.filter(pl.Series(scores >= threshold))
+        .select(_chave_par(pl.col("loc_candidato"), pl.col("loc_vaga")))
+        .to_series().to_list()
+    )
+
+
+def expr_mesma_localidade(chaves: list[str]) -> pl.Expr:
+    """
+    Expressão equivalente a `comparar_locais_com_fuzzy` linha a linha, dada a tabela de pares com match:
+    True se algum dos 2 x 5 pares de locais da linha está em `chaves`. Sem UDF, funciona em LazyFrame/streaming.
+    """
+    return pl.any_horizontal([
+        _chave_par(pl.col(c).cast(pl.Utf8).str.to_uppercase(), pl.col(v).cast(pl.Utf8).str.to_uppercase())
+        .is_in(chaves).fill_null(False)
+        for c in LOCAIS_CANDIDATO for v in LOCAIS_VAGA
+    ]).alias("ind_mesma_localidade")
+
+
+def indicador_mesma_localidade(df: pl.DataFrame, threshold: int = 70) -> pl.Series:
+    """Versão vetorizada de `comparar_locais_com_fuzzy` aplicada linha a linha."""
+    return df.select(expr_mesma_localidade(chaves_localidade_com_match(df, threshold))).to_series()
+
+
+def remover_pii_e_engineering(df: Frame) -> Frame:
     pii_cols = [
         "p_nome",
         "app_ib_telefone_recado",
@@ -56,26 +124,9 @@ def remover_pii_e_engineering(df: pl.DataFrame) -> pl.DataFrame:
         gerar_indicador("ind_app_facebook", pl.col("app_ip_facebook")),
     ])
 
-    # Extrai registros para processamento externo
-    registros = df.select([
-        "app_ib_local", "app_ip_endereco",
-        "job_pv_estado", "job_pv_cidade", "job_pv_bairro", "job_pv_regiao", "job_pv_local_trabalho"
-    ]).to_dicts()
-
-    # Gera coluna fuzzy de localidade
-    matches = []
-    for row in registros:
-        locais_candidato = [row["app_ib_local"], row["app_ip_endereco"]]
-        locais_vaga = [
-            row["job_pv_estado"], row["job_pv_cidade"], row["job_pv_bairro"],
-            row["job_pv_regiao"], row["job_pv_local_trabalho"]
-        ]
-        matches.append(comparar_locais_com_fuzzy(
-            locais_candidato, locais_vaga, threshold=70))
-
-    # Adiciona coluna ao DataFrame final
+    # Gera coluna fuzzy de localidade (pares distintos de locais pontuados em lote; lookup por expressão)
     df = df.with_columns([
-        pl.Series("ind_mesma_localidade", matches)
+        expr_mesma_localidade(chaves_localidade_com_match(df, threshold=70))
     ])
 
     # Remove colunas PII
@@ -84,7 +135,7 @@ def remover_pii_e_engineering(df: pl.DataFrame) -> pl.DataFrame:
     return df
 
 
-def classificar_prioridade_vaga(df: pl.DataFrame) -> pl.DataFrame:
+def classificar_prioridade_vaga(df: Frame) -> Frame:
     prioridade_col = (
         pl.col("job_ib_prioridade_vaga")
         .fill_null("")
@@ -108,7 +159,7 @@ def classificar_prioridade_vaga(df: pl.DataFrame) -> pl.DataFrame:
     )
 
 
-def extrair_lista(df: pl.DataFrame, coluna: str, spliter: str) -> pl.DataFrame:
+def extrair_lista(df: Frame, coluna: str, spliter: str) -> Frame:
     """
     Cria nova coluna com lista padronizada e limpa, removendo elementos vazios e substituindo por 'DESCONHECIDO' se necessário.
     """
@@ -142,10 +193,56 @@ def extrair_lista(df: pl.DataFrame, coluna: str, spliter: str) -> pl.DataFrame:
     )
 
 
-def gerar_features_temporais(df: pl.DataFrame) -> pl.DataFrame:
-    max_data_candidatura = df.select(pl.col("p_data_candidatura").max()).item()
-    hoje = pl.lit(max_data_candidatura)
+def data_referencia(df: Frame):
+    """
+    Data de referência ("hoje") das features temporais: a maior p_data_candidatura da base.
+    Em LazyFrame é uma consulta à parte que lê só essa coluna.
+    """
+    return df.lazy().select(pl.col("p_data_candidatura").max()).collect().item()
+
+
+# Features que dependem da data de referência (max p_data_candidatura da base inteira): quase toda
+# candidatura nova move essa data, então elas não são gravadas no feature store incremental e
+# são derivadas na leitura (`aplicar_features_de_referencia`) a partir das datas brutas
+FEATURES_DE_REFERENCIA = ["vaga_em_aberto_no_momento", "dias_desde_requisicao", "vaga_requisitada_recente"]
+
 
+def features_de_referencia(referencia) -> list[pl.Expr]:
+    hoje = pl.lit(referencia)
+    return [
+        (
+            pl.when(pl.col("job_ib_data_final").is_not_null())
+            .then((pl.col("job_ib_data_final") > hoje).cast(pl.Int8))
+            .otherwise(-1)
+            .alias("vaga_em_aberto_no_momento")
+        ),
+        (
+            pl.when(pl.col("job_ib_data_requicisao").is_not_null())
+            .then((hoje - pl.col("job_ib_data_requicisao")).dt.total_days())
+            .otherwise(-1)
+            .alias("dias_desde_requisicao")
+            .clip(0, None)
+        ),
+        (
+            pl.when(pl.col("job_ib_data_requicisao").is_not_null())
+            .then(((hoje - pl.col("job_ib_data_requicisao")).dt.total_days() < 30).cast(pl.Int8))
+            .otherwise(-1)
+            .alias("vaga_requisitada_recente")
+        ),
+    ]
+
+
+def aplicar_features_de_referencia(df: Frame, referencia=None) -> Frame:
+    """
+    Deriva FEATURES_DE_REFERENCIA (ex.: sobre `IncrementalFeatureStore.scan()`), substituindo
+    valores gravados. Sem `referencia`, usa a maior p_data_candidatura de `df`.
+    """
+    if referencia is None:
+        referencia = data_referencia(df)
+    return df.with_columns(features_de_referencia(referencia))
+
+
+def gerar_features_temporais(df: Frame, com_referencia: bool = True) -> Frame:
     def dias(col1, col2, nome, abs_val=False):
         expr = (col1 - col2).dt.total_days()
         if abs_val:
@@ -158,7 +255,7 @@ def gerar_features_temporais(df: pl.DataFrame) -> pl.DataFrame:
             .clip(0, None)  # ✅ CORRETO
         )
 
-    return df.with_columns([
+    df = df.with_columns([
         dias(pl.col("app_ib_data_criacao"), pl.col("p_data_candidatura"),
              "tempo_entre_criacao_e_candidatura", abs_val=True),
         dias(pl.col("p_data_candidatura"), pl.col("job_ib_data_inicial"),
@@ -169,38 +266,34 @@ def gerar_features_temporais(df: pl.DataFrame) -> pl.DataFrame:
             "app_ib_data_criacao"), "tempo_ultima_atualizacao_aplicacao"),
         dias(pl.col("job_ib_data_final"), pl.col(
             "job_ib_data_inicial"), "tempo_vaga_aberta"),
-        (
-            pl.when(pl.col("job_ib_data_final").is_not_null())
-            .then((pl.col("job_ib_data_final") > hoje).cast(pl.Int8))
-            .otherwise(-1)
-            .alias("vaga_em_aberto_no_momento")
-        ),
         (
             pl.when(pl.col("p_data_candidatura").is_not_null() &
                     pl.col("job_ib_data_inicial").is_not_null())
             .then((pl.col("p_data_candidatura") < pl.col("job_ib_data_inicial")).cast(pl.Int8))
             .otherwise(-1)
             .alias("candidatura_antes_da_abertura_oficial")
-        ),
-        (
-            pl.when(pl.col("job_ib_data_requicisao").is_not_null())
-            .then((hoje - pl.col("job_ib_data_requicisao")).dt.total_days())
-            .otherwise(-1)
-            .alias("dias_desde_requisicao")
-            .clip(0, None)
-        ),
-        (
-            pl.when(pl.col("job_ib_data_requicisao").is_not_null())
-            .then(((hoje - pl.col("job_ib_data_requicisao")).dt.total_days() < 30).cast(pl.Int8))
-            .otherwise(-1)
-            .alias("vaga_requisitada_recente")
         )
     ])
+    return aplicar_features_de_referencia(df) if com_referencia else df
 
 
 def gerar_features(df: pl.DataFrame) -> pl.DataFrame:
     """
     Função principal para gerar features a partir do DataFrame de entrada.
+    Executa o mesmo plano de `gerar_features_lazy` (uma única materialização no collect).
+    """
+    return gerar_features_lazy(df.lazy()).collect()
+
+
+def gerar_features_lazy(df: pl.LazyFrame, colunas: Optional[list[str]] = None,
+                        com_referencia: bool = True) -> pl.LazyFrame:
+    """
+    Plano lazy de features sobre um LazyFrame (ex.: `scan_parquet` da camada curated + joins).
+    Nada é materializado além da tabela de pares de locais e da data de referência (consultas
+    que leem só as colunas necessárias). Com `colunas`, o select final deixa o Polars podar a
+    leitura (projection pushdown); filtros do chamador descem até o scan (predicate pushdown).
+    Use `collect(streaming=True)` para processar em blocos. Com `com_referencia=False`,
+    FEATURES_DE_REFERENCIA ficam de fora (feature store incremental; ver `aplicar_features_de_referencia`).
     """
     logger.info("Início da geração de features")
 
@@ -221,7 +314,7 @@ def gerar_features(df: pl.DataFrame) -> pl.DataFrame:
         df = extrair_lista(df, coluna, spliter)
 
     logger.info("→ Etapa: geração de features temporais")
-    df = gerar_features_temporais(df)
+    df = gerar_features_temporais(df, com_referencia=com_referencia)
 
     logger.info("→ Etapa: criação da coluna 'job_ind_beneficios_declarados'")
     df = df.with_columns([
@@ -245,5 +338,8 @@ def gerar_features(df: pl.DataFrame) -> pl.DataFrame:
         .alias("match_pcd")
     ])
 
+    if colunas is not None:
+        df = df.select(colunas)
+
     logger.info("Finalização da geração de features")
     return df
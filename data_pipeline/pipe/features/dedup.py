@@ -0,0 +1,66 @@
+import hashlib
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence
+
+from pipe.features.prompts import extrair_texto
+
+# Campos de texto que entram em prompt_candidato / prompt_vaga
+CAMPOS_TEXTO_CANDIDATO = ["app_cv_pt"]
+CAMPOS_TEXTO_VAGA = [
+    "job_ib_titulo_vaga",
+    "job_pv_principais_atividades",
+    "job_pv_competencia_tecnicas_e_comportamentais",
+    "job_pv_demais_observacoes",
+    "job_pv_habilidades_comportamentais_necessarias",
+]
+
+
+def normalizar_texto(texto: str) -> str:
+    """Unicode NFC, caixa ignorada e espaços colapsados."""
+    return " ".join(unicodedata.normalize("NFC", texto).casefold().split())
+
+
+def hash_texto(row: dict, campos: Sequence[str]) -> str:
+    """Hash do texto normalizado dos campos, na forma como o prompt os lê."""
+    partes = [normalizar_texto(extrair_texto(row, campo)) for campo in campos]
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PlanoDeduplicacao:
+    """
+    Resultado da deduplicação por texto:
+        representantes: hash -> linha enviada ao LLM (primeira ocorrência)
+        donos: hash -> IDs que compartilham o mesmo texto
+    """
+    representantes: Dict[str, dict] = field(default_factory=dict)
+    donos: Dict[str, List] = field(default_factory=dict)
+    total_ids: int = 0
+
+    @property
+    def chamadas_economizadas(self) -> int:
+        return self.total_ids - len(self.representantes)
+
+    def resumo(self, tipo: str) -> str:
+        return (f"[DEDUP {tipo.upper()}] {self.total_ids} IDs → {len(self.representantes)} textos distintos "
+                f"({self.chamadas_economizadas} chamadas ao LLM economizadas)")
+
+
+def planejar_deduplicacao(rows: Iterable[dict], campo_id: str, campos: Sequence[str]) -> PlanoDeduplicacao:
+    """
+    Agrupa as linhas por ID e depois pelo hash do texto: cada texto distinto vai ao LLM uma única vez
+    e o resultado é replicado para todos os IDs donos (`donos[hash]`).
+    """
+    plano = PlanoDeduplicacao()
+    vistos = set()
+    for row in rows:
+        cod = row[campo_id]
+        if cod in vistos:
+            continue
+        vistos.add(cod)
+        chave = hash_texto(row, campos)
+        plano.representantes.setdefault(chave, row)
+        plano.donos.setdefault(chave, []).append(cod)
+    plano.total_ids = len(vistos)
+    return plano
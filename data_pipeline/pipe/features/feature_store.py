@@ -0,0 +1,155 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+import polars as pl
+
+try:
+    from pipe.utils.logger import get_logger
+except ImportError:  # importado como data_pipeline.pipe (API, experimentos, testes)
+    from data_pipeline.pipe.utils.logger import get_logger
+
+logger = get_logger("feature_store")
+
+MANIFEST_NAME = "_manifest.json"
+
+
+###########################################################
+# leitura
+###########################################################
+
+
+def read_manifest(dataset_dir: Path) -> dict:
+    manifest_path = Path(dataset_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {"parts": [], "rows": 0, "schema": {}}
+    with manifest_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scan_feature_store(path: Path) -> pl.LazyFrame:
+    """
+    LazyFrame sobre o dataset particionado (apenas part files já commitados no manifest).
+    Aceita também o arquivo legado `resultado_final.parquet` e o store incremental (buckets por chave).
+    """
+    path = Path(path)
+    if path.is_file():
+        return pl.scan_parquet(path)
+
+    manifest = read_manifest(path)
+    parts = [path / part for part in (manifest.get("buckets", {}).values() or manifest.get("parts", []))]
+    if not parts:
+        raise FileNotFoundError(f"Nenhum part file commitado em {path}")
+    return pl.concat([pl.scan_parquet(part) for part in parts], how="diagonal_relaxed")
+
+
+def resolve_feature_store_path(dataset_dir: Path) -> Optional[Path]:
+    """Diretório particionado se existir, senão o parquet legado de mesmo nome."""
+    dataset_dir = Path(dataset_dir)
+    if (dataset_dir / MANIFEST_NAME).exists():
+        return dataset_dir
+    legacy = dataset_dir.with_suffix(".parquet")
+    if legacy.exists():
+        return legacy
+    return None
+
+
+###########################################################
+# escrita
+###########################################################
+
+
+class FeatureStoreWriter:
+    """
+    Writer bufferizado para o feature store.
+
+    - Acumula linhas em memória
+    - A cada `row_group_size` linhas grava um part file (`part-00042.parquet`) no diretório do dataset
+    - Commit atômico via `_manifest.json` (tmp + os.replace): leitores só enxergam parts commitados
+
+    Em caso de crash, parts órfãos (gravados mas fora do manifest) são removidos na próxima abertura,
+    e `committed_keys()` permite retomar o processamento sem duplicar linhas.
+    """
+
+    def __init__(self, dataset_dir: Path, row_group_size: int = 5000,
+                 key_columns: Sequence[str] = ("codigo_candidato", "codigo_vaga")):
+        self.dataset_dir = Path(dataset_dir)
+        self.row_group_size = row_group_size
+        self.key_columns = list(key_columns)
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = read_manifest(self.dataset_dir)
+        self._buffer: List[dict] = []
+        self._remove_orphans()
+
+    def _remove_orphans(self):
+        committed = set(self.manifest["parts"])
+        for path in self.dataset_dir.glob("*part-*"):
+            if path.name not in committed:
+                logger.warning(f"Removendo part file não commitado: {path.name}")
+                path.unlink()
+
+    def committed_keys(self) -> Set[Tuple]:
+        if not self.manifest["parts"]:
+            return set()
+        keys = scan_feature_store(self.dataset_dir).select(self.key_columns).collect()
+        return set(keys.iter_rows())
+
+    def append(self, row: dict):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def extend(self, rows: Iterable[dict]):
+        for row in rows:
+            self.append(row)
+
+    def _align_schema(self, df: pl.DataFrame) -> pl.DataFrame:
+        """Colunas sem tipo (todas nulas no lote) herdam o tipo já registrado ou viram Utf8."""
+        known = self.manifest.get("schema", {})
+        list_of_str = pl.List(pl.Utf8)
+        casts = []
+        for col, dtype in df.schema.items():
+            if dtype == pl.List(pl.Null) or (dtype == pl.Null and known.get(col) == str(list_of_str)):
+                casts.append(pl.col(col).cast(list_of_str))
+            elif dtype == pl.Null:
+                casts.append(pl.col(col).cast(pl.Utf8))
+        return df.with_columns(casts) if casts else df
+
+    def flush(self):
+        if not self._buffer:
+            return
+        df = self._align_schema(pl.DataFrame(self._buffer, infer_schema_length=None))
+
+        part_name = f"part-{len(self.manifest['parts']):05d}.parquet"
+        tmp_path = self.dataset_dir / f".{part_name}.tmp"
+        df.write_parquet(tmp_path, row_group_size=self.row_group_size)
+        os.replace(tmp_path, self.dataset_dir / part_name)
+
+        schema = self.manifest.get("schema", {})
+        schema.update({col: str(dtype) for col, dtype in df.schema.items() if col not in schema})
+        self._commit({
+            "parts": self.manifest["parts"] + [part_name],
+            "rows": self.manifest["rows"] + len(df),
+            "schema": schema,
+            "updated_at": datetime.now().isoformat(),
+        })
+        logger.info(f"[FEATURE STORE] {part_name} commitado ({len(df)} linhas)")
+        self._buffer = []
+
+    def _commit(self, manifest: dict):
+        tmp_path = self.dataset_dir / f"{MANIFEST_NAME}.tmp"
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.dataset_dir / MANIFEST_NAME)
+        self.manifest = manifest
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Iterable, List, Optional
 import polars as pl
 from pydantic import BaseModel
 import json
@@ -7,8 +7,11 @@ from datetime import datetime
 from pathlib import Path
 import json
 from tqdm import tqdm
-from pipe.features.prompts import prompt_vaga, prompt_candidato, chamar_llm, chamar_deepseek
+from pipe.features.prompts import prompt_vaga, prompt_candidato, chamar_llm, chamar_deepseek, extrair_json_limpo
 from pipe.utils.logger import get_logger
+from pipe.features.feature_store import FeatureStoreWriter
+from pipe.features.incremental_store import IncrementalFeatureStore, align_schema
+from pipe.features.dedup import CAMPOS_TEXTO_CANDIDATO, CAMPOS_TEXTO_VAGA, planejar_deduplicacao
 import time
 
 logger = get_logger("feature_engineering_process")
@@ -45,22 +48,6 @@ class CandidatoEstruturado(BaseModel):
 ###########################################################
 
 
-def extrair_json_limpo(resposta_modelo: str) -> dict:
-    linhas = resposta_modelo.strip().split('\n')
-    if linhas and linhas[0].strip() == '```json':
-        if len(linhas) > 1 and linhas[-1].strip() == '```':
-            json_string = '\n'.join(linhas[1:-1])
-        else:
-            json_string = resposta_modelo.strip()
-    else:
-        json_string = resposta_modelo.strip()
-    try:
-        return json.loads(json_string)
-    except json.JSONDecodeError as e:
-        print(f"Erro ao decodificar JSON: {e}")
-        return {}
-
-
 def salvar_jsonl(lista: list, path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8") as f:
@@ -83,15 +70,6 @@ def salvar_jsonl_append(lista: list, path: Path):
             f.write(json.dumps(linha, ensure_ascii=False) + "\n")
 
 
-def append_parquet_safely(novo_df: pl.DataFrame, path: Path):
-    if path.exists():
-        df_existente = pl.read_parquet(path)
-        df_final = pl.concat([df_existente, novo_df], how="vertical_relaxed")
-    else:
-        df_final = novo_df
-    df_final.write_parquet(path)
-
-
 ###########################################################
     # process
 ###########################################################
@@ -116,7 +94,9 @@ def chamar_llm_com_retry(
     for tentativa in range(1, max_retries + 1):
         try:
             prompt = gerar_prompt_fn(row)
-            resposta = chamar_llm(prompt)
+            # Retries não leem o cache (a resposta em cache já foi reprovada na validação),
+            # mas gravam a nova resposta por cima: a próxima execução não repete a reprovada
+            resposta = chamar_llm(prompt, refresh=(tentativa > 1))
             dados_dict = extrair_json_limpo(resposta)
             respostas_brutas.append({
                 "modelo": "llm",
@@ -157,7 +137,18 @@ def chamar_llm_com_retry(
             f"[FALHA {tipo.upper()}] Não foi possível validar com nenhum modelo após {max_retries} tentativas.")
 
 
-def processar_dataframe(df: pl.DataFrame) -> pl.DataFrame:
+def processar_dataframe(df: pl.DataFrame, reprocessar_vagas: Iterable[str] = (),
+                        reprocessar_candidatos: Iterable[str] = (),
+                        store: Optional[IncrementalFeatureStore] = None,
+                        removidos: Optional[pl.DataFrame] = None) -> pl.DataFrame:
+    """
+    Extrai os campos de texto livre via LLM e grava as linhas no feature store.
+
+    - `reprocessar_vagas` / `reprocessar_candidatos`: códigos cujo texto mudou na origem; o resultado
+      em cache é ignorado e o LLM é chamado de novo
+    - `store`: grava via upsert no `IncrementalFeatureStore` (o `df` já é o delta do `plan`), apagando
+      também as chaves de `removidos`; sem ele, usa o writer append-only de `resultado_final`
+    """
     logger.info("Iniciando processamento de DataFrame com LLM")
 
     DIR_OUT = Path("data/feature_store")
@@ -165,67 +156,116 @@ def processar_dataframe(df: pl.DataFrame) -> pl.DataFrame:
     ARQ_VAGAS = DIR_OUT / "vagas_processadas.jsonl"
     ARQ_RAW_RESPONSES = DIR_OUT / \
         f"respostas_brutas_{datetime.now().strftime('%Y%m%d_%H%M')}.jsonl"
-    ARQ_FINAL_PARQUET = DIR_OUT / "resultado_final.parquet"
+    DIR_FINAL_DATASET = DIR_OUT / "resultado_final"
 
     logger.info("→ Carregando histórico de candidatos e vagas processados")
     candidatos_ja_processados = {
         x["codigo_candidato"]: x["dados"] for x in carregar_jsonl(ARQ_CANDIDATOS)}
     vagas_ja_processadas = {x["codigo_vaga"]: x["dados"]
                             for x in carregar_jsonl(ARQ_VAGAS)}
+    for cod_vaga in reprocessar_vagas:
+        vagas_ja_processadas.pop(cod_vaga, None)
+    for cod_candidato in reprocessar_candidatos:
+        candidatos_ja_processados.pop(cod_candidato, None)
+        candidatos_ja_processados.pop(f"{cod_candidato}_cand", None)
     respostas_brutas = []
 
+    if store is not None:
+        writer, linhas = None, []
+        chaves_gravadas = set()
+        logger.info(f"→ Upsert no feature store incremental (versão atual: {store.version})")
+    else:
+        writer = FeatureStoreWriter(DIR_FINAL_DATASET)
+        chaves_gravadas = writer.committed_keys()
+        logger.info(f"→ Linhas já gravadas no feature store: {len(chaves_gravadas)}")
+
     registros = df.to_dicts()
     logger.info(f"→ Total de registros a processar: {len(registros)}")
 
+    # Descarta linhas já gravadas e resolve o código do candidato de cada linha
+    pendentes = []
+    for row in registros:
+        cod_vaga = row.get("codigo_vaga")
+        cod_candidato = row.get("codigo_candidato")
+
+        if (cod_candidato, cod_vaga) in chaves_gravadas:
+            continue
+
+        if cod_vaga == cod_candidato:
+            cod_candidato = f"{cod_candidato}_cand"
+        pendentes.append((row, cod_vaga, cod_candidato))
+
     try:
-        for row in tqdm(registros, desc="Processando registros"):
-            cod_vaga = row.get("codigo_vaga")
-            cod_candidato = row.get("codigo_candidato")
-
-            if cod_vaga == cod_candidato:
-                cod_candidato = f"{cod_candidato}_cand"
-
-            # VAGA
-            if cod_vaga not in vagas_ja_processadas:
-                try:
-                    resposta, dados = chamar_llm_com_retry(
-                        prompt_vaga, row, VagaEstruturada, tipo="vaga", cod=cod_vaga, respostas_brutas=respostas_brutas)
-                    vagas_ja_processadas[cod_vaga] = dados
-                    salvar_jsonl_append(
-                        [{"codigo_vaga": cod_vaga, "dados": dados}], ARQ_VAGAS)
-                    logger.debug(f"[OK VAGA] {cod_vaga}")
-                except Exception as e:
-                    logger.error(f"[ERRO VAGA] {cod_vaga}: {e}")
-                    continue
-
-            # CANDIDATO
-            if cod_candidato not in candidatos_ja_processados:
-                try:
-                    resposta, dados = chamar_llm_com_retry(
-                        prompt_candidato, row, CandidatoEstruturado, tipo="candidato", cod=cod_candidato, respostas_brutas=respostas_brutas)
-                    candidatos_ja_processados[cod_candidato] = dados
-                    salvar_jsonl_append(
-                        [{"codigo_candidato": cod_candidato, "dados": dados}], ARQ_CANDIDATOS)
-                    salvar_jsonl_append(
-                        [{"tipo": "candidato", "codigo": cod_candidato, "resposta": resposta}], ARQ_RAW_RESPONSES)
-                    logger.debug(f"[OK CANDIDATO] {cod_candidato}")
-                except Exception as e:
-                    logger.error(f"[ERRO CANDIDATO] {cod_candidato}: {e}")
-                    continue
+        # VAGAS: cada texto distinto vai ao LLM uma única vez e o resultado é replicado para todas as vagas donas
+        plano_vagas = planejar_deduplicacao(
+            (row for row, cod_vaga, _ in pendentes if cod_vaga not in vagas_ja_processadas),
+            "codigo_vaga", CAMPOS_TEXTO_VAGA)
+        logger.info(plano_vagas.resumo("vaga"))
+
+        for chave, row in tqdm(plano_vagas.representantes.items(), desc="Extraindo vagas"):
+            donos = plano_vagas.donos[chave]
+            try:
+                resposta, dados = chamar_llm_com_retry(
+                    prompt_vaga, row, VagaEstruturada, tipo="vaga", cod=donos[0], respostas_brutas=respostas_brutas)
+            except Exception as e:
+                logger.error(f"[ERRO VAGA] {donos}: {e}")
+                continue
+            for cod_vaga in donos:
+                vagas_ja_processadas[cod_vaga] = dados
+            salvar_jsonl_append(
+                [{"codigo_vaga": cod_vaga, "dados": dados} for cod_vaga in donos], ARQ_VAGAS)
+            logger.debug(f"[OK VAGA] {donos}")
+
+        # CANDIDATOS: idem, por texto do currículo (candidatos de vagas que falharam são ignorados)
+        plano_candidatos = planejar_deduplicacao(
+            (dict(row, codigo_candidato=cod_candidato) for row, cod_vaga, cod_candidato in pendentes
+             if cod_vaga in vagas_ja_processadas and cod_candidato not in candidatos_ja_processados),
+            "codigo_candidato", CAMPOS_TEXTO_CANDIDATO)
+        logger.info(plano_candidatos.resumo("candidato"))
+
+        for chave, row in tqdm(plano_candidatos.representantes.items(), desc="Extraindo candidatos"):
+            donos = plano_candidatos.donos[chave]
+            try:
+                resposta, dados = chamar_llm_com_retry(
+                    prompt_candidato, row, CandidatoEstruturado, tipo="candidato", cod=donos[0], respostas_brutas=respostas_brutas)
+            except Exception as e:
+                logger.error(f"[ERRO CANDIDATO] {donos}: {e}")
+                continue
+            for cod_candidato in donos:
+                candidatos_ja_processados[cod_candidato] = dados
+            salvar_jsonl_append(
+                [{"codigo_candidato": cod_candidato, "dados": dados} for cod_candidato in donos], ARQ_CANDIDATOS)
+            salvar_jsonl_append(
+                [{"tipo": "candidato", "codigo": donos[0], "donos": donos, "resposta": resposta}], ARQ_RAW_RESPONSES)
+            logger.debug(f"[OK CANDIDATO] {donos}")
+
+        logger.info(f"→ Chamadas ao LLM economizadas pela deduplicação: "
+                    f"{plano_vagas.chamadas_economizadas + plano_candidatos.chamadas_economizadas}")
+
+        for row, cod_vaga, cod_candidato in tqdm(pendentes, desc="Gravando registros"):
+            if cod_vaga not in vagas_ja_processadas or cod_candidato not in candidatos_ja_processados:
+                continue
 
             # Atualiza linha com dados prefixados
             dados_vaga = {f"job_{k}": v for k,
-                          v in vagas_ja_processadas.get(cod_vaga, {}).items()}
-            dados_candidato = {f"app_{k}": v for k, v in candidatos_ja_processados.get(
-                cod_candidato, {}).items()}
+                          v in vagas_ja_processadas[cod_vaga].items()}
+            dados_candidato = {f"app_{k}": v for k, v in candidatos_ja_processados[cod_candidato].items()}
             row.update(dados_vaga)
             row.update(dados_candidato)
 
-            # Salva linha no Parquet incrementalmente
-            append_parquet_safely(pl.DataFrame([row]), ARQ_FINAL_PARQUET)
+            # Bufferiza a linha; part files são commitados a cada row group
+            if writer is not None:
+                writer.append(row)
+            else:
+                linhas.append(row)
 
     except Exception as e:
         logger.error(f"⛔ ERRO DETECTADO: {e}")
+    finally:
+        if writer is not None:
+            writer.close()
+        elif linhas or (removidos is not None and removidos.height):
+            store.upsert(align_schema(pl.DataFrame(linhas, infer_schema_length=None)), removidos)
 
     logger.info("✅ Processamento concluído")
-    logger.info(f"→ Dados salvos incrementalmente em: {ARQ_FINAL_PARQUET}")
+    logger.info(f"→ Dados salvos incrementalmente em: {store.dataset_dir if store else DIR_FINAL_DATASET}")
@@ -0,0 +1,252 @@
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Union
+
+import polars as pl
+
+try:
+    from pipe.utils.logger import get_logger
+except ImportError:  # importado como data_pipeline.pipe (API, experimentos, testes)
+    from data_pipeline.pipe.utils.logger import get_logger
+
+logger = get_logger("incremental_store")
+
+MANIFEST_NAME = "_manifest.json"
+KEY_COLUMNS = ["codigo_candidato", "codigo_vaga"]
+FP_PROSPECT, FP_CANDIDATO, FP_VAGA = "_fp_prospect", "_fp_candidato", "_fp_vaga"
+FINGERPRINT_COLUMNS = [FP_PROSPECT, FP_CANDIDATO, FP_VAGA]
+VERSION_COLUMN = "_versao"
+
+# Polars só garante o mesmo hash dentro da mesma versão: a versão vai no manifest e,
+# se mudar, todas as fingerprints gravadas são tratadas como alteradas (recomputação completa uma vez)
+HASH_SEEDS = (0x5EED, 0xFEA7, 0x570E, 0x1DE4)
+SEPARADOR = "\x1f"
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
+
+###########################################################
+# fingerprints
+###########################################################
+
+
+def fingerprint_expr(colunas: Sequence[str], nome: str) -> pl.Expr:
+    """
+    Hash de linha das colunas curated (nulo e vazio são distintos).
+    Reinterpretado como Int64: as linhas passam por dicts Python, e um UInt64 acima de 2^63
+    seria inferido como Float64 (perdendo precisão) ao voltar para DataFrame.
+    """
+    return (
+        pl.concat_str([pl.col(c).cast(pl.Utf8).fill_null("\x00") for c in sorted(colunas)], separator=SEPARADOR)
+        .hash(*HASH_SEEDS)
+        .reinterpret(signed=True)
+        .alias(nome)
+    )
+
+
+def with_fingerprint(df: Frame, nome: str, excluir: Sequence[str] = ()) -> Frame:
+    """Adiciona a fingerprint `nome` sobre todas as colunas da fonte (exceto `excluir`)."""
+    colunas = [c for c in df.columns if c not in excluir and not c.startswith("_fp_")]
+    return df.with_columns(fingerprint_expr(colunas, nome))
+
+
+def align_schema(df: pl.DataFrame) -> pl.DataFrame:
+    """Colunas sem tipo (todas nulas no lote) viram Utf8 / List(Utf8), como no `FeatureStoreWriter`."""
+    casts = []
+    for col, dtype in df.schema.items():
+        if dtype == pl.List(pl.Null):
+            casts.append(pl.col(col).cast(pl.List(pl.Utf8)))
+        elif dtype == pl.Null:
+            casts.append(pl.col(col).cast(pl.Utf8))
+    return df.with_columns(casts) if casts else df
+
+
+def _bucket_expr(n_buckets: int) -> pl.Expr:
+    return (
+        pl.concat_str([pl.col(c).cast(pl.Utf8) for c in KEY_COLUMNS], separator=SEPARADOR)
+        .hash(*HASH_SEEDS) % n_buckets
+    ).cast(pl.Int32).alias("_bucket")
+
+
+###########################################################
+# store
+###########################################################
+
+
+@dataclass
+class Delta:
+    """Resultado de `IncrementalFeatureStore.plan`: o que precisa ser recomputado nesta execução."""
+    alterados: pl.DataFrame  # chaves (+ fingerprints) novas ou com alguma fonte alterada
+    removidos: pl.DataFrame  # chaves gravadas que não existem mais na fonte
+    vagas_alteradas: Set[str] = field(default_factory=set)  # vagas já gravadas cujo conteúdo mudou
+    candidatos_alterados: Set[str] = field(default_factory=set)
+
+    def chaves(self, limite: Optional[int] = None) -> pl.DataFrame:
+        """Chaves a recomputar nesta execução: até `limite` pares novos/alterados."""
+        return self.alterados.select(KEY_COLUMNS).head(limite) if limite else self.alterados.select(KEY_COLUMNS)
+
+    def __len__(self):
+        return self.alterados.height
+
+
+class IncrementalFeatureStore:
+    """
+    Feature store incremental por par (codigo_candidato, codigo_vaga).
+
+    - Cada linha guarda as fingerprints das três fontes (prospect, candidato, vaga) e a versão em que foi gravada
+    - `plan` compara as fingerprints atuais com as gravadas: só pares novos ou alterados são recomputados
+    - `upsert` reescreve apenas os buckets (hash da chave) tocados e commita uma nova versão via `_manifest.json`
+    - `changed_since(versao)` devolve as linhas gravadas depois de `versao` (deltas para o retreino)
+
+    As linhas não guardam features que dependem da data de referência da base (FEATURES_DE_REFERENCIA em
+    cleanning_and_accurate): elas são derivadas na leitura com `aplicar_features_de_referencia`, e uma
+    candidatura nova só reescreve o próprio par.
+    """
+
+    def __init__(self, dataset_dir: Path, n_buckets: int = 16):
+        self.dataset_dir = Path(dataset_dir)
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._read_manifest()
+        if not self.manifest["buckets"]:
+            self.manifest["n_buckets"] = n_buckets
+        self._remove_orphans()
+
+    def _read_manifest(self) -> dict:
+        path = self.dataset_dir / MANIFEST_NAME
+        if not path.exists():
+            return {"version": 0, "n_buckets": 0, "polars": pl.__version__, "buckets": {}, "rows": 0, "history": []}
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _remove_orphans(self):
+        committed = {self.dataset_dir / rel for rel in self.manifest["buckets"].values()}
+        for path in self.dataset_dir.glob("bucket_*/*"):
+            if path not in committed:
+                logger.warning(f"Removendo arquivo não commitado: {path.relative_to(self.dataset_dir)}")
+                path.unlink()
+
+    @property
+    def version(self) -> int:
+        return self.manifest["version"]
+
+    @property
+    def n_buckets(self) -> int:
+        return self.manifest["n_buckets"]
+
+    def _fingerprints_comparable(self) -> bool:
+        return self.manifest.get("polars") == pl.__version__
+
+    # ------------------------------------------------------ leitura
+
+    def scan(self) -> Optional[pl.LazyFrame]:
+        files = [self.dataset_dir / rel for rel in self.manifest["buckets"].values()]
+        if not files:
+            return None
+        return pl.concat([pl.scan_parquet(f) for f in files], how="diagonal_relaxed")
+
+    def changed_since(self, version: int) -> Optional[pl.LazyFrame]:
+        """Linhas inseridas ou atualizadas em versões > `version` (None se o store estiver vazio)."""
+        lf = self.scan()
+        return lf.filter(pl.col(VERSION_COLUMN) > version) if lf is not None else None
+
+    # ------------------------------------------------------ planejamento
+
+    def plan(self, fonte: Frame) -> Delta:
+        """
+        Compara as fingerprints da fonte (chaves + `_fp_*`, ver `with_fingerprint`) com as gravadas.
+        Só as colunas de chave e fingerprint são lidas dos dois lados.
+        """
+        atual = fonte.lazy().select(KEY_COLUMNS + FINGERPRINT_COLUMNS).unique(subset=KEY_COLUMNS).collect()
+        gravado = self.scan()
+        if gravado is None or not self._fingerprints_comparable():
+            if gravado is not None:
+                logger.warning(f"Fingerprints gravadas com polars {self.manifest.get('polars')}: recomputando tudo")
+            return Delta(atual, pl.DataFrame(schema={c: atual.schema[c] for c in KEY_COLUMNS}))
+
+        gravado = gravado.select(KEY_COLUMNS + FINGERPRINT_COLUMNS).collect().cast(
+            {c: atual.schema[c] for c in KEY_COLUMNS + FINGERPRINT_COLUMNS})
+
+        def entidades_alteradas(chave: str, fp: str) -> Set[str]:
+            antes = gravado.select(chave, fp).unique(subset=chave)
+            depois = atual.select(chave, fp).unique(subset=chave)
+            return set(depois.join(antes, on=chave, suffix="_gravado")
+                       .filter(pl.col(fp) != pl.col(f"{fp}_gravado"))[chave].to_list())
+
+        return Delta(
+            alterados=atual.join(gravado, on=KEY_COLUMNS + FINGERPRINT_COLUMNS, how="anti"),
+            removidos=gravado.select(KEY_COLUMNS).join(atual, on=KEY_COLUMNS, how="anti"),
+            vagas_alteradas=entidades_alteradas("codigo_vaga", FP_VAGA),
+            candidatos_alterados=entidades_alteradas("codigo_candidato", FP_CANDIDATO),
+        )
+
+    # ------------------------------------------------------ escrita
+
+    def upsert(self, linhas: pl.DataFrame, removidos: Optional[pl.DataFrame] = None) -> int:
+        """
+        Insere/substitui `linhas` (por chave) e apaga `removidos`, reescrevendo só os buckets tocados.
+        Retorna a nova versão (a mesma se não houver nada a fazer).
+        """
+        vazio = pl.DataFrame(schema={c: pl.Utf8 for c in KEY_COLUMNS})
+        removidos = removidos if removidos is not None else vazio
+        linhas = linhas if linhas.height else vazio
+        if not linhas.height and not removidos.height:
+            return self.version
+
+        version = self.version + 1
+        linhas = linhas.unique(subset=KEY_COLUMNS, keep="last").with_columns(
+            pl.lit(version, dtype=pl.Int64).alias(VERSION_COLUMN), _bucket_expr(self.n_buckets))
+        removidos = removidos.select(KEY_COLUMNS).with_columns(_bucket_expr(self.n_buckets))
+
+        buckets: Dict[str, str] = dict(self.manifest["buckets"])
+        substituidos: List[Path] = []
+        tocados = set(linhas["_bucket"].to_list()) | set(removidos["_bucket"].to_list())
+        for bucket in sorted(tocados):
+            nome = f"{bucket:03d}"
+            novas = linhas.filter(pl.col("_bucket") == bucket).drop("_bucket")
+            apagar = pl.concat([novas.select(KEY_COLUMNS),
+                                removidos.filter(pl.col("_bucket") == bucket).select(KEY_COLUMNS)], how="diagonal_relaxed")
+
+            partes = [novas]
+            if nome in buckets:
+                anterior = pl.read_parquet(self.dataset_dir / buckets[nome])
+                partes.insert(0, anterior.join(apagar.cast({c: anterior.schema[c] for c in KEY_COLUMNS}),
+                                               on=KEY_COLUMNS, how="anti"))
+                substituidos.append(self.dataset_dir / buckets[nome])
+            df = pl.concat(partes, how="diagonal_relaxed")
+
+            rel = f"bucket_{nome}/part-v{version:06d}.parquet"
+            destino = self.dataset_dir / rel
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            tmp = destino.with_name(f".{destino.name}.tmp")
+            df.write_parquet(tmp)
+            os.replace(tmp, destino)
+            buckets[nome] = rel
+
+        total = sum(pl.scan_parquet(self.dataset_dir / rel).select(pl.count()).collect().item()
+                    for rel in buckets.values())
+        self._commit({
+            **self.manifest,
+            "version": version,
+            "polars": pl.__version__,
+            "buckets": buckets,
+            "rows": total,
+            "history": self.manifest["history"] + [{
+                "version": version, "upserted": linhas.height, "removed": removidos.height,
+                "buckets": len(tocados), "at": datetime.now().isoformat(),
+            }],
+        })
+        for path in substituidos:
+            path.unlink(missing_ok=True)
+        logger.info(f"[FEATURE STORE] versão {version}: {linhas.height} upserts, {removidos.height} remoções, "
+                    f"{len(tocados)}/{self.n_buckets} buckets reescritos")
+        return version
+
+    def _commit(self, manifest: dict):
+        tmp_path = self.dataset_dir / f"{MANIFEST_NAME}.tmp"
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.dataset_dir / MANIFEST_NAME)
+        self.manifest = manifest
@@ -1,13 +1,16 @@
 
+import asyncio
 import time
 import os
 import sys
+import json
 
 # Add project root to path if needed (though usually handled by execution context)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 
 # Import the new Infrastructure Gateway
 from data_pipeline.infra.llm_gateway import get_llm_provider
+from data_pipeline.infra.llm_cache import LLMCache, get_llm_cache
 
 ###########################################################
 # Prompt Functions
@@ -126,24 +129,103 @@ Regras:
 - GARANTA que o JSON esteja completo e siga o modelo fornecido.
 """.strip()
 
+def extrair_json_limpo(resposta_modelo: str) -> dict:
+    linhas = resposta_modelo.strip().split('\n')
+    if linhas and linhas[0].strip() == '```json':
+        if len(linhas) > 1 and linhas[-1].strip() == '```':
+            json_string = '\n'.join(linhas[1:-1])
+        else:
+            json_string = resposta_modelo.strip()
+    else:
+        json_string = resposta_modelo.strip()
+    try:
+        return json.loads(json_string)
+    except json.JSONDecodeError as e:
+        print(f"Erro ao decodificar JSON: {e}")
+        return {}
+
+
+###########################################################
+# Cache de extrações
+###########################################################
+
+
+def _chave_cache(provider, prompt, model_name):
+    """
+    Chave (provider, modelo, sha256 do prompt, opções) com o modelo e as opções de geração efetivos,
+    resolvidos pelo próprio adapter (`generation_settings`): None e o modelo default explícito
+    compartilham a entrada, e mudar um default do adapter invalida as respostas antigas.
+    """
+    provider_name = type(provider).__name__
+    settings = getattr(provider, "generation_settings", None)
+    modelo, opcoes = settings(model_name) if settings else (model_name or "", {})
+    return provider_name, modelo, LLMCache.make_key(provider_name, modelo, prompt, opcoes)
+
+
+def _guardar_no_cache(cache, chave, resposta):
+    """Só guarda respostas não vazias com JSON parseável: falhas continuam indo ao LLM no retry."""
+    provider_name, modelo, key = chave
+    dados = extrair_json_limpo(resposta) if resposta and resposta.strip() else {}
+    if dados:
+        cache.put(key, provider_name, modelo, resposta, dados)
+
+
 # Função para análise do currículo via LLM Gateway (Adapter Pattern)
 
 
-def chamar_llm(prompt, model_name=None):
+def chamar_llm(prompt, model_name=None, use_cache=True, refresh=False):
     """
     Chama o LLM através do Gateway configurado.
     O gateway decide se usa Ollama (Local) ou DeepSeek (Cloud) baseado em env vars.
+    Respostas são servidas do cache de extrações quando o mesmo prompt já foi processado.
+    Com `refresh`, o cache não é lido, mas a nova resposta substitui a entrada (retry após
+    uma resposta em cache reprovada na validação).
     """
     provider = get_llm_provider()
+    cache = get_llm_cache() if use_cache else None
+    chave = _chave_cache(provider, prompt, model_name) if cache is not None else None
+    if cache is not None and not refresh:
+        cached = cache.get(chave[2])
+        if cached is not None:
+            return cached.raw
     
     # Se model_name não for passado, o adapter usa o default do env ou da classe
     # Se for passado (como 'gemma3:4b'), o adapter tenta honrar se possível/relevante
     try:
-        return provider.generate(prompt, model_name=model_name)
+        resposta = provider.generate(prompt, model_name=model_name)
     except Exception as e:
         print(f"Erro na chamada do LLM: {e}")
         return ""
 
+    if cache is not None:
+        _guardar_no_cache(cache, chave, resposta)
+    return resposta
+
+
+async def achamar_llm(prompt, model_name=None, use_cache=True, refresh=False):
+    """
+    Versão assíncrona de `chamar_llm`: várias gerações podem ficar em voo ao mesmo tempo
+    (limitadas pelo semáforo do provider) sem bloquear threads.
+    Leitura e escrita no cache (SQLite, bloqueantes) rodam em thread, fora do event loop.
+    """
+    provider = get_llm_provider()
+    cache = get_llm_cache() if use_cache else None
+    chave = _chave_cache(provider, prompt, model_name) if cache is not None else None
+    if cache is not None and not refresh:
+        cached = await asyncio.to_thread(cache.get, chave[2])
+        if cached is not None:
+            return cached.raw
+
+    try:
+        resposta = await provider.agenerate(prompt, model_name=model_name)
+    except Exception as e:
+        print(f"Erro na chamada do LLM: {e}")
+        return ""
+
+    if cache is not None:
+        await asyncio.to_thread(_guardar_no_cache, cache, chave, resposta)
+    return resposta
+
 
 def chamar_llm_com_retry(prompt: str, logger, max_retries: int = 3, delay: int = 2) -> str:
     for tentativa in range(1, max_retries + 1):
@@ -1,6 +1,11 @@
 import io
 import logging
-from typing import Optional, Protocol
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Protocol
 
 # Optional imports - fallback if not installed
 try:
@@ -15,10 +20,11 @@ except ImportError:
 
 try:
     import pytesseract
-    from pdf2image import convert_from_bytes
+    from pdf2image import convert_from_bytes, pdfinfo_from_bytes
 except ImportError:
     pytesseract = None
     convert_from_bytes = None
+    pdfinfo_from_bytes = None
 
 try:
     from paddleocr import PaddleOCR
@@ -27,101 +33,230 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Rasterization resolution: pdf2image defaults to 200, which is plenty for OCR of CV text
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+# Pages whose text layer has fewer characters than this are treated as scanned and OCR'd
+OCR_PAGE_MIN_CHARS = int(os.getenv("OCR_PAGE_MIN_CHARS", "50"))
+# At most N pages are OCR'd per document (a CV rarely needs more; protects /predict_file from huge scans)
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "10"))
+# Stop OCR'ing further pages once this many characters were extracted (0 = OCR every page up to the cap)
+OCR_TARGET_CHARS = int(os.getenv("OCR_TARGET_CHARS", "6000"))
+# Worker processes that rasterize + OCR one page each (1 = in-process, sequential)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 class OCRProvider(Protocol):
     def extract_text(self, images: list) -> str:
         ...
 
+    def extract_page(self, image) -> str:
+        ...
+
 class TesseractAdapter:
-    def extract_text(self, images: list) -> str:
+    def extract_page(self, image) -> str:
         if not pytesseract:
             logger.warning("Tesseract not installed.")
             return ""
-        text = ""
-        for img in images:
-            text += pytesseract.image_to_string(img) + "\n"
-        return text
+        return pytesseract.image_to_string(image)
+
+    def extract_text(self, images: list) -> str:
+        return "".join(self.extract_page(img) + "\n" for img in images)
 
 class PaddleOCRAdapter:
     def __init__(self, lang='pt'):
         if not PaddleOCR:
             raise ImportError("PaddleOCR not installed")
-        # Initialize only once ideally, but for now per-adapter is okay as it singleton-izes internally usually
+        # Expensive (loads detection + recognition models): built once per process via get_ocr_engine()
         self.ocr = PaddleOCR(use_angle_cls=True, lang=lang, show_log=False)
 
+    def extract_page(self, image) -> str:
+        # PaddleOCR expects path or numpy array. PDF2Image returns PIL images.
+        import numpy as np
+        result = self.ocr.ocr(np.array(image), cls=True)
+        if result and result[0]:
+            # result structure: [[[[x,y],..], (text, conf)], ...]
+            return "\n".join([line[1][0] for line in result[0]])
+        return ""
+
     def extract_text(self, images: list) -> str:
-        text_results = []
-        for i, img in enumerate(images):
-            # PaddleOCR expects path or numpy array. PDF2Image returns PIL images.
-            import numpy as np
-            img_np = np.array(img)
-            
-            result = self.ocr.ocr(img_np, cls=True)
-            if result and result[0]:
-                # result structure: [[[[x,y],..], (text, conf)], ...]
-                page_text = "\n".join([line[1][0] for line in result[0]])
-                text_results.append(page_text)
-        return "\n".join(text_results)
+        return "\n".join(t for t in (self.extract_page(img) for img in images) if t)
+
+
+# ------------------------------------------------------------------
+# Process-wide OCR engine and page worker pool
+# ------------------------------------------------------------------
+_engine: Optional[OCRProvider] = None
+_engine_ready = False
+_engine_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_engine() -> Optional[OCRProvider]:
+    """
+    The OCR engine of this process, built on first use and reused afterwards.
+    Prioritizes PaddleOCR, falls back to Tesseract; None if neither is installed.
+    """
+    global _engine, _engine_ready
+    if _engine_ready:
+        return _engine
+    with _engine_lock:
+        if not _engine_ready:
+            if PaddleOCR:
+                logger.info("Using PaddleOCR provider")
+                _engine = PaddleOCRAdapter()
+            elif pytesseract:
+                logger.info("Using Tesseract provider")
+                _engine = TesseractAdapter()
+            else:
+                logger.warning("No OCR provider available")
+            _engine_ready = True
+    return _engine
+
+
+def _ocr_page(file_bytes: bytes, page_number: int, dpi: int) -> str:
+    """Rasterizes a single page (1-based) and OCRs it with this process's engine."""
+    engine = get_ocr_engine()
+    if engine is None:
+        return ""
+    images = convert_from_bytes(file_bytes, dpi=dpi, first_page=page_number, last_page=page_number)
+    return "\n".join(engine.extract_page(img) for img in images)
+
+
+def _get_page_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Shared pool of OCR workers; each worker loads its engine once, in the initializer.
+    Workers are spawned, not forked: the pool is created lazily from a threadpool thread of the
+    API process (torch/ONNX threads, event loop, logging locks), where fork can deadlock.
+    """
+    global _pool
+    if OCR_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=get_ocr_engine,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_ocr_pool():
+    """Stops the OCR worker processes (they are restarted on the next OCR request)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def ocr_pdf_pages(file_bytes: bytes, pages: List[int], dpi: int = OCR_DPI,
+                  target_chars: int = OCR_TARGET_CHARS) -> Dict[int, str]:
+    """
+    OCRs the given pages (1-based) and returns {page: text}, in page order.
+
+    Pages are rasterized and OCR'd in parallel by the worker pool, with at most one page
+    per worker in flight. Once the pages read so far (in order) reach `target_chars`, the
+    remaining pages are not submitted. Falls back to in-process OCR if the pool is
+    disabled or breaks.
+    """
+    pool = _get_page_pool()
+    results: Dict[int, str] = {}
+
+    def enough() -> bool:
+        return target_chars > 0 and sum(len(t.strip()) for t in results.values()) >= target_chars
+
+    if pool is not None:
+        try:
+            in_flight: Dict[int, Future] = {}
+            queue = list(pages)
+            while queue or in_flight:
+                while queue and len(in_flight) < OCR_WORKERS and not enough():
+                    page = queue.pop(0)
+                    in_flight[page] = pool.submit(_ocr_page, file_bytes, page, dpi)
+                if not in_flight:
+                    break
+                page = min(in_flight)
+                results[page] = in_flight.pop(page).result()
+                if enough():
+                    for future in in_flight.values():
+                        future.cancel()
+                    break
+            return results
+        except BrokenProcessPool as e:
+            logger.error(f"OCR worker pool broke, falling back to in-process OCR: {e}")
+            shutdown_ocr_pool()
+            pages = [p for p in pages if p not in results]
+
+    for page in pages:
+        if enough():
+            break
+        results[page] = _ocr_page(file_bytes, page, dpi)
+    return results
+
 
 class DocumentParser:
     @staticmethod
     def get_ocr_provider() -> OCRProvider:
         """
-        Factory to get the best available OCR provider.
+        The process-wide OCR provider (see get_ocr_engine).
         Prioritizes PaddleOCR, falls back to Tesseract.
         """
-        if PaddleOCR:
-            logger.info("Using PaddleOCR provider")
-            return PaddleOCRAdapter()
-        elif pytesseract:
-            logger.info("Using Tesseract provider")
-            return TesseractAdapter()
-        else:
-            logger.warning("No OCR provider available")
-            return None
+        return get_ocr_engine()
 
     @staticmethod
     def extract_text_from_pdf_bytes(file_bytes: bytes, force_ocr: bool = False) -> str:
         """
-        Extracts text from PDF bytes. 
-        If force_ocr is True or pypdf extraction is minimal, uses OCR.
+        Extracts text from PDF bytes, deciding page by page.
+        Pages with a text layer (>= OCR_PAGE_MIN_CHARS) use the pypdf text; only the remaining
+        (image-only) pages are rasterized and OCR'd. If force_ocr is True, every page is OCR'd.
         """
         if not PdfReader:
             raise ImportError("pypdf not installed.")
-            
-        text = ""
-        if not force_ocr:
-            try:
-                reader = PdfReader(io.BytesIO(file_bytes))
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            except Exception as e:
-                logger.error(f"Error reading PDF with pypdf: {e}")
-            
-        # Decision logic for OCR
-        should_ocr = force_ocr or len(text.strip()) < 50
-        
-        if should_ocr:
-            if not convert_from_bytes:
-                logger.warning("pdf2image not installed, cannot convert PDF to images for OCR.")
-                return text
-                
-            logger.info(f"Triggering OCR (Force={force_ocr}, TextLen={len(text.strip())})")
-            
-            try:
-                images = convert_from_bytes(file_bytes)
-                provider = DocumentParser.get_ocr_provider()
-                if provider:
-                    ocr_text = provider.extract_text(images)
-                    # If we forced OCR, we return OCR text. 
-                    # If it was fallback, we prefer OCR if it found something, else keep original (maybe empty)
-                    if ocr_text.strip():
-                        return ocr_text
-            except Exception as e:
-                logger.error(f"OCR failed: {e}")
-        
-        return text
+
+        page_texts: List[str] = []
+        try:
+            reader = PdfReader(io.BytesIO(file_bytes))
+            for number, page in enumerate(reader.pages, start=1):
+                try:
+                    page_text = "" if force_ocr else page.extract_text()
+                except Exception as e:
+                    # Keep going: an unreadable text layer just sends this page to OCR
+                    logger.error(f"Error reading page {number} with pypdf: {e}")
+                    page_text = ""
+                page_texts.append(page_text or "")
+        except Exception as e:
+            logger.error(f"Error reading PDF with pypdf: {e}")
+            page_texts = []
+
+        def join(texts) -> str:
+            return "".join(t + "\n" for t in texts if t)
+
+        # Decision logic for OCR (per page, 1-based page numbers as in pdf2image)
+        ocr_pages = [i for i, t in enumerate(page_texts, start=1) if len(t.strip()) < OCR_PAGE_MIN_CHARS]
+        if page_texts and not ocr_pages:
+            return join(page_texts)
+
+        if not convert_from_bytes:
+            logger.warning("pdf2image not installed, cannot convert PDF to images for OCR.")
+            return join(page_texts)
+
+        try:
+            if not page_texts:
+                # pypdf could not read the file: let poppler count the pages and OCR them all
+                n_pages = int(pdfinfo_from_bytes(file_bytes)["Pages"])
+                page_texts = [""] * n_pages
+                ocr_pages = list(range(1, n_pages + 1))
+            if len(ocr_pages) > OCR_MAX_PAGES:
+                logger.warning(f"{len(ocr_pages)} pages need OCR, limited to the first {OCR_MAX_PAGES}")
+                ocr_pages = ocr_pages[:OCR_MAX_PAGES]
+
+            logger.info(f"Triggering OCR (Force={force_ocr}, Pages={ocr_pages} of {len(page_texts)})")
+            for page, ocr_text in ocr_pdf_pages(file_bytes, ocr_pages).items():
+                # Keep the (short) text layer if OCR found nothing on that page
+                if ocr_text.strip():
+                    page_texts[page - 1] = ocr_text
+        except Exception as e:
+            logger.error(f"OCR failed: {e}")
+
+        return join(page_texts)
 
     @staticmethod
     def extract_text_from_docx_bytes(file_bytes: bytes) -> str:
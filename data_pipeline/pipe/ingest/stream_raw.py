@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, TextIO, Tuple
+
+import polars as pl
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from pipe.utils.logger import get_logger
+
+logger = get_logger("stream_raw")
+
+RAW_BATCH_SIZE = int(os.getenv("RAW_INGEST_BATCH_SIZE", "5000"))
+READ_BLOCK_CHARS = 1 << 20
+NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+# ------------------------------------------------------------------
+# Parser incremental do nível superior ({id: registro} ou [registro, ...])
+# ------------------------------------------------------------------
+class _ChunkedJsonReader:
+    """
+    Lê o arquivo em blocos e decodifica um valor por vez com `JSONDecoder.raw_decode`.
+    Só o registro corrente (mais o resto do bloco) fica em memória.
+    """
+
+    def __init__(self, f: TextIO, block_chars: int = READ_BLOCK_CHARS):
+        self.f = f
+        self.block_chars = block_chars
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        # Lê ao menos o tamanho do que está pendente, para um registro grande não ser re-decodificado N vezes
+        chunk = self.f.read(max(self.block_chars, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: esperado '{char}' na posição {self.pos}, encontrado '{self.peek()}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # Um número cortado no fim do bloco (ex.: "0." | "25") pode continuar no próximo:
+                # só é final se o caractere seguinte não puder fazer parte de um número
+                is_number = isinstance(obj, (int, float)) and not isinstance(obj, bool)
+                complete = not is_number or (end < len(self.buf) and self.buf[end] not in NUMBER_CHARS)
+                if complete or self.eof or not self._fill():
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def items(self) -> Iterator[Tuple[Optional[str], Any]]:
+        opening = self.peek()
+        if opening not in ("{", "["):
+            raise ValueError(f"JSON de nível superior deve ser objeto ou lista, encontrado '{opening}'")
+        closing = "}" if opening == "{" else "]"
+        self.pos += 1
+        if self.peek() == closing:
+            return
+        while True:
+            key = None
+            if opening == "{":
+                key = self.value()
+                self.expect(":")
+            yield key, self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect(closing)
+            return
+
+
+def _ijson_items(f, opening: str) -> Iterator[Tuple[Optional[str], Any]]:
+    if opening == "{":
+        yield from ijson.kvitems(f, "", use_float=True)
+    else:
+        for value in ijson.items(f, "item", use_float=True):
+            yield None, value
+
+
+def iter_json_records(file_path: Path, id_field: str) -> Iterator[dict]:
+    """
+    Itera os registros do dump sem carregar o arquivo inteiro.
+    Em `{id: registro}` o id vira a coluna `id_field` (mesma convenção de `load_json_to_df`).
+    Usa ijson quando instalado; caso contrário, o parser em blocos acima.
+    """
+    if ijson is not None:
+        with file_path.open(encoding="utf-8") as f:
+            opening = _ChunkedJsonReader(f, block_chars=4096).peek()
+        with file_path.open("rb") as f:
+            items = _ijson_items(f, opening)
+            yield from ({id_field: k, **v} if k is not None else v for k, v in items)
+        return
+
+    with file_path.open(encoding="utf-8") as f:
+        for key, value in _ChunkedJsonReader(f).items():
+            yield {id_field: key, **value} if key is not None else value
+
+
+# ------------------------------------------------------------------
+# Lotes -> Parquet
+# ------------------------------------------------------------------
+def _sanitize_batch(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Ajusta tipos que só aparecem porque o lote é uma amostra do arquivo:
+    struct vazio ({} em todo o lote) é descartado e lista vazia em todo o lote é explodida
+    e descartada (mesmas linhas que a explosão de List[Struct] geraria). As colunas faltantes
+    são preenchidas com nulos na leitura.
+    """
+    drop, explode = [], []
+    for name, dtype in df.schema.items():
+        if isinstance(dtype, pl.Struct) and all(f.name == "" for f in dtype.fields):
+            drop.append(name)
+        elif isinstance(dtype, pl.List) and dtype.inner == pl.Null:
+            explode.append(name)
+    if explode:
+        df = df.explode(explode)
+    return df.drop(drop + explode)
+
+
+def _finalize_batch(df: pl.DataFrame) -> pl.DataFrame:
+    # Coluna toda nula no lote: tipa como texto (todos os campos curated são Optional[str])
+    return df.with_columns([pl.col(name).cast(pl.Utf8) for name, dtype in df.schema.items() if dtype == pl.Null])
+
+
+def iter_json_batches(file_path: Path, id_field: str, batch_size: int = RAW_BATCH_SIZE,
+                      transform: Optional[Callable[[pl.DataFrame], pl.DataFrame]] = None) -> Iterator[pl.DataFrame]:
+    """Lotes de até `batch_size` registros como DataFrames, com `transform` aplicado por lote."""
+    batch: List[dict] = []
+
+    def build(records):
+        df = _sanitize_batch(pl.from_dicts(records, infer_schema_length=None))
+        return _finalize_batch(transform(df) if transform else df)
+
+    for record in iter_json_records(file_path, id_field):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield build(batch)
+            batch = []
+    if batch:
+        yield build(batch)
+
+
+def stream_json_to_parquet(file_path: Path, id_field: str, output_dir: Path, batch_size: int = RAW_BATCH_SIZE,
+                           transform: Optional[Callable[[pl.DataFrame], pl.DataFrame]] = None) -> Path:
+    """
+    Converte o dump JSON em `output_dir/part-NNNNN.parquet`, um arquivo por lote.
+    O pico de memória é o de um lote, independente do tamanho do dump.
+    Escreve em diretório temporário e troca no final (leitores nunca veem uma conversão pela metade).
+    """
+    output_dir = Path(output_dir)
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    rows = parts = 0
+    for df in iter_json_batches(file_path, id_field, batch_size, transform):
+        df.write_parquet(tmp_dir / f"part-{parts:05d}.parquet")
+        rows += df.height
+        parts += 1
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    tmp_dir.rename(output_dir)
+    logger.info(f"[STREAM] {file_path.name}: {rows} linhas em {parts} partes -> {output_dir}")
+    return output_dir
+
+
+def _part_files(parts_dir: Path) -> List[Path]:
+    return sorted(Path(parts_dir).glob("part-*.parquet"))
+
+
+def scan_parquet_parts(parts_dir: Path) -> pl.LazyFrame:
+    """
+    LazyFrame sobre as partes de `stream_json_to_parquet`; colunas ausentes em alguns lotes viram nulos.
+    Nada é lido até o `collect`/`sink_parquet` do chamador.
+    """
+    parts = _part_files(parts_dir)
+    if not parts:
+        return pl.LazyFrame()
+    return pl.concat([pl.scan_parquet(p) for p in parts], how="diagonal_relaxed")
+
+
+def iter_parquet_parts(parts_dir: Path) -> Iterator[pl.DataFrame]:
+    """
+    Uma parte por vez (ex.: validação linha a linha com pico de memória de um lote), já no schema
+    de `scan_parquet_parts`: colunas ausentes na parte viram nulos e os tipos são os do conjunto.
+    """
+    schema = scan_parquet_parts(parts_dir).schema
+    for part in _part_files(parts_dir):
+        df = pl.read_parquet(part)
+        yield df.select([pl.col(name).cast(dtype) if name in df.columns else pl.lit(None, dtype).alias(name)
+                         for name, dtype in schema.items()])
+
+
+def read_parquet_parts(parts_dir: Path) -> pl.DataFrame:
+    """Lê todas as partes de `stream_json_to_parquet` em um DataFrame."""
+    return scan_parquet_parts(parts_dir).collect()
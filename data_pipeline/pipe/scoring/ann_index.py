@@ -0,0 +1,315 @@
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from data_pipeline.pipe.utils.logger import get_logger
+
+logger = get_logger("ann_index")
+
+META_FILE = "ann_meta.json"
+IDS_FILE = "ids.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12, None)
+
+
+def pooled_vectors(profile_index, field: str = "skills", pooling: str = "mean",
+                   chunk_size: int = 4096) -> Tuple[List[str], np.ndarray]:
+    """
+    Um vetor por perfil do ProfileIndex: média (ou máximo por dimensão) dos embeddings das frases
+    do campo, renormalizado. Perfis sem frases ficam de fora. Processa em blocos de linhas
+    para não materializar todos os embeddings de frases de uma vez.
+    """
+    reduce = {"mean": np.add.reduceat, "max": np.maximum.reduceat}[pooling]
+    vocab, idx, offsets = profile_index.segment_arrays(field)
+    all_ids = profile_index.table["id"].to_list()
+
+    ids, blocks = [], []
+    for start in range(0, len(all_ids), chunk_size):
+        stop = min(start + chunk_size, len(all_ids))
+        lengths = np.diff(offsets[start:stop + 1])
+        rows = np.flatnonzero(lengths)
+        if len(rows) == 0:
+            continue
+        base = offsets[start]
+        emb = np.asarray(vocab[idx[base:offsets[stop]]], dtype=np.float32)
+        # Perfis vazios não ocupam posições em `emb`: reduceat sobre os inícios dos não vazios
+        pooled = reduce(emb, (offsets[start:stop][rows] - base).astype(np.int64), axis=0)
+        if pooling == "mean":
+            pooled /= lengths[rows][:, None]
+        ids.extend(all_ids[start + r] for r in rows)
+        blocks.append(_normalize(pooled))
+
+    dim = vocab.shape[1] if vocab.ndim == 2 else 0
+    return ids, np.vstack(blocks) if blocks else np.zeros((0, dim), dtype=np.float32)
+
+
+def query_vector(embeddings: np.ndarray, pooling: str = "mean") -> Optional[np.ndarray]:
+    """Mesmo pooling de pooled_vectors aplicado às frases da consulta (ex: skills da vaga)."""
+    if embeddings is None or len(embeddings) == 0:
+        return None
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    pooled = embeddings.mean(axis=0) if pooling == "mean" else embeddings.max(axis=0)
+    return _normalize(pooled)
+
+
+class IVFIndex:
+    """
+    Índice invertido (IVF) em NumPy puro, sem dependências: k-means esférico define `nlist`
+    centróides, cada vetor entra na lista do centróide mais próximo e a busca só compara
+    a consulta com os vetores das `nprobe` listas mais próximas.
+
+    Suporta add (upsert) e remove incrementais; remoções são marcadas e ignoradas na busca.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, centroids: np.ndarray, nprobe: Optional[int] = None):
+        self.centroids = _normalize(centroids)
+        self.nprobe = nprobe or int(os.getenv("ANN_NPROBE", "16"))
+        dim = self.centroids.shape[1]
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.assign = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self._members: Optional[List[np.ndarray]] = None
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, nlist: Optional[int] = None, iterations: int = 10,
+              sample_size: int = 20_000, seed: int = 0) -> "IVFIndex":
+        vectors = _normalize(vectors)
+        nlist = nlist or max(1, min(1024, int(np.sqrt(len(vectors)))))
+        nlist = max(1, min(nlist, len(vectors)))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False)]
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            # Centróides sem membros são mantidos
+            centroids = np.where(counts[:, None] > 0, _normalize(sums), centroids)
+        return cls(centroids)
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.row_of
+
+    def item_ids(self) -> List[str]:
+        return list(self.row_of)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        """Insere ou substitui vetores (upsert por id)."""
+        ids = [str(i) for i in ids]
+        self.remove(ids)
+        vectors = _normalize(vectors).reshape(len(ids), -1)
+        start = len(self.ids)
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.assign = np.concatenate([self.assign, np.argmax(vectors @ self.centroids.T, axis=1)])
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+        self.ids.extend(ids)
+        self.row_of.update({item_id: start + i for i, item_id in enumerate(ids)})
+        self._members = None
+
+    def remove(self, ids: Iterable[str]):
+        rows = [self.row_of.pop(str(i)) for i in ids if str(i) in self.row_of]
+        if rows:
+            self.alive[rows] = False
+            self._members = None
+
+    def _lists(self) -> List[np.ndarray]:
+        if self._members is None:
+            rows = np.flatnonzero(self.alive)
+            order = np.argsort(self.assign[rows], kind="stable")
+            bounds = np.searchsorted(self.assign[rows][order], np.arange(len(self.centroids) + 1))
+            self._members = [rows[order[bounds[c]:bounds[c + 1]]] for c in range(len(self.centroids))]
+        return self._members
+
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        query = _normalize(query).ravel()
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        lists = self._lists()
+        rows = np.concatenate([lists[c] for c in probes])
+        if len(rows) == 0 or k <= 0:
+            return []
+        sims = self.vectors[rows] @ query
+        top = np.argpartition(-sims, min(k, len(rows)) - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [(self.ids[rows[i]], float(sims[i])) for i in top]
+
+    def save(self, directory: Path):
+        rows = np.flatnonzero(self.alive)
+        np.savez(directory / "ivf.npz", centroids=self.centroids, vectors=self.vectors[rows], assign=self.assign[rows])
+        with (directory / IDS_FILE).open("w", encoding="utf-8") as f:
+            json.dump([self.ids[r] for r in rows], f)
+
+    @classmethod
+    def load(cls, directory: Path) -> "IVFIndex":
+        data = np.load(directory / "ivf.npz")
+        with (directory / IDS_FILE).open(encoding="utf-8") as f:
+            ids = json.load(f)
+        index = cls(data["centroids"])
+        index.vectors = data["vectors"]
+        index.assign = data["assign"]
+        index.alive = np.ones(len(ids), dtype=bool)
+        index.ids = ids
+        index.row_of = {item_id: i for i, item_id in enumerate(ids)}
+        return index
+
+
+class HNSWIndex:
+    """
+    Grafo HNSW (hnswlib, opcional) com similaridade de produto interno sobre vetores normalizados.
+    Mesma interface do IVFIndex; ids externos (str) são mapeados para rótulos inteiros.
+    """
+
+    backend = "hnsw"
+
+    def __init__(self, dim: int, max_elements: int = 1024, ef: Optional[int] = None):
+        self.dim = dim
+        self.graph = hnswlib.Index(space="ip", dim=dim)
+        self.graph.init_index(max_elements=max(max_elements, 1), ef_construction=200, M=16, allow_replace_deleted=True)
+        self.graph.set_ef(ef or int(os.getenv("ANN_HNSW_EF", "128")))
+        self.ids: List[Optional[str]] = []
+        self.label_of: Dict[str, int] = {}
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, **kwargs) -> "HNSWIndex":
+        return cls(vectors.shape[1], max_elements=len(vectors))
+
+    def __len__(self) -> int:
+        return len(self.label_of)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self.label_of
+
+    def item_ids(self) -> List[str]:
+        return list(self.label_of)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        ids = [str(i) for i in ids]
+        self.remove(ids)
+        needed = len(self.ids) + len(ids)
+        if needed > self.graph.get_max_elements():
+            self.graph.resize_index(max(needed, 2 * self.graph.get_max_elements()))
+        labels = np.arange(len(self.ids), needed)
+        self.graph.add_items(_normalize(vectors).reshape(len(ids), -1), labels)
+        self.ids.extend(ids)
+        self.label_of.update(zip(ids, labels.tolist()))
+
+    def remove(self, ids: Iterable[str]):
+        for item_id in ids:
+            label = self.label_of.pop(str(item_id), None)
+            if label is not None:
+                self.graph.mark_deleted(label)
+                self.ids[label] = None
+
+    def search(self, query: np.ndarray, k: int, **kwargs) -> List[Tuple[str, float]]:
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        labels, distances = self.graph.knn_query(_normalize(query).reshape(1, -1), k=k)
+        # Distância "ip" do hnswlib é 1 - produto interno
+        return [(self.ids[label], float(1 - dist)) for label, dist in zip(labels[0], distances[0])]
+
+    def save(self, directory: Path):
+        self.graph.save_index(str(directory / "hnsw.bin"))
+        with (directory / IDS_FILE).open("w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+
+    @classmethod
+    def load(cls, directory: Path) -> "HNSWIndex":
+        with (directory / IDS_FILE).open(encoding="utf-8") as f:
+            ids = json.load(f)
+        with (directory / META_FILE).open(encoding="utf-8") as f:
+            dim = json.load(f)["dim"]
+        index = cls.__new__(cls)
+        index.dim = dim
+        index.graph = hnswlib.Index(space="ip", dim=dim)
+        index.graph.load_index(str(directory / "hnsw.bin"), allow_replace_deleted=True)
+        index.graph.set_ef(int(os.getenv("ANN_HNSW_EF", "128")))
+        index.ids = ids
+        index.label_of = {item_id: label for label, item_id in enumerate(ids) if item_id is not None}
+        return index
+
+
+BACKENDS = {"ivf": IVFIndex, "hnsw": HNSWIndex}
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """ANN_BACKEND=auto (default) usa HNSW quando hnswlib está instalado, senão o IVF em NumPy."""
+    backend = (backend or os.getenv("ANN_BACKEND", "auto")).lower()
+    if backend == "auto":
+        return "hnsw" if hnswlib is not None else "ivf"
+    if backend == "hnsw" and hnswlib is None:
+        logger.warning("[ANN] hnswlib não instalado; usando IVF em NumPy")
+        return "ivf"
+    return backend
+
+
+def build_vector_index(ids: Sequence[str], vectors: np.ndarray, backend: Optional[str] = None):
+    index = BACKENDS[resolve_backend(backend)].train(vectors)
+    index.add(ids, vectors)
+    return index
+
+
+def save_vector_index(index, directory: Path, **meta):
+    """Grava em diretório temporário e troca no final (mesmo esquema do ProfileIndex.build)."""
+    directory = Path(directory)
+    tmp_dir = directory.with_name(f".{directory.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    dim = index.centroids.shape[1] if index.backend == "ivf" else index.dim
+    with (tmp_dir / META_FILE).open("w", encoding="utf-8") as f:
+        json.dump({"backend": index.backend, "dim": dim, "count": len(index),
+                   "built_at": datetime.now().isoformat(), **meta}, f, indent=2)
+    index.save(tmp_dir)
+
+    old_dir = directory.with_name(f".{directory.name}.old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if directory.exists():
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_vector_index(directory: Path, source_built_at: Optional[str] = None):
+    """
+    Índice pronto para uso, ou None se ausente, com backend indisponível ou gerado a partir
+    de outra versão do índice de perfis (`source_built_at`).
+    """
+    directory = Path(directory)
+    if not (directory / META_FILE).exists():
+        return None
+    with (directory / META_FILE).open(encoding="utf-8") as f:
+        meta = json.load(f)
+    if source_built_at is not None and meta.get("source_built_at") != source_built_at:
+        logger.warning(f"[ANN] {directory} é de outra versão do índice de perfis; reconstrua. Ignorando.")
+        return None
+    if meta["backend"] == "hnsw" and hnswlib is None:
+        logger.warning(f"[ANN] {directory} requer hnswlib, que não está instalado. Ignorando.")
+        return None
+    index = BACKENDS[meta["backend"]].load(directory)
+    index.meta = meta
+    logger.info(f"[ANN] {directory}: {len(index)} vetores ({meta['backend']})")
+    return index
@@ -0,0 +1,207 @@
+import numpy as np
+import polars as pl
+import os
+import sys
+from typing import Callable, List, Optional, Sequence
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from data_pipeline.pipe.scoring.skills import SkillsScorer
+from data_pipeline.pipe.scoring.cultural import CulturalScorer
+from data_pipeline.pipe.utils.logger import get_logger
+
+logger = get_logger("batch_engine")
+
+JOB_SKILL_COLS = ["job_competencias_tecnicas", "job_ferramentas_tecnologicas"]
+APP_SKILL_COLS = ["app_competencias_tecnicas", "app_ferramentas_tecnologicas"]
+JOB_CULTURE_COLS = ["job_competencias_comportamentais"]
+APP_CULTURE_COLS = ["app_competencias_comportamentais"]
+
+# (nível na vaga, nível no candidato) por dimensão do score estruturado do SkillsScorer
+STRUCTURED_LEVEL_COLS = {
+    "professional": ("job_senioridade_aparente", "app_senioridade_aparente"),
+    "academic": ("job_nivel_formacao", "app_nivel_formacao"),
+    "english": ("job_idiomas_ingles", "app_idiomas_ingles"),
+}
+
+ROW_COL = "_row"
+
+
+def explode_phrases(df: pl.DataFrame, columns: Sequence[str]) -> pl.DataFrame:
+    """
+    Formato longo (_row, phrase) das colunas de lista (ou texto) informadas, na ordem das colunas.
+    Nulos e strings vazias são descartados; colunas ausentes são ignoradas.
+    """
+    parts = []
+    for col in columns:
+        if col not in df.columns:
+            continue
+        part = df.select(pl.col(ROW_COL), pl.col(col).alias("phrase"))
+        while isinstance(part.schema["phrase"], pl.List):  # achata listas aninhadas
+            part = part.explode("phrase")
+        parts.append(part.with_columns(pl.col("phrase").cast(pl.Utf8)))
+
+    if not parts:
+        return pl.DataFrame(schema={ROW_COL: pl.UInt32, "phrase": pl.Utf8})
+
+    # Mantém a ordem das frases dentro de cada linha
+    return (
+        pl.concat(parts)
+        .filter(pl.col("phrase").is_not_null() & (pl.col("phrase") != ""))
+        .with_row_count("_ord")
+        .sort([ROW_COL, "_ord"])
+        .drop("_ord")
+    )
+
+
+class BatchScoringEngine:
+    """
+    Scoring vetorizado sobre o DataFrame inteiro (substitui os loops por linha).
+
+    1. Explode as colunas de lista em um vocabulário único de frases
+    2. Codifica o vocabulário uma única vez, em lotes grandes
+    3. Para cada vaga, calcula a similaridade máxima por par com reduções segmentadas em NumPy
+    4. Junta os scores de volta ao DataFrame em Polars
+
+    O custo de encoding escala com o número de frases distintas, não com o número de linhas.
+    """
+
+    def __init__(self, skills_scorer: Optional[SkillsScorer] = None, cultural_scorer: Optional[CulturalScorer] = None,
+                 job_key: str = "codigo_vaga", encode_batch_size: int = 4096):
+        self._skills_scorer = skills_scorer
+        self._cultural_scorer = cultural_scorer
+        self.job_key = job_key
+        self.encode_batch_size = encode_batch_size
+
+    @property
+    def skills_scorer(self) -> SkillsScorer:
+        if self._skills_scorer is None:
+            self._skills_scorer = SkillsScorer()
+        return self._skills_scorer
+
+    @property
+    def cultural_scorer(self) -> CulturalScorer:
+        if self._cultural_scorer is None:
+            self._cultural_scorer = CulturalScorer()
+        return self._cultural_scorer
+
+    def _encode_vocab(self, encode: Callable[[List[str]], np.ndarray], vocab: List[str]) -> np.ndarray:
+        chunks = [
+            encode(vocab[i:i + self.encode_batch_size])
+            for i in range(0, len(vocab), self.encode_batch_size)
+        ]
+        return np.vstack(chunks).astype(np.float32)
+
+    def _pairwise_scores(self, df: pl.DataFrame, job_cols: Sequence[str], cand_cols: Sequence[str],
+                         encode: Callable[[List[str]], np.ndarray], kernel: Callable, empty_score: float) -> np.ndarray:
+        n_rows = len(df)
+        scores = np.full(n_rows, empty_score, dtype=np.float32)
+        if n_rows == 0:
+            return scores
+
+        indexed = df.with_row_count(ROW_COL)
+        long_job = explode_phrases(indexed, job_cols)
+        long_cand = explode_phrases(indexed, cand_cols)
+
+        # 1. Vocabulário único
+        vocab_df = (
+            pl.concat([long_job.select("phrase"), long_cand.select("phrase")])
+            .unique(maintain_order=True)
+            .with_row_count("idx")
+        )
+        if len(vocab_df) == 0:
+            return scores
+        logger.info(f"→ Vocabulário: {len(vocab_df)} frases distintas para {n_rows} pares")
+
+        # 2. Encode único
+        embeddings = self._encode_vocab(encode, vocab_df["phrase"].to_list())
+
+        # 3. Linhas agrupadas por vaga: as frases dos candidatos de cada vaga ficam contíguas
+        order = (
+            indexed.select(ROW_COL, pl.col(self.job_key).cast(pl.Utf8).fill_null("").alias("_job"))
+            .sort(["_job", ROW_COL])
+            .with_row_count("_pos")
+        )
+        pos_of_row = np.empty(n_rows, dtype=np.int64)
+        pos_of_row[order[ROW_COL].to_numpy()] = order["_pos"].to_numpy()
+        rows_by_pos = order[ROW_COL].to_numpy()
+
+        cand = (
+            long_cand.join(vocab_df, on="phrase", how="left")
+            .with_row_count("_ord")
+            .with_columns(pl.col(ROW_COL).map_batches(lambda s: pl.Series(pos_of_row[s.to_numpy()])).alias("_pos"))
+            .sort(["_pos", "_ord"])
+        )
+        cand_idx = cand["idx"].to_numpy().astype(np.int64)
+        cand_offsets = np.searchsorted(cand["_pos"].to_numpy(), np.arange(n_rows + 1))
+
+        job_idx_by_row = {
+            row: np.asarray(idx, dtype=np.int64)
+            for row, idx in long_job.join(vocab_df, on="phrase", how="left")
+                                     .group_by(ROW_COL, maintain_order=True)
+                                     .agg(pl.col("idx"))
+                                     .iter_rows()
+        }
+
+        job_values = order["_job"].to_numpy()
+        group_starts = np.flatnonzero(np.r_[True, job_values[1:] != job_values[:-1]])
+        group_ends = np.r_[group_starts[1:], n_rows]
+
+        for start, end in zip(group_starts, group_ends):
+            # Todas as linhas da mesma vaga compartilham as frases da vaga
+            job_idx = job_idx_by_row.get(int(rows_by_pos[start]))
+            lo, hi = cand_offsets[start], cand_offsets[end]
+            if job_idx is None or lo == hi:
+                continue
+            local_vocab, flat_idx = np.unique(cand_idx[lo:hi], return_inverse=True)
+            group_scores = kernel(
+                embeddings[job_idx], embeddings[local_vocab], flat_idx,
+                cand_offsets[start:end + 1] - lo
+            )
+            scores[rows_by_pos[start:end]] = group_scores
+
+        return scores
+
+    def structured_score_expr(self, columns: Sequence[str]) -> pl.Expr:
+        """Versão em expressões Polars de SkillsScorer.calculate_structured_score (colunas ausentes contam como nível 0)."""
+        scorer = self.skills_scorer
+
+        def level(col: str) -> pl.Expr:
+            if col not in columns:
+                return pl.lit(0.0)
+            return (
+                pl.col(col).cast(pl.Utf8).fill_null("None").str.to_uppercase().str.strip_chars()
+                .replace(scorer.level_map, default=0.0).cast(pl.Float64)
+            )
+
+        total = pl.lit(0.0)
+        for key, weight in scorer.weights.items():
+            job_col, cand_col = STRUCTURED_LEVEL_COLS[key]
+            job_score, cand_score = level(job_col), level(cand_col)
+            similarity = (
+                pl.when(job_score == 0).then(1.0)
+                .when(cand_score == 0).then(0.0)
+                .otherwise(pl.min_horizontal(cand_score / job_score, pl.lit(1.0)))
+            )
+            total = total + similarity * weight
+        return total
+
+    def score_skills(self, df: pl.DataFrame, threshold: float = 0.5) -> pl.DataFrame:
+        """Adiciona `score_skills` (0.7 semântico + 0.3 estruturado, como SkillsScorer.get_total_score)."""
+        semantic = self._pairwise_scores(
+            df, JOB_SKILL_COLS, APP_SKILL_COLS, self.skills_scorer.encode,
+            kernel=lambda *args: self.skills_scorer.score_embeddings(*args, threshold=threshold),
+            empty_score=0.0,
+        )
+        return df.with_columns(
+            (0.7 * pl.lit(pl.Series(semantic, dtype=pl.Float64)) + 0.3 * self.structured_score_expr(df.columns))
+            .alias("score_skills")
+        )
+
+    def score_cultural(self, df: pl.DataFrame) -> pl.DataFrame:
+        """Adiciona `score_cultural` (média das melhores correspondências de soft skills)."""
+        scores = self._pairwise_scores(
+            df, JOB_CULTURE_COLS, APP_CULTURE_COLS, self.cultural_scorer.encode,
+            kernel=self.cultural_scorer.score_embeddings,
+            empty_score=0.5,
+        )
+        return df.with_columns(pl.Series("score_cultural", scores, dtype=pl.Float64))
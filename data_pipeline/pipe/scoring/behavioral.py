@@ -1,19 +1,38 @@
 import polars as pl
+import numpy as np
 import lightgbm as lgb
 import joblib
 import os
 import sys
 import re
+from pathlib import Path
 from typing import Optional
 
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
+
 # Add path to find pipe module if needed
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
-from data_pipeline.pipe.transform.curated_transform import normalize_dataframe
+from data_pipeline.pipe.scoring.behavioral_features import (
+    BehavioralFeaturePipeline, load_manifest, manifest_path, recruiter_expr
+)
+
+def compiled_model_path(model_path) -> Path:
+    """Treelite-compiled shared library exported next to the model (models/export_model.py --compile)."""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.so")
 
 class BehavioralScorer:
-    def __init__(self, model_path: str = "models/artifacts/behavioral_model.pkl"):
+    def __init__(self, model_path: str = "models/artifacts/behavioral_model.pkl", backend: Optional[str] = None):
         self.model_path = model_path
         self.model = None
+        self.booster = None
+        self.pipeline: Optional[BehavioralFeaturePipeline] = None
+        self.compiled = None
+        # BEHAVIORAL_BACKEND: lightgbm (default) | treelite (compiled trees, needs tl2cgen and an exported .so)
+        self.backend = (backend or os.getenv("BEHAVIORAL_BACKEND", "lightgbm")).lower()
         self._load_model()
         
         # Keywords for sentiment/behavioral features
@@ -32,30 +51,52 @@ class BehavioralScorer:
                 print(f"Failed to load model from {self.model_path}: {e}")
         else:
             print(f"Model not found at {self.model_path}. Using rules-based fallback (or mock).")
+        if self.model is None:
+            return
+
+        # The model is only used together with the frozen feature manifest exported alongside it
+        try:
+            manifest = load_manifest(manifest_path(self.model_path))
+        except Exception as e:
+            print(f"Invalid feature manifest for {self.model_path}: {e}")
+            manifest = None
+        self.booster = self.model.booster_ if hasattr(self.model, "booster_") else self.model
+        if manifest is None:
+            print(f"Feature manifest not found at {manifest_path(self.model_path)}. Using rules-based fallback.")
+        elif len(manifest["feature_names"]) != self.booster.num_feature():
+            print(f"Feature manifest has {len(manifest['feature_names'])} features but the model expects "
+                  f"{self.booster.num_feature()}. Using rules-based fallback.")
+        else:
+            self.pipeline = BehavioralFeaturePipeline(manifest)
+
+        if self.pipeline is not None and self.backend == "treelite":
+            lib_path = compiled_model_path(self.model_path)
+            if tl2cgen is not None and lib_path.exists():
+                self.compiled = tl2cgen.Predictor(str(lib_path))
+            else:
+                print(f"Compiled model not available ({lib_path}, tl2cgen installed: {tl2cgen is not None}). Using LightGBM.")
+
+    def predict_proba(self, df: pl.DataFrame) -> np.ndarray:
+        """Vectorized P(engajado) for a whole batch with the manifest feature pipeline."""
+        X = self.pipeline.transform(df)
+        if self.compiled is not None:
+            return np.asarray(self.compiled.predict(tl2cgen.DMatrix(X, dtype="float64"))).reshape(len(X), -1)[:, -1]
+        # Single rows skip the OpenMP thread pool, which dominates latency for tiny inputs
+        return self.booster.predict(X, num_threads=1 if len(X) == 1 else 0)
 
     def _feature_engineering(self, df: pl.DataFrame) -> pl.DataFrame:
         """
-        Applies specific feature engineering required for the behavioral model.
+        Rules-based features used by the heuristic fallback (no model/manifest).
         Assumes 'gerar_features' from pipe has already been run.
         """
         # Ensure regex columns exist
         if 'p_comentario' not in df.columns:
             df = df.with_columns(pl.lit("").alias("p_comentario"))
-            
-        # Apply normalization (clean string columns mainly)
-        # Assuming date columns list might be passed or inferred, for now empty or standard set
-        # This improves robustness against dirty input in API
-        try:
-           df = normalize_dataframe(df)
-        except Exception as e:
-           print(f"Normalization warning: {e}")
 
         df = df.with_columns(
             contem_palavra_chave_positiva=pl.col('p_comentario').str.contains(self.regex_palavras_positivas).fill_null(False).cast(pl.Int8),
             contem_palavra_chave_negativa=pl.col('p_comentario').str.contains(self.regex_palavras_negativas).fill_null(False).cast(pl.Int8),
-            p_recrutador_tratado=pl.when(pl.col("p_recrutador").is_in(self.common_recruiters))
-                                .then(pl.col("p_recrutador"))
-                                .otherwise(pl.lit("Outros"))
+            p_recrutador_tratado=recruiter_expr(self.common_recruiters)
         )
         
         df = df.with_columns(
@@ -67,27 +108,19 @@ class BehavioralScorer:
         return df
 
     def predict(self, df: pl.DataFrame) -> pl.DataFrame:
-        df_processed = self._feature_engineering(df)
-        
-        # If model is loaded, predict proba. If not, maybe use 'sentimento_comentario_score' scaled.
-        if self.model:
-            # We need to select the exact columns the model expects.
-            # Since we don't have the exact feature list validated, this part is risky.
-            # For now, we return a heuristic score if model prediction fails or is not robust.
+        if self.pipeline is not None:
             try:
-                # Mocking prediction for robustness in this draft
-                # In real prod, we would ensure columns match exactly model.booster_.feature_name()
-                pass
-            except:
-                pass
-        
-        # Heuristic Fallback (or if model is missing)
-        # Normalize score between 0 and 1 roughly
-        # 1 (postive) -> 0.8, 0 (neutral) -> 0.5, -1 (negative) -> 0.2
+                return df.select(["codigo_candidato", "codigo_vaga"]).with_columns(
+                    score_behavioral=pl.Series(self.predict_proba(df), dtype=pl.Float64)
+                )
+            except Exception as e:
+                print(f"Behavioral model inference failed, using heuristic: {e}")
+
+        # Heuristic Fallback (model or feature manifest missing)
+        # 1 (postive) -> 0.9, 0 (neutral) -> 0.5, -1 (negative) -> 0.2
+        df_processed = self._feature_engineering(df)
         return df_processed.with_columns(
             score_behavioral = pl.when(pl.col("sentimento_comentario_score") == 1).then(0.9)
                                .when(pl.col("sentimento_comentario_score") == -1).then(0.2)
-                               .otherwise(0.5) 
-                               # Add slight random noise or other factors
-                               # + (pl.col("dias_desde_ultima_atualizacao") < 30).cast(pl.Float32) * 0.1
+                               .otherwise(0.5)
         ).select(["codigo_candidato", "codigo_vaga", "score_behavioral"])
@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import polars as pl
+
+MANIFEST_VERSION = 1
+OTHER_RECRUITER = "Outros"
+MIN_RECRUITER_COUNT = 10
+
+
+def recruiter_expr(known: Optional[Sequence[str]] = None) -> pl.Expr:
+    """
+    p_recrutador as the model sees it, shared by training and serving: trimmed, with nulls
+    and recruiters outside `known` grouped into "Outros".
+    """
+    recruiter = pl.col("p_recrutador").str.strip_chars()
+    if known is None:
+        return recruiter.fill_null(pl.lit(OTHER_RECRUITER))
+    return pl.when(recruiter.is_in(list(known))).then(recruiter).otherwise(pl.lit(OTHER_RECRUITER))
+
+
+def group_recruiters(df: pl.DataFrame, min_count: int = MIN_RECRUITER_COUNT) -> pl.DataFrame:
+    """Training-time p_recrutador_tratado: recruiters with fewer than `min_count` rows become "Outros"."""
+    counts = df.group_by(recruiter_expr().alias("recruiter")).agg(pl.count().alias("n"))
+    common = counts.filter(pl.col("n") >= min_count)["recruiter"].to_list()
+    return df.with_columns(recruiter_expr(common).alias("p_recrutador_tratado"))
+
+
+def manifest_path(model_path) -> Path:
+    """Feature manifest lives next to the model: behavioral_model.pkl -> behavioral_model.features.json"""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.features.json")
+
+
+def build_manifest(preprocessor, features_num: Sequence[str], features_cat: Sequence[str],
+                   profile_columns: Sequence[str], regex_positive: str, regex_negative: str) -> Dict[str, Any]:
+    """
+    Freezes the fitted ColumnTransformer (StandardScaler + OneHotEncoder) used at training time
+    into a JSON-serializable manifest, so serving can rebuild exactly the same feature matrix
+    without pickling sklearn objects or re-running the training feature engineering.
+    """
+    scaler = preprocessor.named_transformers_["num"]
+    encoder = preprocessor.named_transformers_["cat"]
+    numeric = [
+        {"name": name, "mean": float(mean), "scale": float(scale)}
+        for name, mean, scale in zip(features_num, scaler.mean_, scaler.scale_)
+    ]
+    categorical = [
+        {"name": name, "categories": [str(c) for c in categories]}
+        for name, categories in zip(features_cat, encoder.categories_)
+    ]
+    feature_names = [f["name"] for f in numeric] + [
+        f"{f['name']}={c}" for f in categorical for c in f["categories"]
+    ]
+    return {
+        "version": MANIFEST_VERSION,
+        "numeric": numeric,
+        "categorical": categorical,
+        "profile_columns": list(profile_columns),
+        "regex_positive": regex_positive,
+        "regex_negative": regex_negative,
+        "feature_names": feature_names,
+    }
+
+
+def save_manifest(manifest: Dict[str, Any], path: Path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def load_manifest(path: Path) -> Optional[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open(encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported feature manifest version {manifest.get('version')} in {path}")
+    return manifest
+
+
+class BehavioralFeaturePipeline:
+    """
+    Polars expression pipeline compiled once from the feature manifest.
+
+    `transform` selects the model's feature matrix (numeric features scaled, categoricals
+    one-hot encoded, in manifest order) from a raw batch in a single lazy `select`.
+    Source columns absent from the batch are treated as nulls, like unseen values at training time.
+    """
+
+    def __init__(self, manifest: Dict[str, Any]):
+        self.manifest = manifest
+        self.feature_names: List[str] = manifest["feature_names"]
+        self.source_columns: Dict[str, pl.PolarsDataType] = {
+            "p_comentario": pl.Utf8,
+            "p_recrutador": pl.Utf8,
+            "app_cv_pt": pl.Utf8,
+            **{col: pl.Utf8 for col in manifest["profile_columns"]},
+        }
+        self.expressions = self._compile()
+
+    def _derived(self) -> Dict[str, pl.Expr]:
+        """Training-time features (models/experiments/run_behavioral_baseline.py) as expressions."""
+        profile_columns = self.manifest["profile_columns"]
+        if profile_columns:
+            completeness = pl.sum_horizontal(
+                [pl.col(c).is_not_null().cast(pl.Float64) for c in profile_columns]
+            ) / len(profile_columns)
+        else:
+            completeness = pl.lit(0.0)
+
+        comentario = pl.col("p_comentario")
+        positive = comentario.str.contains(self.manifest["regex_positive"]).fill_null(False)
+        negative = comentario.str.contains(self.manifest["regex_negative"]).fill_null(False)
+
+        known = next((f["categories"] for f in self.manifest["categorical"] if f["name"] == "p_recrutador_tratado"), [])
+
+        return {
+            "percentual_perfil_completo": completeness,
+            "tamanho_cv": pl.col("app_cv_pt").str.len_chars().fill_null(0),
+            "sentimento_comentario_score": pl.when(positive).then(1).when(negative).then(-1).otherwise(0),
+            "p_recrutador_tratado": recruiter_expr(known),
+        }
+
+    def _compile(self) -> List[pl.Expr]:
+        derived = self._derived()
+        expressions = []
+        for feature in self.manifest["numeric"]:
+            source = derived.get(feature["name"], pl.col(feature["name"]))
+            scale = feature["scale"] or 1.0
+            expressions.append(((source.cast(pl.Float64) - feature["mean"]) / scale).alias(feature["name"]))
+        for feature in self.manifest["categorical"]:
+            source = derived.get(feature["name"], pl.col(feature["name"]))
+            for category in feature["categories"]:
+                expressions.append(
+                    (source == category).fill_null(False).cast(pl.Float64).alias(f"{feature['name']}={category}")
+                )
+        return expressions
+
+    def transform(self, df: pl.DataFrame) -> np.ndarray:
+        missing = [pl.lit(None, dtype).alias(col) for col, dtype in self.source_columns.items() if col not in df.columns]
+        return df.lazy().with_columns(missing).select(self.expressions).collect().to_numpy()
@@ -1,67 +1,92 @@
-from sentence_transformers import SentenceTransformer, util
 import polars as pl
-from typing import List
+from typing import Awaitable, Callable, List, Optional
 import numpy as np
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from data_pipeline.pipe.scoring.similarity import Segments, prepare_segments, segmented_max_similarity
+from data_pipeline.pipe.scoring.embedding_store import EmbeddingStore, get_embedding_store
+from data_pipeline.pipe.scoring.model_registry import CULTURAL_MODEL, get_model_registry
 
 class CulturalScorer:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        # Reuse the same model instance if possible in main pipeline to save RAM
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = CULTURAL_MODEL, embedding_store: Optional[EmbeddingStore] = None, model=None):
+        self.model_name = model_name
+        self.embedding_store = embedding_store or get_embedding_store()
+        # Instâncias compartilhadas via ModelRegistry (um modelo por nome e por processo), carregadas sob demanda
+        self._model = model
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_model_registry().get(self.model_name)
+        return self._model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embeddings normalizados (produto interno == similaridade de cosseno), via embedding store quando ativo."""
+        if self.embedding_store is not None:
+            # Backends alternativos (ONNX int8) usam chave própria no store
+            return self.embedding_store.encode(self.model, getattr(self.model, "store_key", self.model_name), texts)
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
 
     def calculate_score(self, job_culture: List[str], cand_culture: List[str]) -> float:
-        if not job_culture or not cand_culture:
-            return 0.5 # Neutral if unknown
-            
+        return float(self.calculate_scores(job_culture, [cand_culture])[0])
+
+    def calculate_scores(self, job_culture: List[str], candidates_culture: List[List[str]],
+                         job_emb: Optional[np.ndarray] = None,
+                         candidate_segments: Optional[Segments] = None) -> np.ndarray:
+        """
+        Score cultural de uma vaga contra vários candidatos, com um único encode por lote.
+        `job_emb` (ex: índice de vagas) evita codificar as soft skills da vaga e `candidate_segments`
+        (ex: ProfileIndex.segments do índice de candidatos) evita codificar as dos candidatos.
+        """
         # Filter empty
-        job_culture = [x for x in job_culture if x]
-        cand_culture = [x for x in cand_culture if x]
-        
-        if not job_culture or not cand_culture:
-            return 0.5
+        job_culture, vocab, vocab_emb, flat_idx, offsets = prepare_segments(job_culture, candidates_culture, candidate_segments)
+        if not job_culture or len(flat_idx) == 0:
+            return np.full(len(offsets) - 1, 0.5, dtype=np.float32)  # Neutral if unknown
 
-        # Embedding similarity
-        job_emb = self.model.encode(job_culture, convert_to_tensor=True)
-        cand_emb = self.model.encode(cand_culture, convert_to_tensor=True)
-        
-        sim_matrix = util.cos_sim(job_emb, cand_emb).cpu().numpy()
-        
-        # Average of best matches
-        mean_score = np.mean(np.max(sim_matrix, axis=1))
-        return float(mean_score)
+        if job_emb is None:
+            job_emb = self.encode(job_culture)
+        if vocab_emb is None:
+            vocab_emb = self.encode(vocab)
+        return self.score_embeddings(job_emb, vocab_emb, flat_idx, offsets)
+
+    async def acalculate_scores(self, job_culture: List[str], candidates_culture: List[List[str]],
+                                encode: Callable[[List[str]], Awaitable[np.ndarray]],
+                                job_emb: Optional[np.ndarray] = None,
+                                candidate_segments: Optional[Segments] = None) -> np.ndarray:
+        """
+        Versão assíncrona de calculate_scores com encoder externo (ex: EncoderBatcher da API).
+        """
+        job_culture, vocab, vocab_emb, flat_idx, offsets = prepare_segments(job_culture, candidates_culture, candidate_segments)
+        if not job_culture or len(flat_idx) == 0:
+            return np.full(len(offsets) - 1, 0.5, dtype=np.float32)  # Neutral if unknown
+
+        if job_emb is None and vocab_emb is None:
+            job_emb, vocab_emb = await asyncio.gather(encode(job_culture), encode(vocab))
+        elif job_emb is None:
+            job_emb = await encode(job_culture)
+        elif vocab_emb is None:
+            vocab_emb = await encode(vocab)
+        return self.score_embeddings(job_emb, vocab_emb, flat_idx, offsets)
+
+    @staticmethod
+    def score_embeddings(job_emb: np.ndarray, vocab_emb: np.ndarray, flat_idx: np.ndarray,
+                         offsets: np.ndarray) -> np.ndarray:
+        # Average of best matches (neutral 0.5 for candidates without soft skills)
+        best_matches = segmented_max_similarity(job_emb, vocab_emb, flat_idx, offsets)
+        mean_scores = best_matches.mean(axis=1)
+        return np.where(np.isnan(mean_scores), 0.5, mean_scores)
 
     def process_dataframe(self, df: pl.DataFrame) -> pl.DataFrame:
         """
-        Batched processing for cultural score.
+        Batched processing for cultural score (vectorized via BatchScoringEngine).
         """
-        # We need to extract lists from text/list columns
-        # Assuming struct or list columns: 'job_pv_habilidades_comportamentais_necessarias' vs 'app_competencias_comportamentais'
-        
-        scores = []
-        
-        # It's better to iterate or use map_elements.
-        # Use map_elements for simplicity in Polars
-        # Note: This is slow for large DF. Vectorized embedding is better but requires flattening.
-        
-        rows = df.select([
-            "codigo_candidato", 
-            "codigo_vaga", 
-            "job_competencias_comportamentais", 
-            "app_competencias_comportamentais"
-        ]).to_dicts()
-        
-        for row in rows:
-            j_comp = row.get("job_competencias_comportamentais", [])
-            c_comp = row.get("app_competencias_comportamentais", [])
-            
-            # Ensure they are lists
-            if isinstance(j_comp, str): j_comp = [j_comp]
-            if isinstance(c_comp, str): c_comp = [c_comp]
-            if j_comp is None: j_comp = []
-            if c_comp is None: c_comp = []
-            
-            score = self.calculate_score(j_comp, c_comp)
-            scores.append(score)
-            
-        return df.with_columns(
-            pl.Series("score_cultural", scores)
-        ).select(["codigo_candidato", "codigo_vaga", "score_cultural"])
+        from data_pipeline.pipe.scoring.batch_engine import BatchScoringEngine
+
+        return (
+            BatchScoringEngine(cultural_scorer=self)
+            .score_cultural(df)
+            .select(["codigo_candidato", "codigo_vaga", "score_cultural"])
+        )
@@ -0,0 +1,243 @@
+import atexit
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Chave canônica de uma frase: Unicode NFC, espaços colapsados. Preserva caixa (modelos cased)."""
+    return " ".join(unicodedata.normalize("NFC", str(phrase)).split())
+
+
+def _model_slug(model_name: str) -> str:
+    return re.sub(r"[^\w.-]", "_", model_name)
+
+
+class _DiskTier:
+    """
+    Camada persistente de um modelo: matriz `.npy` memory-mapped + índice frase -> linha.
+
+    O arquivo de vetores é pré-alocado com folga (capacidade > linhas usadas) para permitir
+    append in-place; o índice (`index.json`) é trocado atomicamente e indica quantas linhas são válidas.
+    Escritas são serializadas entre processos (workers do uvicorn) via flock.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.index_path = directory / "index.json"
+        self.lock_path = directory / ".lock"
+        self.rows: Dict[str, int] = {}
+        self.vectors: Optional[np.ndarray] = None
+        self._index_mtime = None
+
+    def refresh(self):
+        """Recarrega índice e mmap se outro processo publicou novas linhas."""
+        for _ in range(3):
+            try:
+                mtime = self.index_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self._index_mtime:
+                return
+            index = self._read_index()
+            try:
+                vectors = np.load(self.directory / index["file"], mmap_mode="r")
+            except FileNotFoundError:
+                # Um writer trocou a matriz entre a leitura do índice e o mmap: relê o índice novo
+                continue
+            self.vectors = vectors
+            self.rows = {phrase: i for i, phrase in enumerate(index["phrases"])}
+            self._index_mtime = mtime
+            return
+        # Sem sucesso: segue com o mmap anterior (continua válido) e tenta de novo no próximo lote
+
+    def lookup(self, phrase: str) -> Optional[np.ndarray]:
+        row = self.rows.get(phrase)
+        if row is None:
+            return None
+        return np.array(self.vectors[row])
+
+    def append(self, new_vectors: Dict[str, np.ndarray]):
+        if not new_vectors:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._append_locked(new_vectors)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        self.refresh()
+
+    def _read_index(self) -> dict:
+        with self.index_path.open(encoding="utf-8") as f:
+            return json.load(f)
+
+    def _append_locked(self, new_vectors: Dict[str, np.ndarray]):
+        index = self._read_index() if self.index_path.exists() else {"file": None, "generation": 0, "phrases": []}
+        known = set(index["phrases"])
+        pending = [p for p in new_vectors if p not in known]
+        if not pending:
+            return
+
+        dim = len(next(iter(new_vectors.values())))
+        n_used, n_total = len(index["phrases"]), len(index["phrases"]) + len(pending)
+        current = np.load(self.directory / index["file"], mmap_mode="r+") if index["file"] else None
+
+        if current is None or current.shape[0] < n_total:
+            # Cresce (dobrando a capacidade) em um novo arquivo; leitores antigos seguem com o mmap anterior
+            capacity = max(1024, 2 * n_total)
+            generation = index["generation"] + 1
+            file_name = f"vectors-{generation:05d}.npy"
+            grown = np.lib.format.open_memmap(self.directory / file_name, mode="w+", dtype=np.float32, shape=(capacity, dim))
+            if current is not None:
+                grown[:n_used] = current[:n_used]
+            old_file, current = index["file"], grown
+            index.update(file=file_name, generation=generation)
+        else:
+            old_file = None
+
+        current[n_used:n_total] = np.stack([new_vectors[p] for p in pending])
+        current.flush()
+
+        index["phrases"] = index["phrases"] + pending
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+        if old_file:
+            (self.directory / old_file).unlink(missing_ok=True)
+
+
+class EmbeddingStore:
+    """
+    Cache de embeddings de frases curtas (skills, soft skills) chaveado por (modelo, frase normalizada).
+
+    Camadas:
+        1. LRU em memória (por processo)
+        2. Matriz `.npy` memory-mapped em disco, compartilhada entre processos e reinícios
+
+    Os vetores são sempre armazenados normalizados (produto interno == cosseno).
+    """
+
+    def __init__(self, root: Optional[Path] = None, lru_size: int = 50_000, flush_every: int = 32, persist: bool = True):
+        self.root = Path(root or os.getenv("EMBEDDING_STORE_DIR", "data/embeddings"))
+        self.lru_size = lru_size
+        self.flush_every = flush_every
+        self.persist = persist
+        self._lru: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._disk: Dict[str, _DiskTier] = {}
+        self._pending: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _disk_tier(self, model_name: str) -> _DiskTier:
+        if model_name not in self._disk:
+            self._disk[model_name] = _DiskTier(self.root / _model_slug(model_name))
+        return self._disk[model_name]
+
+    def _remember(self, key: tuple, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def encode(self, model, model_name: str, phrases: List[str]) -> np.ndarray:
+        """
+        Retorna os embeddings (normalizados) das frases, chamando `model.encode` apenas para as ausentes do cache.
+        """
+        keys = [normalize_phrase(p) for p in phrases]
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+
+        with self._lock:
+            disk = self._disk_tier(model_name) if self.persist else None
+            refreshed = False
+            for key in dict.fromkeys(keys):
+                vector = self._lru.get((model_name, key))
+                if vector is not None:
+                    self._lru.move_to_end((model_name, key))
+                    self.counters["memory_hits"] += 1
+                    found[key] = vector
+                    continue
+                if disk is not None:
+                    if not refreshed:
+                        # Um stat (e no máximo um reload) por lote, só se alguma frase não estiver no LRU
+                        disk.refresh()
+                        refreshed = True
+                    vector = disk.lookup(key)
+                if vector is not None:
+                    self.counters["disk_hits"] += 1
+                    self._remember((model_name, key), vector)
+                    found[key] = vector
+                else:
+                    self.counters["misses"] += 1
+                    missing.append(key)
+
+        if missing:
+            encoded = model.encode(missing, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+            with self._lock:
+                for key, vector in zip(missing, encoded):
+                    self._remember((model_name, key), vector)
+                    found[key] = vector
+                if self.persist:
+                    self._pending.setdefault(model_name, {}).update(zip(missing, encoded))
+                    if sum(len(p) for p in self._pending.values()) >= self.flush_every:
+                        self._flush_locked()
+
+        if not keys:
+            return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def flush(self):
+        """Persiste no disco os embeddings calculados desde o último flush."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        for model_name, vectors in self._pending.items():
+            try:
+                self._disk_tier(model_name).append(vectors)
+            except OSError as e:
+                print(f"Embedding store flush failed for {model_name}: {e}")
+        self._pending = {}
+
+    def stats(self) -> dict:
+        lookups = sum(self.counters.values())
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        return {
+            **self.counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "lru_entries": len(self._lru),
+        }
+
+
+_default_store: Optional[EmbeddingStore] = None
+
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """
+    Store compartilhado do processo. Desative com EMBEDDING_STORE_ENABLED=false.
+    """
+    global _default_store
+    if os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() != "true":
+        return None
+    if _default_store is None:
+        _default_store = EmbeddingStore()
+        atexit.register(_default_store.flush)
+    return _default_store
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from data_pipeline.pipe.scoring.embedding_store import _model_slug
+
+ENCODER_CONFIG = "encoder_config.json"
+
+# Frases usadas na checagem de paridade entre backends
+PARITY_PHRASES = [
+    "Python", "SQL", "Docker", "Kubernetes", "AWS", "Power BI", "Java", "Spring Boot",
+    "Gestão de projetos", "Metodologias ágeis", "Comunicação", "Trabalho em equipe",
+    "Liderança", "Proatividade", "Pensamento analítico", "Resolução de problemas",
+    "Machine Learning", "Engenharia de dados", "SAP ABAP", "Inglês avançado",
+]
+
+
+def onnx_model_dir(model_name: str, root: Optional[Path] = None) -> Path:
+    return Path(root or os.getenv("ENCODER_ONNX_DIR", "models/onnx")) / _model_slug(model_name)
+
+
+class OnnxSentenceEncoder:
+    """
+    Encoder exportado para ONNX (opcionalmente quantizado int8) executado no onnxruntime.
+
+    Mesma interface usada pelos scorers/embedding store que o SentenceTransformer:
+    `encode(texts, convert_to_numpy=True, normalize_embeddings=True)` e
+    `get_sentence_embedding_dimension()`.
+    """
+
+    def __init__(self, model_dir: Path, intra_op_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_dir = Path(model_dir)
+        with (self.model_dir / ENCODER_CONFIG).open(encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.model_name = self.config["model_name"]
+        self.max_seq_length = self.config["max_seq_length"]
+        # Vetores int8 diferem levemente dos do torch: chave própria no embedding store
+        self.store_key = f"{self.model_name}@onnx-{self.config['quantization']}"
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads or int(os.getenv("ENCODER_ONNX_THREADS", "0"))
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(self.model_dir / self.config["file"]), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        texts = list(texts)
+        output = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Ordena por tamanho para reduzir padding dentro de cada lote
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            tokens = self.tokenizer(
+                [texts[i] for i in idx], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            feed = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+            output[idx] = self._pool(hidden, tokens["attention_mask"])
+
+        if normalize_embeddings:
+            output /= np.clip(np.linalg.norm(output, axis=1, keepdims=True), 1e-12, None)
+        return output
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.config["pooling"] == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def export_onnx(model_name: str, output_dir: Optional[Path] = None, quantize: bool = True, opset: int = 14) -> Path:
+    """
+    Exporta o transformer de um SentenceTransformer para ONNX (+ quantização dinâmica int8).
+    Requer torch/sentence_transformers (apenas no build; o serving precisa só do onnxruntime).
+    """
+    import inspect
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir or onnx_model_dir(model_name))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = st_model[0], st_model[1]
+    pooling_config = pooling.get_config_dict()
+    if pooling_config.get("pooling_mode_cls_token"):
+        pooling_mode = "cls"
+    elif pooling_config.get("pooling_mode_mean_tokens"):
+        pooling_mode = "mean"
+    else:
+        raise ValueError(f"Pooling não suportado para {model_name}: {pooling_config}")
+
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["exemplo de frase", "python"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)))[0]
+
+    fp32_path = output_dir / "model.onnx"
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names},
+                          "last_hidden_state": {0: "batch", 1: "sequence"}},
+            opset_version=opset,
+            **export_kwargs,
+        )
+
+    model_file = fp32_path.name
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_path), str(output_dir / "model.int8.onnx"), weight_type=QuantType.QInt8)
+        fp32_path.unlink()
+        model_file = "model.int8.onnx"
+
+    tokenizer.save_pretrained(output_dir)
+    with (output_dir / ENCODER_CONFIG).open("w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "file": model_file,
+            "pooling": pooling_mode,
+            "max_seq_length": st_model.max_seq_length,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+            "quantization": "int8" if quantize else "fp32",
+        }, f, indent=2)
+    return output_dir
+
+
+def parity_check(reference, candidate, phrases: Optional[List[str]] = None, tolerance: float = 0.05) -> float:
+    """
+    Compara as matrizes de similaridade de cosseno de dois encoders sobre as mesmas frases.
+    Retorna o maior desvio absoluto; levanta AssertionError acima da tolerância.
+    """
+    phrases = phrases or PARITY_PHRASES
+    ref = reference.encode(phrases, convert_to_numpy=True, normalize_embeddings=True)
+    cand = candidate.encode(phrases, convert_to_numpy=True, normalize_embeddings=True)
+    deviation = float(np.abs(ref @ ref.T - cand @ cand.T).max())
+    if deviation > tolerance:
+        raise AssertionError(f"Desvio de cosseno {deviation:.4f} acima da tolerância {tolerance}")
+    return deviation
+
+
+def load_encoder(model_name: str):
+    """
+    Backend escolhido por ENCODER_BACKEND (torch | onnx). Sem exportação ONNX disponível, cai no torch.
+    """
+    if os.getenv("ENCODER_BACKEND", "torch").lower() == "onnx":
+        model_dir = onnx_model_dir(model_name)
+        if (model_dir / ENCODER_CONFIG).exists():
+            return OnnxSentenceEncoder(model_dir)
+        print(f"[Encoders] ONNX export not found at {model_dir}; using torch for {model_name}")
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta encoders para ONNX (int8) e valida a paridade com o torch.")
+    parser.add_argument("models", nargs="+", help="Nomes dos modelos SentenceTransformer")
+    parser.add_argument("--output-root", type=Path, default=None, help="Diretório raiz (default: ENCODER_ONNX_DIR ou models/onnx)")
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    for name in args.models:
+        out = export_onnx(name, onnx_model_dir(name, args.output_root), quantize=not args.no_quantize)
+        deviation = parity_check(SentenceTransformer(name, device="cpu"), OnnxSentenceEncoder(out), tolerance=args.tolerance)
+        print(f"{name} → {out} (desvio máximo de cosseno: {deviation:.4f})")
@@ -0,0 +1,89 @@
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+SKILLS_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+CULTURAL_MODEL = "all-MiniLM-L6-v2"
+
+
+def shared_model_name() -> Optional[str]:
+    """
+    SCORING_SHARED_MODEL=<modelo> faz skills e cultural usarem a mesma instância
+    (ex: o multilíngue), economizando um modelo por worker.
+    """
+    return os.getenv("SCORING_SHARED_MODEL") or None
+
+
+class ModelRegistry:
+    """
+    Carrega cada encoder distinto uma única vez por processo (thread-safe).
+
+    `sentence_transformers`/torch só são importados no primeiro carregamento, o que mantém
+    o import dos scorers (e da API) barato. `warm_up` permite carregar em background.
+    O backend (torch ou ONNX) vem de ENCODER_BACKEND, ver encoders.load_encoder.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, object] = {}
+        self._status: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, model_name: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(model_name, threading.Lock())
+
+    def register(self, model_name: str, model):
+        """Registra uma instância já carregada (ex: testes ou backends alternativos)."""
+        with self._lock_for(model_name):
+            self._models[model_name] = model
+            self._status[model_name] = "loaded"
+
+    def get(self, model_name: str):
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        with self._lock_for(model_name):
+            if model_name not in self._models:
+                self._status[model_name] = "loading"
+                try:
+                    from data_pipeline.pipe.scoring.encoders import load_encoder
+                    self._models[model_name] = load_encoder(model_name)
+                except Exception:
+                    self._status[model_name] = "failed"
+                    raise
+                self._status[model_name] = "loaded"
+            return self._models[model_name]
+
+    def warm_up(self, model_names: Iterable[str], background: bool = False) -> Optional[threading.Thread]:
+        model_names = list(dict.fromkeys(model_names))
+        for name in model_names:
+            self._status.setdefault(name, "pending")
+
+        def load_all():
+            for name in model_names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"[ModelRegistry] Failed to load {name}: {e}")
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self, model_names: Iterable[str]) -> bool:
+        return all(name in self._models for name in model_names)
+
+    def status(self) -> Dict[str, str]:
+        return dict(self._status)
+
+
+_default_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _default_registry
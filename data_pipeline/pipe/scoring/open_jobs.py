@@ -0,0 +1,73 @@
+import os
+import sys
+from datetime import date
+from typing import List, Tuple
+
+import polars as pl
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from data_pipeline.pipe.scoring.ann_index import build_vector_index, pooled_vectors
+from data_pipeline.pipe.utils.logger import get_logger
+
+logger = get_logger("open_jobs")
+
+# Coluna do índice de vagas com a data de encerramento (ib_data_final da camada curated)
+DATA_FINAL_COLUMN = "data_final"
+
+
+def data_referencia() -> date:
+    """Data de corte para "vaga em aberto": OPEN_JOBS_REFERENCE_DATE (YYYY-MM-DD) ou hoje."""
+    valor = os.getenv("OPEN_JOBS_REFERENCE_DATE")
+    return date.fromisoformat(valor) if valor else date.today()
+
+
+def expr_vaga_em_aberto(col: pl.Expr, referencia: date) -> pl.Expr:
+    """
+    Mesma regra de `vaga_em_aberto_no_momento` (gerar_features_temporais): data final posterior
+    à referência. Aqui, vagas sem data final são consideradas abertas.
+    """
+    return col.is_null() | (col > pl.lit(referencia))
+
+
+def open_job_ids(job_index, referencia: date) -> List[str]:
+    table = job_index.table
+    dtype = table.schema.get(DATA_FINAL_COLUMN)
+    if dtype is None or dtype == pl.Null:
+        logger.warning(f"[OPEN JOBS] Índice de vagas sem '{DATA_FINAL_COLUMN}'; todas as vagas consideradas abertas")
+        return table["id"].to_list()
+
+    col = pl.col(DATA_FINAL_COLUMN)
+    if dtype == pl.Utf8:
+        col = col.str.strptime(pl.Date, "%Y-%m-%d", strict=False)
+    elif dtype == pl.Datetime:
+        col = col.dt.date()
+    return table.filter(expr_vaga_em_aberto(col, referencia))["id"].to_list()
+
+
+def sync_open_jobs(ann, job_index, referencia: date, pooling: str = "mean",
+                   rebuild_vectors: bool = False) -> Tuple[object, int, int]:
+    """
+    Atualiza incrementalmente o índice vetorial de vagas abertas: remove as encerradas
+    (ou ausentes do índice de vagas) e insere as novas. Com `rebuild_vectors` (índice de
+    vagas regerado), os vetores de todas as vagas abertas são substituídos.
+
+    Retorna (índice, inseridas, removidas). Cria o índice se `ann` for None.
+    """
+    abertas = set(open_job_ids(job_index, referencia))
+    ids, vectors = pooled_vectors(job_index, "skills", pooling)
+    # Vagas sem skills técnicas não têm vetor e não entram no índice
+    rows = [i for i, job_id in enumerate(ids) if job_id in abertas]
+    open_ids = [ids[i] for i in rows]
+
+    if ann is None:
+        if not open_ids:
+            return None, 0, 0
+        return build_vector_index(open_ids, vectors[rows]), len(open_ids), 0
+
+    atuais = set(ann.item_ids())
+    removidas = atuais - set(open_ids)
+    ann.remove(removidas)
+    novas = [i for i in rows if rebuild_vectors or ids[i] not in atuais]
+    if novas:
+        ann.add([ids[i] for i in novas], vectors[novas])
+    return ann, len(novas), len(removidas)
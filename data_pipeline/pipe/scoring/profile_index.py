@@ -0,0 +1,192 @@
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import polars as pl
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from data_pipeline.pipe.utils.logger import get_logger
+
+logger = get_logger("profile_index")
+
+META_FILE = "meta.json"
+TABLE_FILE = "profiles.arrow"
+
+# campo do índice -> (chaves do perfil extraído pelo LLM, scorer que codifica o campo)
+PHRASE_FIELDS = {
+    "skills": (("competencias_tecnicas", "ferramentas_tecnologicas"), "skills"),
+    "soft_skills": (("competencias_comportamentais",), "cultural"),
+}
+LEVEL_FIELDS = ["senioridade_aparente", "nivel_formacao", "experiencia_anos"]
+
+
+def extracted_phrases(dados: Dict[str, Any], keys: Sequence[str]) -> List[str]:
+    """Frases não vazias das listas extraídas pelo LLM, na ordem das chaves."""
+    phrases = []
+    for key in keys:
+        value = dados.get(key) or []
+        if isinstance(value, str):
+            value = [value]
+        phrases.extend(str(p) for p in value if p)
+    return phrases
+
+
+class ProfileIndex:
+    """
+    Índice de perfis pré-processados (vagas ou candidatos) para lookup O(1) no serving.
+
+    Layout do diretório:
+        meta.json                 chave, modelos usados nos embeddings, data de build
+        profiles.arrow            tabela colunar (Arrow IPC, memory-mapped): id, listas de frases, níveis, extras
+        <campo>_vocab.npy         embeddings normalizados das frases distintas do campo (memory-mapped)
+        <campo>_idx.npy           índice no vocab de cada frase, perfis concatenados
+        <campo>_offsets.npy       limites de cada perfil em <campo>_idx (len = n + 1)
+
+    O mapa id -> linha fica em um dict, e os embeddings de um perfil são uma fatia do mmap.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with (self.directory / META_FILE).open(encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.table = pl.read_ipc(self.directory / TABLE_FILE, memory_map=True)
+        self.row_of = {profile_id: i for i, profile_id in enumerate(self.table["id"].to_list())}
+        self._segments = {
+            field: tuple(np.load(self.directory / f"{field}_{part}.npy", mmap_mode="r")
+                         for part in ("vocab", "idx", "offsets"))
+            for field in PHRASE_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def __contains__(self, profile_id) -> bool:
+        return profile_id in self.row_of
+
+    @property
+    def models(self) -> Dict[str, str]:
+        return self.meta["models"]
+
+    def compatible_with(self, skills_model: str, cultural_model: str) -> bool:
+        return self.models == {"skills": skills_model, "cultural": cultural_model}
+
+    def profile(self, profile_id) -> Optional[Dict[str, Any]]:
+        row = self.row_of.get(profile_id)
+        if row is None:
+            return None
+        return self.table.row(row, named=True)
+
+    def embeddings(self, field: str, profile_id) -> Optional[np.ndarray]:
+        """Matriz (n_frases, dim) do campo, na ordem de `profile[field]`."""
+        row = self.row_of.get(profile_id)
+        if row is None:
+            return None
+        vocab, idx, offsets = self._segments[field]
+        return np.asarray(vocab[idx[offsets[row]:offsets[row + 1]]])
+
+    def segment_arrays(self, field: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(vocab, idx, offsets) memory-mapped do campo, para todas as linhas."""
+        return self._segments[field]
+
+    def segments(self, field: str, rows: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (vocab_emb, flat_idx, offsets) de várias linhas, no formato de score_embeddings,
+        com vocabulário local (apenas as frases dessas linhas).
+        """
+        vocab, idx, offsets = self._segments[field]
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, ends = offsets[rows], offsets[rows + 1]
+        lengths = ends - starts
+        gathered = np.concatenate([idx[s:e] for s, e in zip(starts, ends)]) if len(rows) else np.zeros(0, np.int64)
+        local_vocab, flat_idx = np.unique(gathered, return_inverse=True)
+        local_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        return np.asarray(vocab[local_vocab]), flat_idx.astype(np.int64), local_offsets
+
+    @staticmethod
+    def build(directory: Path, records: Iterable[Dict[str, Any]], skills_scorer, cultural_scorer,
+              encode_batch_size: int = 4096) -> "ProfileIndex":
+        """
+        Constrói o índice a partir de registros {"id", "dados" (perfil extraído pelo LLM), ...extras}.
+        Escreve em um diretório temporário e troca no final: leitores nunca veem um índice parcial.
+        """
+        directory = Path(directory)
+        rows = []
+        for record in records:
+            dados = record.get("dados") or {}
+            row = {k: v for k, v in record.items() if k != "dados"}
+            row["id"] = str(record["id"])
+            for field, (keys, _) in PHRASE_FIELDS.items():
+                row[field] = extracted_phrases(dados, keys)
+            for level in LEVEL_FIELDS:
+                row[level] = str(dados.get(level) or "")
+            rows.append(row)
+
+        # Último registro de cada id prevalece
+        rows = list({row["id"]: row for row in rows}.values())
+        phrase_schema = {f: pl.List(pl.Utf8) for f in PHRASE_FIELDS}
+        if rows:
+            table = pl.DataFrame(rows, schema_overrides=phrase_schema, infer_schema_length=None)
+        else:
+            table = pl.DataFrame(schema={"id": pl.Utf8, **phrase_schema, **{level: pl.Utf8 for level in LEVEL_FIELDS}})
+
+        tmp_dir = directory.with_name(f".{directory.name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        scorers = {"skills": skills_scorer, "cultural": cultural_scorer}
+        for field, (_, scorer_key) in PHRASE_FIELDS.items():
+            groups = table[field].to_list()
+            positions: Dict[str, int] = {}
+            flat_idx = [positions.setdefault(p, len(positions)) for group in groups for p in group]
+            offsets = np.concatenate([[0], np.cumsum([len(g) for g in groups])]).astype(np.int64)
+
+            vocab = list(positions)
+            encode = scorers[scorer_key].encode
+            if vocab:
+                vectors = np.vstack([encode(vocab[i:i + encode_batch_size])
+                                     for i in range(0, len(vocab), encode_batch_size)]).astype(np.float32)
+            else:
+                vectors = np.zeros((0, 0), dtype=np.float32)
+            logger.info(f"[PROFILE INDEX] {field}: {len(vocab)} frases distintas em {len(groups)} perfis")
+
+            np.save(tmp_dir / f"{field}_vocab.npy", vectors)
+            np.save(tmp_dir / f"{field}_idx.npy", np.asarray(flat_idx, dtype=np.int64))
+            np.save(tmp_dir / f"{field}_offsets.npy", offsets)
+
+        table.write_ipc(tmp_dir / TABLE_FILE)
+        with (tmp_dir / META_FILE).open("w", encoding="utf-8") as f:
+            json.dump({
+                "count": len(table),
+                "models": {"skills": skills_scorer.model_name, "cultural": cultural_scorer.model_name},
+                "built_at": datetime.now().isoformat(),
+            }, f, indent=2)
+
+        old_dir = directory.with_name(f".{directory.name}.old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return ProfileIndex(directory)
+
+
+def load_profile_index(directory: Path, skills_model: str, cultural_model: str) -> Optional[ProfileIndex]:
+    """Índice pronto para uso no serving, ou None se ausente/incompatível com os modelos carregados."""
+    directory = Path(directory)
+    if not (directory / META_FILE).exists():
+        return None
+    try:
+        index = ProfileIndex(directory)
+    except Exception as e:
+        logger.error(f"[PROFILE INDEX] Falha ao carregar {directory}: {e}")
+        return None
+    if not index.compatible_with(skills_model, cultural_model):
+        logger.warning(f"[PROFILE INDEX] {directory} foi gerado com {index.models}; reconstrua o índice. Ignorando.")
+        return None
+    logger.info(f"[PROFILE INDEX] {directory}: {len(index)} perfis")
+    return index
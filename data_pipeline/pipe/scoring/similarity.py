@@ -0,0 +1,73 @@
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+# (vocab_emb, flat_idx, offsets) de um lote de grupos já codificado
+Segments = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def build_phrase_segments(groups: Sequence[Sequence[str]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Deduplica as frases de vários grupos (ex: skills de N candidatos) em um vocabulário único.
+
+    Retorna:
+        vocab: frases distintas, na ordem em que aparecem
+        flat_idx: índice no vocab de cada frase, grupos concatenados
+        offsets: limites de cada grupo em flat_idx (len(groups) + 1)
+    """
+    positions = {}
+    flat_idx = []
+    offsets = [0]
+    for group in groups:
+        for phrase in group:
+            flat_idx.append(positions.setdefault(phrase, len(positions)))
+        offsets.append(len(flat_idx))
+    return list(positions), np.asarray(flat_idx, dtype=np.int64), np.asarray(offsets, dtype=np.int64)
+
+
+def prepare_phrase_batch(query: Sequence[str], groups: Sequence[Sequence[str]]):
+    """
+    Remove frases vazias da consulta e dos grupos e monta os segmentos (ver build_phrase_segments).
+
+    Retorna: (query, vocab, flat_idx, offsets)
+    """
+    query = [p for p in query or [] if p]
+    groups = [[p for p in group or [] if p] for group in groups]
+    return (query, *build_phrase_segments(groups))
+
+
+def prepare_segments(query: Sequence[str], groups: Sequence[Sequence[str]],
+                     segments: Optional[Segments] = None):
+    """
+    Como prepare_phrase_batch, mas aceita os segmentos dos grupos já codificados
+    (vocab_emb, flat_idx, offsets), ex: ProfileIndex.segments. Nesse caso não há vocab a codificar.
+
+    Retorna: (query, vocab | None, vocab_emb | None, flat_idx, offsets)
+    """
+    if segments is None:
+        query, vocab, flat_idx, offsets = prepare_phrase_batch(query, groups)
+        return query, vocab, None, flat_idx, offsets
+    vocab_emb, flat_idx, offsets = segments
+    return [p for p in query or [] if p], None, vocab_emb, flat_idx, offsets
+
+
+def segmented_max_similarity(query_emb: np.ndarray, vocab_emb: np.ndarray,
+                             flat_idx: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Para cada grupo e cada frase de consulta, calcula a maior similaridade de cosseno
+    contra as frases do grupo em uma única multiplicação de matrizes.
+
+    Espera embeddings normalizados (produto interno == cosseno).
+    Retorna matriz (n_grupos, n_consultas); grupos vazios ficam com NaN.
+    """
+    n_groups = len(offsets) - 1
+    best = np.full((n_groups, len(query_emb)), np.nan, dtype=np.float32)
+    if n_groups == 0 or len(flat_idx) == 0 or len(query_emb) == 0:
+        return best
+
+    sim = query_emb @ vocab_emb.T
+    gathered = sim[:, flat_idx]
+
+    starts = offsets[:-1]
+    non_empty = starts < offsets[1:]
+    best[non_empty] = np.maximum.reduceat(gathered, starts[non_empty], axis=1).T
+    return best
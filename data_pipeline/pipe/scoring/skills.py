@@ -1,10 +1,19 @@
+import asyncio
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
-from typing import List, Dict, Union
+import os
+import sys
+from typing import Awaitable, Callable, List, Dict, Optional, Union
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from data_pipeline.pipe.scoring.similarity import Segments, prepare_segments, segmented_max_similarity
+from data_pipeline.pipe.scoring.embedding_store import EmbeddingStore, get_embedding_store
+from data_pipeline.pipe.scoring.model_registry import SKILLS_MODEL, get_model_registry
 
 class SkillsScorer:
-    def __init__(self, model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2'):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = SKILLS_MODEL, embedding_store: Optional[EmbeddingStore] = None, model=None):
+        self.model_name = model_name
+        self.embedding_store = embedding_store or get_embedding_store()
+        self._model = model  # carregado sob demanda pelo ModelRegistry
         self.level_map = {
             'NENHUM': 0, 'BÁSICO': 1, 'INTERMEDIÁRIO': 2, 'AVANÇADO': 3, 'FLUENTE': 4, 'TÉCNICO': 1.5,
             'JÚNIOR': 1, 'JUNIOR': 1, 'PLENO': 2, 'SÊNIOR': 3, 'SENIOR': 3, 'ESPECIALISTA': 4, 'LÍDER': 5,
@@ -13,30 +22,70 @@ class SkillsScorer:
         }
         self.weights = {'professional': 0.6, 'academic': 0.2, 'english': 0.2}
 
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_model_registry().get(self.model_name)
+        return self._model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embeddings normalizados (produto interno == similaridade de cosseno), via embedding store quando ativo."""
+        if self.embedding_store is not None:
+            # Backends alternativos (ONNX int8) usam chave própria no store
+            return self.embedding_store.encode(self.model, getattr(self.model, "store_key", self.model_name), texts)
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
     def calculate_embedding_score(self, job_skills: List[str], candidate_skills: List[str], threshold: float = 0.5) -> float:
-        if not job_skills or not candidate_skills:
-            return 0.0
-            
-        # Filter empty strings
-        job_skills = [s for s in job_skills if s]
-        candidate_skills = [s for s in candidate_skills if s]
-        
-        if not job_skills or not candidate_skills:
-            return 0.0
+        return float(self.calculate_embedding_scores(job_skills, [candidate_skills], threshold)[0])
 
-        job_emb = self.model.encode(job_skills, convert_to_tensor=True)
-        cand_emb = self.model.encode(candidate_skills, convert_to_tensor=True)
-        
-        # Cosine similarity matrix
-        sim_matrix = util.cos_sim(job_emb, cand_emb).cpu().numpy()
-        
-        # For each job skill, find max match in candidate skills
-        best_matches = np.max(sim_matrix, axis=1)
-        
-        # Filter matches above threshold
-        qualified_matches = [score if score >= threshold else 0.0 for score in best_matches]
-        
-        return float(np.mean(qualified_matches))
+    def calculate_embedding_scores(self, job_skills: List[str], candidates_skills: List[List[str]], threshold: float = 0.5,
+                                   job_emb: Optional[np.ndarray] = None,
+                                   candidate_segments: Optional[Segments] = None) -> np.ndarray:
+        """
+        Score semântico de uma vaga contra vários candidatos.
+        As skills da vaga e o vocabulário distinto dos candidatos são codificados uma única vez.
+        `job_emb` (ex: índice de vagas) evita codificar as skills da vaga e `candidate_segments`
+        (ex: ProfileIndex.segments do índice de candidatos) evita codificar as dos candidatos.
+        """
+        job_skills, vocab, vocab_emb, flat_idx, offsets = prepare_segments(job_skills, candidates_skills, candidate_segments)
+        if not job_skills or len(flat_idx) == 0:
+            return np.zeros(len(offsets) - 1, dtype=np.float32)
+
+        if job_emb is None:
+            job_emb = self.encode(job_skills)
+        if vocab_emb is None:
+            vocab_emb = self.encode(vocab)
+        return self.score_embeddings(job_emb, vocab_emb, flat_idx, offsets, threshold)
+
+    async def acalculate_embedding_scores(self, job_skills: List[str], candidates_skills: List[List[str]],
+                                          encode: Callable[[List[str]], Awaitable[np.ndarray]],
+                                          threshold: float = 0.5, job_emb: Optional[np.ndarray] = None,
+                                          candidate_segments: Optional[Segments] = None) -> np.ndarray:
+        """
+        Versão assíncrona de calculate_embedding_scores com encoder externo (ex: EncoderBatcher da API).
+        """
+        job_skills, vocab, vocab_emb, flat_idx, offsets = prepare_segments(job_skills, candidates_skills, candidate_segments)
+        if not job_skills or len(flat_idx) == 0:
+            return np.zeros(len(offsets) - 1, dtype=np.float32)
+
+        if job_emb is None and vocab_emb is None:
+            job_emb, vocab_emb = await asyncio.gather(encode(job_skills), encode(vocab))
+        elif job_emb is None:
+            job_emb = await encode(job_skills)
+        elif vocab_emb is None:
+            vocab_emb = await encode(vocab)
+        return self.score_embeddings(job_emb, vocab_emb, flat_idx, offsets, threshold)
+
+    @staticmethod
+    def score_embeddings(job_emb: np.ndarray, vocab_emb: np.ndarray, flat_idx: np.ndarray,
+                         offsets: np.ndarray, threshold: float = 0.5) -> np.ndarray:
+        # For each job skill, find max match in each candidate's skills
+        best_matches = segmented_max_similarity(job_emb, vocab_emb, flat_idx, offsets)
+
+        # Filter matches above threshold (empty candidates score 0)
+        qualified_matches = np.where(best_matches >= threshold, best_matches, 0.0)
+
+        return qualified_matches.mean(axis=1)
 
     def _get_level_score(self, level: str) -> float:
         return self.level_map.get(str(level).upper().strip(), 0.0)
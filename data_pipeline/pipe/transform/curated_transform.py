@@ -82,7 +82,7 @@ def parse_datetime_columns(df: pl.DataFrame, date_columns: list[str]) -> pl.Data
 def normalize_dataframe(df: pl.DataFrame, date_columns: list[str] = [], datetime_columns: list[str] = []) -> pl.DataFrame:
     # Limpar colunas string
     string_cols = [col for col, dtype in df.schema.items()
-                   if dtype == pl.String]
+                   if dtype == pl.Utf8]
     df = df.with_columns([clean_string_column(
         pl.col(col)).alias(col) for col in string_cols])
 
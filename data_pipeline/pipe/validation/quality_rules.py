@@ -1,38 +1,47 @@
 import polars as pl
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 import re
 
+# As checagens 1 e 2 aceitam LazyFrame: viram agregações executadas em streaming
+Frame = Union[pl.DataFrame, pl.LazyFrame]
+
 
 # ------------------------------------------------------------------
 # 1. Campos obrigatórios não nulos
 # ------------------------------------------------------------------
-def check_required_columns(df: pl.DataFrame, columns: List[str]) -> List[str]:
+def check_required_columns(df: Frame, columns: List[str]) -> List[str]:
     """
     Verifica valores obrigatórios, considerando nulos, vazios, espaços ou "-".
     """
+    schema = df.schema
+    counts = {}
+    present = [col for col in columns if col in schema]
+    if present:
+        invalid = []
+        for col in present:
+            if schema[col] == pl.Utf8:
+                invalid.append((pl.col(col).is_null() | pl.col(col).str.strip_chars().is_in(
+                    ["", "-", " "])).sum().alias(col))
+            else:
+                invalid.append(pl.col(col).is_null().sum().alias(col))
+        counts = df.lazy().select(invalid).collect(streaming=True).row(0, named=True)
+
     issues = []
     for col in columns:
-        if col not in df.columns:
+        if col not in schema:
             issues.append(f"Coluna obrigatória ausente: {col}")
             continue
 
-        series = df[col]
-        if series.dtype == pl.String:
-            invalid = series.is_null() | series.str.strip_chars().is_in(
-                ["", "-", " "])
-        else:
-            invalid = series.is_null()
-
-        n_invalid = invalid.sum()
+        n_invalid = counts[col]
         if n_invalid > 0:
             issues.append(
                 f"Coluna {col} contém {n_invalid} valores inválidos (nulo, vazio, '-', espaço)")
     return issues
 
 
-def get_invalid_rows_for_required_columns(df: pl.DataFrame, required_cols: List[str]) -> List[int]:
+def invalid_required_mask(df: Frame, required_cols: List[str]) -> pl.Expr:
     """
-    Retorna os índices das linhas que possuem campos obrigatórios nulos,
+    Expressão True nas linhas que possuem campos obrigatórios nulos,
     vazios, apenas espaços ou contendo apenas hífens ("-").
     """
     invalid_mask = None
@@ -43,7 +52,7 @@ def get_invalid_rows_for_required_columns(df: pl.DataFrame, required_cols: List[
 
         col_clean = (
             pl.col(col)
-            .cast(pl.String)
+            .cast(pl.Utf8)
             .str.strip_chars()
             .str.strip_chars("-")
             .str.strip_chars()
@@ -51,6 +60,15 @@ def get_invalid_rows_for_required_columns(df: pl.DataFrame, required_cols: List[
 
         mask = col_clean.is_null() | (col_clean == "") | (col_clean.str.len_chars() == 0)
         invalid_mask = mask if invalid_mask is None else invalid_mask | mask
+    return invalid_mask
+
+
+def get_invalid_rows_for_required_columns(df: pl.DataFrame, required_cols: List[str]) -> List[int]:
+    """
+    Retorna os índices das linhas que possuem campos obrigatórios nulos,
+    vazios, apenas espaços ou contendo apenas hífens ("-").
+    """
+    invalid_mask = invalid_required_mask(df, required_cols)
 
     # Cria coluna auxiliar de índices
     df_with_idx = df.with_columns(pl.arange(0, df.height).alias("_row_idx"))
@@ -61,8 +79,13 @@ def get_invalid_rows_for_required_columns(df: pl.DataFrame, required_cols: List[
 # ------------------------------------------------------------------
 # 2. Duplicações
 # ------------------------------------------------------------------
-def check_duplicates(df: pl.DataFrame, subset: List[str]) -> List[str]:
-    dup_count = df.select(pl.col(subset)).is_duplicated().sum()
+def check_duplicates(df: Frame, subset: List[str]) -> List[str]:
+    # Agrupa só as colunas-chave: a memória é a das chaves distintas, não a das linhas
+    dup_count = (
+        df.lazy().group_by(subset).agg(pl.count().alias("_n"))
+        .filter(pl.col("_n") > 1).select(pl.col("_n").sum())
+        .collect(streaming=True).item()
+    ) or 0
     if dup_count > 0:
         return [f"[DUPLICATE] {dup_count} registros duplicados encontrados com base nas colunas {subset}."]
     return []
@@ -1,40 +1,134 @@
-from typing import Type, Optional
+from typing import Any, Iterable, List, Literal, Optional, Tuple, Type, Union, get_args, get_origin
 from pydantic import BaseModel, ValidationError
 import polars as pl
 from pipe.utils.logger import get_logger
 
 logger = get_logger("schema_check")
 
+STRING_DTYPES = (pl.Utf8, pl.Categorical)
 
-def validate_schema(df: pl.DataFrame, model: Type[BaseModel]) -> list[str]:
+
+# ------------------------------------------------------------------
+# Validação vetorizada: schema Pydantic compilado em expressões Polars
+# ------------------------------------------------------------------
+def _unwrap_optional(annotation: Any) -> Tuple[Any, bool]:
+    """Optional[X] / Union[X, None] -> (X, True). Demais anotações -> (anotação, False)."""
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        nullable = len(args) < len(get_args(annotation))
+        return (args[0] if len(args) == 1 else Union[tuple(args)]), nullable
+    return annotation, False
+
+
+def _type_check(col: pl.Expr, annotation: Any, dtype: pl.PolarsDataType) -> pl.Expr:
     """
-    Valida linha a linha do DataFrame com o schema Pydantic.
-    Retorna lista de mensagens de erro (não interrompe na 1ª falha).
+    Expressão True nas linhas cujo valor (não nulo) pode violar o tipo do campo.
+    Só é exata para os tipos simples (str, int, float, bool, Literal de str); para o resto
+    toda linha não nula é marcada como suspeita e fica para o Pydantic decidir.
     """
-    errors = []
-    for i, row in enumerate(df.to_dicts()):
+    present = col.is_not_null()
+    if dtype == pl.Null:
+        return pl.lit(False)
+
+    if annotation is str:
+        return pl.lit(False) if dtype in STRING_DTYPES else present
+
+    if annotation is bool:
+        return pl.lit(False) if dtype == pl.Boolean else present
+
+    if annotation in (int, float):
+        if dtype in pl.INTEGER_DTYPES:
+            return pl.lit(False)
+        if dtype in pl.FLOAT_DTYPES:
+            # int aceita 3.0, mas não 3.5
+            return (present & (col.floor() != col)) if annotation is int else pl.lit(False)
+        if dtype in STRING_DTYPES:
+            target = pl.Int64 if annotation is int else pl.Float64
+            return present & col.cast(pl.Utf8).str.strip_chars().cast(target, strict=False).is_null()
+        return present
+
+    if get_origin(annotation) is Literal:
+        allowed = get_args(annotation)
+        if dtype in STRING_DTYPES and all(isinstance(v, str) for v in allowed):
+            return present & ~col.cast(pl.Utf8).is_in(list(allowed))
+        return present
+
+    return present
+
+
+def compile_schema(df_schema: dict, model: Type[BaseModel]) -> List[pl.Expr]:
+    """
+    Compila os campos do modelo Pydantic em expressões Polars (uma por campo), avaliadas
+    coluna a coluna: obrigatoriedade, nulos e tipo/domínio. Cada expressão é True nas
+    linhas suspeitas daquele campo. Colunas extras são ignoradas, como no Pydantic.
+    """
+    checks = []
+    for name, field in model.model_fields.items():
+        column = field.alias or name
+        if column not in df_schema:
+            if field.is_required():
+                checks.append(pl.lit(True).alias(name))  # "Field required" em todas as linhas
+            continue
+
+        annotation, nullable = _unwrap_optional(field.annotation)
+        col = pl.col(column)
+        null_check = pl.lit(False) if nullable else col.is_null()
+        checks.append((null_check | _type_check(col, annotation, df_schema[column])).alias(name))
+    return checks
+
+
+def find_invalid_rows(df: pl.DataFrame, model: Type[BaseModel]) -> List[Tuple[int, dict, ValidationError]]:
+    """
+    Retorna (índice da linha, registro, erro) das linhas inválidas.
+    As regras compiladas filtram as linhas suspeitas de forma vetorizada; o Pydantic roda
+    apenas nelas, para confirmar a falha e gerar a mensagem detalhada.
+    """
+    checks = compile_schema(df.schema, model)
+    if not checks:
+        return []
+
+    suspects = (
+        df.with_row_count("_row_idx")
+        .filter(pl.any_horizontal(checks))
+    )
+    invalid = []
+    for row in suspects.to_dicts():
+        idx = row.pop("_row_idx")
         try:
             model(**row)
         except ValidationError as e:
-            errors.append(f"Linha {i}: {e}")
-    return errors
+            invalid.append((idx, row, e))
+    return invalid
+
+
+def validate_schema(df: pl.DataFrame, model: Type[BaseModel]) -> list[str]:
+    """
+    Valida o DataFrame com o schema Pydantic (vetorizado; Pydantic só nas linhas que falham).
+    Retorna lista de mensagens de erro (não interrompe na 1ª falha).
+    """
+    return [f"Linha {i}: {e}" for i, _, e in find_invalid_rows(df, model)]
 
 
-def assert_valid_schema(df: pl.DataFrame, model: Type[BaseModel], label: str = "", id_field: Optional[str] = None):
+def assert_valid_schema(df: Union[pl.DataFrame, Iterable[pl.DataFrame]], model: Type[BaseModel], label: str = "",
+                        id_field: Optional[str] = None):
     """
     Valida e emite log com todos os erros encontrados.
+    `df` também pode ser um iterável de lotes (ex.: `iter_parquet_parts` do staging): cada lote
+    é validado e descartado, e os erros de todos os lotes são reportados juntos.
     Se `id_field` for passado, inclui identificador nas mensagens de erro.
     """
-    logger.info(f"[{label}] Validando schema com {len(df)} registros")
+    lotes = [df] if isinstance(df, pl.DataFrame) else df
+    logger.info(f"[{label}] Validando schema")
     raw_errors = []
-    for i, row in enumerate(df.to_dicts()):
-        try:
-            model(**row)
-        except ValidationError as e:
+    total = 0
+    for lote in lotes:
+        for i, row, e in find_invalid_rows(lote, model):
+            i += total
             id_val = row.get(
                 id_field, f"linha {i}") if id_field else f"linha {i}"
             error_msg = f"[{label}] Registro inválido (id={id_val}): {e}"
             raw_errors.append(error_msg)
+        total += lote.height
 
     if raw_errors:
         for err in raw_errors:
@@ -44,4 +138,4 @@ def assert_valid_schema(df: pl.DataFrame, model: Type[BaseModel], label: str = "
         raise ValueError(
             f"[{label}] Falha na validação de schema: veja logs para detalhes.")
 
-    logger.info(f"[{label}] Schema válido ✅")
+    logger.info(f"[{label}] Schema válido ✅ ({total} registros)")
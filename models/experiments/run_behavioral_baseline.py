@@ -1,3 +1,5 @@
+import sys
+import os
 import polars as pl
 import pandas as pd
 import numpy as np
@@ -13,12 +15,23 @@ from sklearn.metrics import roc_auc_score
 from rapidfuzz import fuzz
 from scipy.stats import randint, uniform
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from data_pipeline.pipe.scoring.behavioral_features import build_manifest, group_recruiters
+
 # --- Configuration ---
 # Adjusted path: script is in models/experiments (depth 2) -> ../../data/curated
 DATA_DIR = Path("../../data/curated")
 EXPERIMENT_NAME = "Behavioral_Baseline"
 MLFLOW_TRACKING_URI = "file:/home/tiao553/datathon-mlet03/mlruns"
 
+# Feature definitions shared with the serving pipeline through the exported feature manifest
+PROFILE_COLS = [
+    "app_ib_objetivo_profissional", "app_ib_local", "app_ip_sexo", "app_ip_estado_civil",
+    "app_ip_pcd", "app_ip_remuneracao", "app_fei_nivel_academico", "app_fei_nivel_ingles"
+]
+REGEX_NEGATIVE = r"(?i)(n(a|ã)o\sresponde|desisti|sem\sinteresse|n(a|ã)o\sretorna|n(a|ã)o\satende)"
+REGEX_POSITIVE = r"(?i)(proativ|interessad|bom\sperfil|responsiv|gostou|avan(ç|c)ou|performou\sbem)"
+
 def setup_mlflow():
     mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
     mlflow.set_experiment(EXPERIMENT_NAME)
@@ -66,13 +79,8 @@ def preprocess_text_features(df: pl.DataFrame) -> pl.DataFrame:
     print("Engineering Text & behavioral Features...")
     
     # 1. Profile Completeness
-    profile_cols = [
-        "app_ib_objetivo_profissional", "app_ib_local", "app_ip_sexo", "app_ip_estado_civil",
-        "app_ip_pcd", "app_ip_remuneracao", "app_fei_nivel_academico", "app_fei_nivel_ingles"
-    ]
-    
     # Calculate percentage of non-nulls (Checking columns exist first to avoid error)
-    valid_cols = [c for c in profile_cols if c in df.columns]
+    valid_cols = [c for c in PROFILE_COLS if c in df.columns]
     if valid_cols:
         completeness_expr = sum([pl.col(c).is_not_null().cast(pl.Float64) for c in valid_cols]) / len(valid_cols)
     else:
@@ -84,12 +92,9 @@ def preprocess_text_features(df: pl.DataFrame) -> pl.DataFrame:
     ])
 
     # 2. Regex Sentiment
-    regex_negative = r"(?i)(n(a|ã)o\sresponde|desisti|sem\sinteresse|n(a|ã)o\sretorna|n(a|ã)o\satende)"
-    regex_positive = r"(?i)(proativ|interessad|bom\sperfil|responsiv|gostou|avan(ç|c)ou|performou\sbem)"
-
     df = df.with_columns([
-        pl.col("p_comentario").str.contains(regex_negative).fill_null(False).alias("contem_palavra_chave_negativa"),
-        pl.col("p_comentario").str.contains(regex_positive).fill_null(False).alias("contem_palavra_chave_positiva")
+        pl.col("p_comentario").str.contains(REGEX_NEGATIVE).fill_null(False).alias("contem_palavra_chave_negativa"),
+        pl.col("p_comentario").str.contains(REGEX_POSITIVE).fill_null(False).alias("contem_palavra_chave_positiva")
     ])
 
     # Score
@@ -163,16 +168,8 @@ def clean_and_prepare(df: pl.DataFrame) -> pd.DataFrame:
     df = preprocess_text_features(df)
     df = create_target(df)
     
-    # Recruiter Grouping
-    recruiter_counts = df.group_by("p_recrutador").count()
-    rare_recruiters = recruiter_counts.filter(pl.col("count") < 10)["p_recrutador"]
-    
-    df = df.with_columns(
-        pl.when(pl.col("p_recrutador").is_in(rare_recruiters))
-        .then(pl.lit("Outros"))
-        .otherwise(pl.col("p_recrutador"))
-        .alias("p_recrutador_tratado")
-    )
+    # Recruiter Grouping (same normalization as the serving pipeline: trimmed, null/rare -> "Outros")
+    df = group_recruiters(df)
     
     # Handle NaN in numeric features before conversion if any
     # (LightGBM handles NaN, but StandardScaler might complain if not handled or configured)
@@ -244,6 +241,14 @@ def train_model(pdf: pd.DataFrame):
         mlflow.log_metric("roc_auc", auc)
         
         mlflow.sklearn.log_model(best_model, "model")
+
+        # Frozen feature manifest (scaler/one-hot parameters, feature order) exported with the model
+        manifest = build_manifest(
+            preprocessor, features_num, features_cat,
+            profile_columns=[c for c in PROFILE_COLS if c in pdf.columns],
+            regex_positive=REGEX_POSITIVE, regex_negative=REGEX_NEGATIVE,
+        )
+        mlflow.log_dict(manifest, "feature_manifest.json")
         print("Run Complete.")
 
 if __name__ == "__main__":
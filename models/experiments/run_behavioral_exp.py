@@ -13,6 +13,7 @@ from sklearn.compose import ColumnTransformer
 # Adjust path to import tracking
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from model.experiments.tracking import ExperimentTracker
+from data_pipeline.pipe.features.feature_store import scan_feature_store, resolve_feature_store_path
 
 def train_behavioral_model():
     # Initialize tracker
@@ -21,13 +22,13 @@ def train_behavioral_model():
     with tracker.start_run(run_name="lgbm_baseline"):
         # 1. Load Data (Assuming data is available as in notebooks)
         # For now, using the path identified in planning
-        data_path = "data/feature_store/resultado_final.parquet"
-        if not os.path.exists(data_path):
-            print(f"Data not found at {data_path}")
+        data_path = resolve_feature_store_path("data/feature_store/resultado_final")
+        if data_path is None:
+            print("Data not found at data/feature_store/resultado_final")
             return
 
         print("Loading data...")
-        df_pl = pl.read_parquet(data_path)
+        df_pl = scan_feature_store(data_path).collect()
         
         # 2. Preprocessing (Logic from Model_engagement_score_final.py)
         # Re-implementing simplified logic for the experiment
@@ -12,6 +12,7 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from data_pipeline.pipe.features.cleanning_and_accurate import gerar_features
 from data_pipeline.pipe.scoring.behavioral import BehavioralScorer
+from data_pipeline.pipe.features.feature_store import scan_feature_store, resolve_feature_store_path
 
 def run_experiment():
     mlflow.set_tracking_uri("http://localhost:5000")
@@ -19,12 +20,12 @@ def run_experiment():
 
     with mlflow.start_run():
         # 1. Load Data
-        data_path = "data/feature_store/resultado_final.parquet"
-        if not os.path.exists(data_path):
+        data_path = resolve_feature_store_path("data/feature_store/resultado_final")
+        if data_path is None:
             print("Data not found.")
             return
 
-        df = pl.read_parquet(data_path)
+        df = scan_feature_store(data_path).collect()
         
         # 2. Feature Engineering
         # Reuse the logic from the pipeline to ensure consistency
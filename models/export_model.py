@@ -1,46 +1,81 @@
-
 import mlflow
 import joblib
 import os
+import sys
+import json
+import argparse
 from pathlib import Path
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_pipeline.pipe.scoring.behavioral import compiled_model_path
+from data_pipeline.pipe.scoring.behavioral_features import manifest_path, save_manifest
+
 # Setup
 MLFLOW_TRACKING_URI = "file:/home/tiao553/datathon-mlet03/mlruns"
 mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
 EXPERIMENT_NAME = "Behavioral_Baseline"
 
-def export_best_model():
+def compile_model(model, output_path: Path):
+    """Compiles the trees into a native shared library (treelite + tl2cgen) for low-latency serving."""
+    import treelite
+    import tl2cgen
+
+    tl_model = treelite.frontend.from_lightgbm(model.booster_)
+    tl2cgen.export_lib(tl_model, toolchain="gcc", libpath=str(output_path), params={"parallel_comp": os.cpu_count() or 1})
+
+def export_best_model(compile_trees: bool = False):
     print(f"Connecting to MLflow at {MLFLOW_TRACKING_URI}...")
     experiment = mlflow.get_experiment_by_name(EXPERIMENT_NAME)
-    
+
     if experiment is None:
         print(f"Experiment {EXPERIMENT_NAME} not found.")
         return
 
     # Get runs
     runs = mlflow.search_runs(experiment_ids=[experiment.experiment_id], order_by=["metrics.roc_auc DESC"])
-    
+
     if runs.empty:
         print("No runs found.")
         return
-        
+
     best_run = runs.iloc[0]
     run_id = best_run.run_id
     auc = best_run["metrics.roc_auc"]
     print(f"Best Run ID: {run_id} with AUC: {auc}")
-    
+
     # Load model
     model_uri = f"runs:/{run_id}/model"
     print(f"Loading model from {model_uri}...")
     model = mlflow.sklearn.load_model(model_uri)
-    
+
+    # The serving feature pipeline is compiled from this manifest; a model without it is not exported
+    try:
+        local_manifest = mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path="feature_manifest.json")
+    except Exception as e:
+        print(f"Run {run_id} has no feature_manifest.json ({e}). Retrain with run_behavioral_baseline.py.")
+        return
+    with open(local_manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if len(manifest["feature_names"]) != model.n_features_in_:
+        print(f"Manifest has {len(manifest['feature_names'])} features, model expects {model.n_features_in_}. Aborting.")
+        return
+
     # Save to artifacts
     output_path = Path("models/artifacts/behavioral_model.pkl")
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    
+
     print(f"Saving model to {output_path}...")
     joblib.dump(model, output_path)
+    save_manifest(manifest, manifest_path(output_path))
+    print(f"Saved feature manifest to {manifest_path(output_path)}")
+
+    if compile_trees:
+        print(f"Compiling trees to {compiled_model_path(output_path)}...")
+        compile_model(model, compiled_model_path(output_path))
     print("Done.")
 
 if __name__ == "__main__":
-    export_best_model()
+    parser = argparse.ArgumentParser(description="Exports the best behavioral model and its feature manifest.")
+    parser.add_argument("--compile", action="store_true", help="Also build a treelite shared library (BEHAVIORAL_BACKEND=treelite)")
+    args = parser.parse_args()
+    export_best_model(compile_trees=args.compile)
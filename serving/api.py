@@ -1,6 +1,8 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Form
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Json
 import json
+from contextlib import asynccontextmanager
 
 # ... (imports remain matching existing file content if careful, but replace_file_content replaces block)
 # I need to be careful about imports. The user file has:
@@ -9,9 +11,13 @@ import json
 
 from pydantic import BaseModel
 import polars as pl
+import numpy as np
+import asyncio
 import os
 import sys
-from typing import Optional, Dict, Any
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -20,27 +26,91 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data
 from data_pipeline.pipe.scoring.skills import SkillsScorer
 from data_pipeline.pipe.scoring.behavioral import BehavioralScorer
 from data_pipeline.pipe.scoring.cultural import CulturalScorer
-from data_pipeline.pipe.features.prompts import chamar_llm, prompt_candidato, prompt_vaga
-from data_pipeline.pipe.features.free_text_transform import extrair_json_limpo
-from data_pipeline.pipe.ingest.document_parser import DocumentParser
+from data_pipeline.pipe.scoring.embedding_store import get_embedding_store
+from data_pipeline.pipe.scoring.model_registry import CULTURAL_MODEL, SKILLS_MODEL, get_model_registry, shared_model_name
+from data_pipeline.pipe.scoring.profile_index import load_profile_index
+from data_pipeline.pipe.scoring.ann_index import load_vector_index, query_vector
+from data_pipeline.pipe.scoring.open_jobs import data_referencia, sync_open_jobs
+from data_pipeline.pipe.scoring.similarity import build_phrase_segments
+from data_pipeline.infra.llm_cache import get_llm_cache
+from data_pipeline.infra.llm_gateway import aclose_llm_provider
+from data_pipeline.pipe.features.prompts import achamar_llm, prompt_candidato, prompt_vaga
+from data_pipeline.pipe.features.free_text_transform import extrair_json_limpo, carregar_jsonl
+from data_pipeline.pipe.ingest.document_parser import DocumentParser, shutdown_ocr_pool
 from data_pipeline.pipe.features.payload_models import CandidateData, JobData
-
-app = FastAPI(title="Recruitment Scoring API", version="1.0")
+from serving.encoder_batcher import EncoderBatcher
+from serving.inference_logger import get_inference_logger
 
 # Load Global Resources (Models)
-# In production, use lifespan events
-skills_scorer = SkillsScorer()
+# Encoders are loaded once per process by the model registry, on first use or during the lifespan warm-up.
+# SCORING_SHARED_MODEL=<name> makes both scorers share a single (e.g. multilingual) model.
+model_registry = get_model_registry()
+skills_scorer = SkillsScorer(model_name=shared_model_name() or SKILLS_MODEL)
 behavioral_scorer = BehavioralScorer()
-cultural_scorer = CulturalScorer()
+cultural_scorer = CulturalScorer(model_name=shared_model_name() or CULTURAL_MODEL)
+# Scoring inputs/outputs for drift monitoring: buffered in memory, flushed to data/inference_logs/dt=YYYY-MM-DD/ in the background
+inference_logger = get_inference_logger()
+ENCODER_MODELS = list(dict.fromkeys([skills_scorer.model_name, cultural_scorer.model_name]))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    MODEL_WARMUP controls encoder loading:
+      - background (default): start serving immediately, load in a thread; /health reports readiness
+      - eager: load before accepting traffic
+      - lazy: load on the first request that needs each model
+    """
+    mode = os.getenv("MODEL_WARMUP", "background").lower()
+    if mode == "eager":
+        await run_in_threadpool(model_registry.warm_up, ENCODER_MODELS)
+    elif mode == "background":
+        model_registry.warm_up(ENCODER_MODELS, background=True)
+    if inference_logger is not None:
+        inference_logger.start()
+    yield
+    if inference_logger is not None:
+        await inference_logger.stop()
+    await aclose_llm_provider()
+    shutdown_ocr_pool()
+    store = get_embedding_store()
+    if store is not None:
+        store.flush()
+
+app = FastAPI(title="Recruitment Scoring API", version="1.0", lifespan=lifespan)
+
+# Coalesce concurrent /predict encodes into batched model calls (ENCODER_BATCH_MAX_SIZE / ENCODER_BATCH_MAX_WAIT_MS)
+skills_batcher = EncoderBatcher(skills_scorer.encode, name="skills")
+cultural_batcher = EncoderBatcher(cultural_scorer.encode, name="cultural")
 
-# Pre-load Job Data for lookups (simple caching)
-JOBS_PATH = "data/curated/jobs.parquet"
-df_jobs = None
-if os.path.exists(JOBS_PATH):
-    df_jobs = pl.read_parquet(JOBS_PATH)
+# Precomputed job and candidate profiles (phrases + embeddings, memory-mapped), built offline by main_profile_index.py.
+# A job_id / candidate_id is a dict lookup: no LLM call and no encode on that side.
+PROFILE_INDEX_DIR = Path(os.getenv("PROFILE_INDEX_DIR", "data/feature_store/indexes"))
+job_index = load_profile_index(PROFILE_INDEX_DIR / "jobs", skills_scorer.model_name, cultural_scorer.model_name)
+candidate_index = load_profile_index(PROFILE_INDEX_DIR / "candidates", skills_scorer.model_name, cultural_scorer.model_name)
+# ANN retrieval over pooled candidate skill vectors (HNSW if hnswlib is installed, NumPy IVF otherwise)
+candidate_ann = None
+if candidate_index is not None:
+    candidate_ann = load_vector_index(PROFILE_INDEX_DIR / "candidates_ann", source_built_at=candidate_index.meta["built_at"])
+
+# Vector index of open vacancies for /predict_file without a job. Synced incrementally against
+# the job index at startup, so vacancies closed since the offline build (OPEN_JOBS_REFERENCE_DATE or today) drop out.
+ANN_POOLING = os.getenv("ANN_POOLING", "mean")
+open_jobs_ann = None
+if job_index is not None:
+    open_jobs_ann = load_vector_index(PROFILE_INDEX_DIR / "open_jobs_ann")
+    stale = open_jobs_ann is not None and open_jobs_ann.meta.get("source_built_at") != job_index.meta["built_at"]
+    open_jobs_ann, _, _ = sync_open_jobs(open_jobs_ann, job_index, data_referencia(), ANN_POOLING, rebuild_vectors=stale)
+OPEN_JOBS_SHORTLIST = int(os.getenv("OPEN_JOBS_SHORTLIST", "50"))
+
+# LLM-extracted profiles from the feature store, used to resolve IDs in /rank
+PROCESSED_JOBS_PATH = Path("data/feature_store/vagas_processadas.jsonl")
+PROCESSED_CANDIDATES_PATH = Path("data/feature_store/candidatos_processados.jsonl")
+processed_jobs = {x["codigo_vaga"]: x["dados"] for x in carregar_jsonl(PROCESSED_JOBS_PATH)}
+processed_candidates = {x["codigo_candidato"]: x["dados"] for x in carregar_jsonl(PROCESSED_CANDIDATES_PATH)}
 
 class ScoringRequest(BaseModel):
     resume_text: Optional[str] = None
+    candidate_id: Optional[str] = None  # resolved through the candidate profile index
     job_id: Optional[str] = None
     job_description: Optional[str] = None
     
@@ -49,16 +119,223 @@ class ScoringRequest(BaseModel):
     candidate_data: Optional[CandidateData] = None
     job_data: Optional[JobData] = None
 
+    # No-job mode: without job_id/job_description/job_data, return the top-k open vacancies
+    top_k_jobs: Optional[int] = None
+
+class RankingRequest(BaseModel):
+    job_id: Optional[str] = None
+    job_data: Optional[JobData] = None
+
+    # Candidates can be referenced by ID (feature store) and/or sent as structured payloads
+    candidate_ids: List[str] = []
+    candidates: List[CandidateData] = []
+    top_k: int = 10
+
+class CandidateSearchRequest(BaseModel):
+    job_id: Optional[str] = None
+    job_data: Optional[JobData] = None
+
+    top_n: int = 200  # shortlist retrieved from the ANN index, then re-ranked exactly
+    top_k: int = 10
+
+def _legacy_skills(dados: Dict[str, Any]):
+    """Maps an LLM-extracted profile (legacy dict) to (tech skills, soft skills)."""
+    skills = dados.get("competencias_tecnicas", []) + dados.get("ferramentas_tecnologicas", [])
+    return skills, dados.get("competencias_comportamentais", [])
+
+def _profile_skills(profile: Dict[str, Any]):
+    return profile["skills"], profile["soft_skills"]
+
+def _candidate_data_skills(candidate: CandidateData):
+    if not candidate.skills:
+        return [], []
+    return candidate.skills.technical_skills + candidate.skills.tools, candidate.skills.soft_skills
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "models_loaded": True}
+    store = get_embedding_store()
+    llm_cache = get_llm_cache()
+    return {
+        "status": "ok",
+        "models_loaded": model_registry.is_ready(ENCODER_MODELS),
+        "models": {name: model_registry.status().get(name, "pending") for name in ENCODER_MODELS},
+        "embedding_store": store.stats() if store else None,
+        "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+        "encoder_batching": {"skills": skills_batcher.stats(), "cultural": cultural_batcher.stats()},
+        "job_index": len(job_index) if job_index is not None else None,
+        "candidate_index": len(candidate_index) if candidate_index is not None else None,
+        "candidate_ann": len(candidate_ann) if candidate_ann is not None else None,
+        "open_jobs": len(open_jobs_ann) if open_jobs_ann is not None else None,
+        "inference_log": inference_logger.stats() if inference_logger is not None else None
+    }
+
+def _log_inference(records: List[Dict[str, Any]]):
+    """Appends to the in-memory inference log (no I/O on the request path)."""
+    if inference_logger is None:
+        return
+    try:
+        inference_logger.log_many(records)
+    except Exception as e:
+        print(f"Inference logging error: {e}")
+
+def _job_description_prompt(job_description: str) -> str:
+    prompt_row = {
+        'job_ib_titulo_vaga': 'Job',
+        'job_pv_principais_atividades': job_description,
+        'job_pv_competencia_tecnicas_e_comportamentais': '',
+        'job_pv_demais_observacoes': '',
+        'job_pv_habilidades_comportamentais_necessarias': ''
+    }
+    return prompt_vaga(prompt_row)
+
+def _behavioral_score(job_id: Optional[str], candidate_id: Optional[str] = None) -> float:
+    """Behavioral model (LightGBM) for a single pair; runs in the threadpool."""
+    data_dict = {
+        "codigo_candidato": candidate_id or "API_REQ",
+        "codigo_vaga": job_id or "API_JOB",
+        "p_comentario": "", 
+        "contem_palavra_chave_positiva": 0,
+        "contem_palavra_chave_negativa": 0,
+        "p_recrutador": "Outros"
+    }
+    df_input = pl.DataFrame([data_dict])
+    try:
+        df_scored = behavioral_scorer.predict(df_input)
+        return df_scored["score_behavioral"][0]
+    except Exception as e:
+        print(f"Behavioral scoring error: {e}")
+        return 0.5
+
+def _indexed_job(job_id: Optional[str]):
+    """(skills, soft skills, skill embeddings, soft skill embeddings, profile) from the job index, or None."""
+    if not job_id or job_index is None or job_id not in job_index:
+        return None
+    profile = job_index.profile(job_id)
+    return (
+        profile["skills"], profile["soft_skills"],
+        job_index.embeddings("skills", job_id), job_index.embeddings("soft_skills", job_id),
+        profile,
+    )
+
+def _indexed_candidates(candidate_ids: List[str]):
+    """Segments (vocab_emb, flat_idx, offsets) per field for candidates in the index, in the given order."""
+    rows = [candidate_index.row_of[cid] for cid in candidate_ids]
+    return candidate_index.segments("skills", rows), candidate_index.segments("soft_skills", rows)
+
+async def _score_pair(j_skills, c_skills, j_cult, c_cult, job_id: Optional[str],
+                      j_skill_emb: Optional[np.ndarray] = None, j_cult_emb: Optional[np.ndarray] = None,
+                      c_segments=(None, None), candidate_id: Optional[str] = None):
+    """
+    Scores for /predict. Phrase encodes go through the micro-batchers, so concurrent
+    requests share one model call instead of each running a small encode.
+    Precomputed embeddings (job / candidate index) skip the encode on that side.
+    """
+    scores_skills, scores_cultural, score_behavioral = await asyncio.gather(
+        skills_scorer.acalculate_embedding_scores(j_skills, [c_skills], encode=skills_batcher.encode,
+                                                  job_emb=j_skill_emb, candidate_segments=c_segments[0]),
+        cultural_scorer.acalculate_scores(j_cult, [c_cult], encode=cultural_batcher.encode,
+                                          job_emb=j_cult_emb, candidate_segments=c_segments[1]),
+        run_in_threadpool(_behavioral_score, job_id, candidate_id),
+    )
+    return scores_skills[0], scores_cultural[0], score_behavioral
+
+def _behavioral_batch(candidate_ids: List[str], job_ids: List[str]) -> np.ndarray:
+    """Behavioral model (LightGBM) for many pairs in one predict call."""
+    df_input = pl.DataFrame({
+        "codigo_candidato": candidate_ids,
+        "codigo_vaga": job_ids,
+        "p_comentario": [""] * len(candidate_ids),
+        "p_recrutador": ["Outros"] * len(candidate_ids),
+    })
+    try:
+        return behavioral_scorer.predict(df_input)["score_behavioral"].to_numpy()
+    except Exception as e:
+        print(f"Behavioral scoring error: {e}")
+        return np.full(len(candidate_ids), 0.5)
+
+async def _recommend_jobs(c_skills, c_cult, c_segments, candidate_id: Optional[str], top_k: int):
+    """
+    Top-k open vacancies for a candidate: ANN shortlist over pooled job skill vectors,
+    then exact re-scoring of each shortlisted job against the candidate.
+    Candidate phrases are encoded once and reused for every job.
+    """
+    segments = []
+    for phrases, seg, batcher in ((c_skills, c_segments[0], skills_batcher), (c_cult, c_segments[1], cultural_batcher)):
+        if seg is None:
+            vocab, flat_idx, offsets = build_phrase_segments([[p for p in phrases or [] if p]])
+            vocab_emb = await batcher.encode(vocab) if vocab else np.zeros((0, 0), dtype=np.float32)
+            seg = (vocab_emb, flat_idx, offsets)
+        segments.append(seg)
+    skill_seg, cult_seg = segments
+
+    query = query_vector(skill_seg[0][skill_seg[1]] if len(skill_seg[1]) else None, ANN_POOLING)
+    if query is None:
+        raise HTTPException(status_code=400, detail="No technical skills extracted from the resume to match against open jobs.")
+
+    hits = open_jobs_ann.search(query, max(OPEN_JOBS_SHORTLIST, top_k))
+    if not hits:
+        return []
+    job_ids = [job_id for job_id, _ in hits]
+
+    # Pure vector math: job embeddings come from the job index, candidate segments were encoded above
+    scores_skills = np.array([
+        skills_scorer.calculate_embedding_scores(job_index.profile(j)["skills"], [[]], job_emb=job_index.embeddings("skills", j),
+                                                 candidate_segments=skill_seg)[0] for j in job_ids])
+    scores_cultural = np.array([
+        cultural_scorer.calculate_scores(job_index.profile(j)["soft_skills"], [[]], job_emb=job_index.embeddings("soft_skills", j),
+                                         candidate_segments=cult_seg)[0] for j in job_ids])
+    scores_behavioral = await run_in_threadpool(_behavioral_batch, [candidate_id or "API_REQ"] * len(job_ids), job_ids)
+
+    overall = (scores_skills + scores_cultural + scores_behavioral) / 3
+    order = np.argsort(-overall, kind="stable")[:max(top_k, 0)]
+    return [
+        {
+            "job_id": job_ids[i],
+            "titulo": job_index.profile(job_ids[i]).get("titulo"),
+            "retrieval_similarity": hits[i][1],
+            "scores": {
+                "skills": float(scores_skills[i]),
+                "cultural": float(scores_cultural[i]),
+                "behavioral": float(scores_behavioral[i]),
+                "overall": float(overall[i])
+            }
+        }
+        for i in order
+    ]
 
 @app.post("/predict")
-def predict_score(request: ScoringRequest):
+async def predict_score(request: ScoringRequest):
+    started = time.perf_counter()
+    indexed_candidate = (not request.candidate_data and request.candidate_id is not None
+                         and candidate_index is not None and request.candidate_id in candidate_index)
+    if not request.candidate_data and not request.resume_text:
+        if request.candidate_id is not None and not indexed_candidate:
+            raise HTTPException(status_code=404, detail=f"Candidate '{request.candidate_id}' not found in candidate index.")
+        if request.candidate_id is None:
+            raise HTTPException(status_code=400, detail="Either 'resume_text', 'candidate_data' or 'candidate_id' must be provided.")
+
+    recommend_jobs = bool(request.top_k_jobs) and not (request.job_data or request.job_id or request.job_description)
+    if recommend_jobs and open_jobs_ann is None:
+        raise HTTPException(status_code=503, detail="Open jobs index not available. Run main_profile_index.py.")
+
+    # 0. Start LLM extractions up-front so candidate and job generations overlap
+    cand_extraction = None
+    if not request.candidate_data and not indexed_candidate:
+        prompt = prompt_candidato({'app_cv_pt': request.resume_text})
+        cand_extraction = asyncio.create_task(achamar_llm(prompt, model_name="gemma3:1b"))
+
+    indexed_job = None if request.job_data else _indexed_job(request.job_id)
+
+    job_extraction = None
+    if not request.job_data and not indexed_job and request.job_description:
+        prompt = _job_description_prompt(request.job_description)
+        job_extraction = asyncio.create_task(achamar_llm(prompt, model_name="gemma3:1b"))
+
     # 1. Extract Candidate Data
     # Initialize containers for scoring
     c_skills = []
     c_cult = []
+    c_segments = (None, None)
     cand_data_debug = {} # For response parsing
 
     if request.candidate_data:
@@ -70,12 +347,16 @@ def predict_score(request: ScoringRequest):
         
         # Serialize for response
         cand_data_debug = request.candidate_data.dict()
+
+    elif indexed_candidate:
+        # Known applicant: extracted profile and embeddings come from the candidate index
+        cand_data_debug = candidate_index.profile(request.candidate_id)
+        c_skills, c_cult = cand_data_debug["skills"], cand_data_debug["soft_skills"]
+        c_segments = _indexed_candidates([request.candidate_id])
         
-    elif request.resume_text:
+    else:
         try:
-            prompt_row = {'app_cv_pt': request.resume_text}
-            prompt = prompt_candidato(prompt_row)
-            response_text = chamar_llm(prompt, model_name="gemma3:1b")
+            response_text = await cand_extraction
             cand_data_legacy = extrair_json_limpo(response_text)
             
             # Map legacy dict to lists
@@ -83,13 +364,45 @@ def predict_score(request: ScoringRequest):
             c_cult = cand_data_legacy.get("competencias_comportamentais", [])
             cand_data_debug = cand_data_legacy
         except Exception as e:
+            if job_extraction:
+                job_extraction.cancel()
             raise HTTPException(status_code=500, detail=f"Resume extraction failed: {str(e)}")
-    else:
-         raise HTTPException(status_code=400, detail="Either 'resume_text' or 'candidate_data' must be provided.")
+
+    candidate_source = "payload" if request.candidate_data else "index" if indexed_candidate else "resume"
+    candidate_log = {
+        "candidate_id": request.candidate_id,
+        "candidate_source": candidate_source,
+        "candidate_skills": list(c_skills),
+        "n_candidate_skills": len(c_skills),
+        "n_candidate_soft_skills": len(c_cult),
+    }
+
+    if recommend_jobs:
+        recommended = await _recommend_jobs(c_skills, c_cult, c_segments, request.candidate_id, request.top_k_jobs)
+        latency_ms = (time.perf_counter() - started) * 1000
+        _log_inference([
+            {
+                **candidate_log,
+                "endpoint": "/predict:recommend",
+                "job_id": job["job_id"],
+                "job_source": "open_jobs_index",
+                "score_skills": job["scores"]["skills"],
+                "score_cultural": job["scores"]["cultural"],
+                "score_behavioral": job["scores"]["behavioral"],
+                "latency_ms": latency_ms,
+            }
+            for job in recommended
+        ])
+        return {
+            "candidate_extracted": cand_data_debug,
+            "recommended_jobs": recommended
+        }
 
     # 2. Get Job Data
+    job_source = "payload" if request.job_data else "index" if indexed_job else "description" if job_extraction else None
     j_skills = []
     j_cult = []
+    j_skill_emb = j_cult_emb = None
     job_data_debug = {}
 
     if request.job_data:
@@ -99,22 +412,12 @@ def predict_score(request: ScoringRequest):
             j_cult = request.job_data.requirements.required_soft_skills
         job_data_debug = request.job_data.dict()
         
-    elif request.job_id and df_jobs is not None:
-        job_row = df_jobs.filter(pl.col("codigo_vaga") == request.job_id).head(1)
-        if len(job_row) > 0:
-            pass # Use generic fallback or improve later (legacy flow unimplemented in detail in snippet)
-             
-    if not job_data_debug and request.job_description:
+    elif indexed_job:
+        j_skills, j_cult, j_skill_emb, j_cult_emb, job_data_debug = indexed_job
+
+    if job_extraction:
         try:
-            prompt_row = {
-                'job_ib_titulo_vaga': 'Job',
-                'job_pv_principais_atividades': request.job_description,
-                'job_pv_competencia_tecnicas_e_comportamentais': '',
-                'job_pv_demais_observacoes': '',
-                'job_pv_habilidades_comportamentais_necessarias': ''
-            }
-            prompt = prompt_vaga(prompt_row)
-            response_text = chamar_llm(prompt, model_name="gemma3:1b")
+            response_text = await job_extraction
             job_data_legacy = extrair_json_limpo(response_text)
             
             j_skills = job_data_legacy.get("competencias_tecnicas", []) + job_data_legacy.get("ferramentas_tecnologicas", [])
@@ -124,32 +427,32 @@ def predict_score(request: ScoringRequest):
             print(f"Job extraction warning: {e}")
     
     # Fallback if no skills found (prevents empty vector errors)
-    if not j_skills and not request.job_data:
+    if not j_skills and not request.job_data and not indexed_job:
          # Legacy fallback
          j_skills = ["Python", "Data Science"]
          j_cult = ["Proatividade"]
          job_data_debug = {"note": "fallback_used"}
+         job_source = "fallback"
 
-    # 3. Calculate Scores
-    score_skills = skills_scorer.calculate_embedding_score(j_skills, c_skills)
-    
-    score_cultural = cultural_scorer.calculate_score(j_cult, c_cult)
-    
-    data_dict = {
-        "codigo_candidato": "API_REQ",
-        "codigo_vaga": request.job_id or "API_JOB",
-        "p_comentario": "", 
-        "contem_palavra_chave_positiva": 0,
-        "contem_palavra_chave_negativa": 0,
-        "p_recrutador": "Outros"
-    }
-    df_input = pl.DataFrame([data_dict])
-    try:
-        df_scored = behavioral_scorer.predict(df_input)
-        score_behavioral = df_scored["score_behavioral"][0]
-    except Exception as e:
-        print(f"Behavioral scoring error: {e}")
-        score_behavioral = 0.5
+    # 3. Calculate Scores (encodes are coalesced across concurrent requests)
+    score_skills, score_cultural, score_behavioral = await _score_pair(
+        j_skills, c_skills, j_cult, c_cult, request.job_id, j_skill_emb, j_cult_emb, c_segments,
+        candidate_id=request.candidate_id
+    )
+
+    _log_inference([{
+        **candidate_log,
+        "endpoint": "/predict",
+        "job_id": request.job_id,
+        "job_source": job_source,
+        "job_skills": list(j_skills),
+        "n_job_skills": len(j_skills),
+        "n_job_soft_skills": len(j_cult),
+        "score_skills": float(score_skills),
+        "score_cultural": float(score_cultural),
+        "score_behavioral": float(score_behavioral),
+        "latency_ms": (time.perf_counter() - started) * 1000,
+    }])
 
     return {
         "candidate_extracted": cand_data_debug,
@@ -161,12 +464,160 @@ def predict_score(request: ScoringRequest):
         }
     }
 
+def _resolve_job(job_id: Optional[str], job_data: Optional[JobData]):
+    """(skills, soft skills, skill embeddings | None, soft skill embeddings | None) for /rank-style endpoints."""
+    if job_data:
+        j_skills, j_cult = [], []
+        if job_data.requirements:
+            j_skills = job_data.requirements.required_tech_skills + job_data.requirements.nice_to_have_skills
+            j_cult = job_data.requirements.required_soft_skills
+        return j_skills, j_cult, None, None
+    indexed_job = _indexed_job(job_id)
+    if indexed_job:
+        return indexed_job[:4]
+    if job_id:
+        if job_id not in processed_jobs:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found in feature store.")
+        return (*_legacy_skills(processed_jobs[job_id]), None, None)
+    raise HTTPException(status_code=400, detail="Either 'job_id' or 'job_data' must be provided.")
+
+@app.post("/rank")
+def rank_candidates(request: RankingRequest):
+    """
+    Scores one job against many candidates in a single call.
+    Skill phrases are encoded once per batch and similarities computed as one matrix operation.
+    """
+    return _rank(request, endpoint="/rank")
+
+def _rank(request: RankingRequest, endpoint: str) -> Dict[str, Any]:
+    """Shared by /rank and /candidates_for_job; `endpoint` labels the inference log rows."""
+    started = time.perf_counter()
+    # 1. Resolve Job
+    j_skills, j_cult, j_skill_emb, j_cult_emb = _resolve_job(request.job_id, request.job_data)
+
+    # 2. Resolve Candidates
+    # Candidates in the candidate index are scored from their stored embeddings (no encode)
+    entries = []
+    indexed_pos, indexed_ids = [], []
+    not_found = []
+    for cand_id in request.candidate_ids:
+        if candidate_index is not None and cand_id in candidate_index:
+            indexed_pos.append(len(entries))
+            indexed_ids.append(cand_id)
+            entries.append(({"candidate_id": cand_id}, [], []))
+        elif cand_id in processed_candidates:
+            entries.append(({"candidate_id": cand_id}, *_legacy_skills(processed_candidates[cand_id])))
+        else:
+            not_found.append(cand_id)
+    for i, candidate in enumerate(request.candidates):
+        entries.append(({"payload_index": i}, *_candidate_data_skills(candidate)))
+
+    if not entries:
+        raise HTTPException(status_code=400, detail="No resolvable candidates provided.")
+
+    # 3. Batch Scores
+    scores_skills = np.zeros(len(entries), dtype=np.float32)
+    scores_cultural = np.zeros(len(entries), dtype=np.float32)
+    if indexed_ids:
+        skill_segments, cult_segments = _indexed_candidates(indexed_ids)
+        scores_skills[indexed_pos] = skills_scorer.calculate_embedding_scores(
+            j_skills, [[]] * len(indexed_ids), job_emb=j_skill_emb, candidate_segments=skill_segments)
+        scores_cultural[indexed_pos] = cultural_scorer.calculate_scores(
+            j_cult, [[]] * len(indexed_ids), job_emb=j_cult_emb, candidate_segments=cult_segments)
+    encoded_pos = sorted(set(range(len(entries))) - set(indexed_pos))
+    if encoded_pos:
+        scores_skills[encoded_pos] = skills_scorer.calculate_embedding_scores(
+            j_skills, [entries[i][1] for i in encoded_pos], job_emb=j_skill_emb)
+        scores_cultural[encoded_pos] = cultural_scorer.calculate_scores(
+            j_cult, [entries[i][2] for i in encoded_pos], job_emb=j_cult_emb)
+
+    scores_behavioral = _behavioral_batch(
+        [e[0].get("candidate_id", f"API_REQ_{i}") for i, e in enumerate(entries)],
+        [request.job_id or "API_JOB"] * len(entries),
+    )
+
+    # 4. Top-k by the mean of the three scores
+    overall = (scores_skills + scores_cultural + scores_behavioral) / 3
+    order = np.argsort(-overall, kind="stable")[:max(request.top_k, 0)]
+
+    ranking = [
+        {
+            **entries[i][0],
+            "scores": {
+                "skills": float(scores_skills[i]),
+                "cultural": float(scores_cultural[i]),
+                "behavioral": float(scores_behavioral[i]),
+                "overall": float(overall[i])
+            }
+        }
+        for i in order
+    ]
+
+    # Indexed candidates were scored from stored segments; their phrases come from the index profile
+    indexed_rows = set(indexed_pos)
+    logged_entries = [
+        (meta, *(_profile_skills(candidate_index.profile(meta["candidate_id"])) if i in indexed_rows else (c_skills, c_cult)))
+        for i, (meta, c_skills, c_cult) in enumerate(entries)
+    ]
+    latency_ms = (time.perf_counter() - started) * 1000
+    _log_inference([
+        {
+            "endpoint": endpoint,
+            "job_id": request.job_id,
+            "job_source": "payload" if request.job_data else "index" if j_skill_emb is not None else "feature_store",
+            "job_skills": list(j_skills),
+            "n_job_skills": len(j_skills),
+            "n_job_soft_skills": len(j_cult),
+            "candidate_id": meta.get("candidate_id"),
+            "candidate_source": "payload" if "payload_index" in meta else "index" if i in indexed_rows else "feature_store",
+            "candidate_skills": list(c_skills),
+            "n_candidate_skills": len(c_skills),
+            "n_candidate_soft_skills": len(c_cult),
+            "score_skills": float(scores_skills[i]),
+            "score_cultural": float(scores_cultural[i]),
+            "score_behavioral": float(scores_behavioral[i]),
+            "latency_ms": latency_ms,
+        }
+        for i, (meta, c_skills, c_cult) in enumerate(logged_entries)
+    ])
+    return {"job_id": request.job_id, "ranking": ranking, "not_found": not_found}
+
+@app.post("/candidates_for_job")
+def candidates_for_job(request: CandidateSearchRequest):
+    """
+    Sourcing for a job: retrieves the `top_n` nearest applicants from the ANN index
+    (pooled skill embeddings), then re-ranks that shortlist with the exact scorers (as /rank does).
+    """
+    if candidate_ann is None:
+        raise HTTPException(status_code=503, detail="Candidate ANN index not available. Run main_profile_index.py.")
+
+    j_skills, _, j_skill_emb, _ = _resolve_job(request.job_id, request.job_data)
+    if j_skill_emb is None and j_skills:
+        j_skill_emb = skills_scorer.encode([s for s in j_skills if s])
+    query = query_vector(j_skill_emb, candidate_ann.meta.get("pooling", "mean"))
+    if query is None:
+        raise HTTPException(status_code=400, detail="Job has no technical skills to retrieve candidates with.")
+
+    hits = candidate_ann.search(query, max(request.top_n, request.top_k))
+    if not hits:
+        return {"job_id": request.job_id, "retrieved": 0, "ranking": []}
+
+    similarity = dict(hits)
+    ranked = _rank(RankingRequest(
+        job_id=request.job_id, job_data=request.job_data,
+        candidate_ids=[cand_id for cand_id, _ in hits], top_k=request.top_k,
+    ), endpoint="/candidates_for_job")
+    for entry in ranked["ranking"]:
+        entry["retrieval_similarity"] = similarity[entry["candidate_id"]]
+    return {"job_id": request.job_id, "retrieved": len(hits), "ranking": ranked["ranking"]}
+
 @app.post("/predict_file")
 async def predict_score_file(
     file: UploadFile = File(...),
     job_id: Optional[str] = Form(None),
     job_description: Optional[str] = Form(None),
     use_ocr: bool = Query(False),
+    top_k: Optional[int] = Query(None),
     candidate_data: Optional[str] = Form(None),
     job_data: Optional[str] = Form(None)
 ):
@@ -175,7 +626,8 @@ async def predict_score_file(
         content = await file.read()
         filename = file.filename
         # OCR/Parser Logic: Extracts text to populate 'resume_text' field
-        resume_text = DocumentParser.parse_file(content, filename, use_ocr=use_ocr)
+        # (blocking: pypdf + page OCR on the worker pool, so it runs off the event loop)
+        resume_text = await run_in_threadpool(DocumentParser.parse_file, content, filename, use_ocr=use_ocr)
     except Exception as e:
          raise HTTPException(status_code=400, detail=f"File parsing error: {e}")
          
@@ -206,9 +658,11 @@ async def predict_score_file(
         job_id=job_id,
         job_description=job_description,
         candidate_data=c_data_parsed,
-        job_data=j_data_parsed
+        job_data=j_data_parsed,
+        # top_k without any job reference: recommend the top-k open vacancies (opt-in)
+        top_k_jobs=top_k
     )
-    return predict_score(req)
+    return await predict_score(req)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,93 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class EncoderBatcher:
+    """
+    Micro-batching coalescer for sentence encoders.
+
+    Concurrent requests enqueue their phrases; a background task flushes the queue
+    into a single `encode_fn` call when `max_batch_size` phrases are pending or
+    `max_wait_ms` has elapsed since the first one arrived, then routes each slice
+    of the result back to the awaiting request.
+
+    Encodes run on a dedicated single-thread executor so model calls never
+    compete with each other (or with the request threadpool) for CPU.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None, name: str = "encoder"):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size or int(os.getenv("ENCODER_BATCH_MAX_SIZE", "256"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("ENCODER_BATCH_MAX_WAIT_MS", "5"))) / 1000
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-batcher")
+        self._loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.counters = {"requests": 0, "batches": 0, "phrases": 0}
+
+    def _ensure_worker(self):
+        # Bound to the running loop; rebuilt if the app is served from a new loop (e.g. TestClient per request)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((texts, future))
+        self.counters["requests"] += 1
+        return await future
+
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        batch = [await self._queue.get()]
+        pending = len(batch[0][0])
+        deadline = self._loop.time() + self.max_wait
+        while pending < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            pending += len(item[0])
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Phrases shared by concurrent requests are encoded once
+            unique = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+            try:
+                embeddings = await self._loop.run_in_executor(self._executor, self.encode_fn, unique)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.counters["batches"] += 1
+            self.counters["phrases"] += len(unique)
+            row_of = {text: i for i, text in enumerate(unique)}
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(embeddings[[row_of[t] for t in texts]])
+
+    def stats(self) -> dict:
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "avg_requests_per_batch": self.counters["requests"] / batches if batches else 0.0,
+        }
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Flat, drift-friendly record of what the scoring endpoints see and return
+SCHEMA = pa.schema([
+    ("ts", pa.timestamp("us", tz="UTC")),
+    ("endpoint", pa.string()),
+    ("job_id", pa.string()),
+    ("candidate_id", pa.string()),
+    ("job_source", pa.string()),
+    ("candidate_source", pa.string()),
+    ("job_skills", pa.list_(pa.string())),
+    ("candidate_skills", pa.list_(pa.string())),
+    ("n_job_skills", pa.int32()),
+    ("n_job_soft_skills", pa.int32()),
+    ("n_candidate_skills", pa.int32()),
+    ("n_candidate_soft_skills", pa.int32()),
+    ("score_skills", pa.float64()),
+    ("score_cultural", pa.float64()),
+    ("score_behavioral", pa.float64()),
+    ("latency_ms", pa.float64()),
+])
+
+
+class InferenceLogger:
+    """
+    Non-blocking inference log.
+
+    `log` only appends values to in-memory column buffers under a short lock; a background
+    task (started from the API lifespan) periodically swaps the buffers out, builds one Arrow
+    table and writes it as Parquet under `<root>/dt=YYYY-MM-DD/`, off the event loop.
+    A flush is also triggered early when `max_rows` records are pending.
+    """
+
+    def __init__(self, root: Optional[Path] = None, flush_interval_s: Optional[float] = None,
+                 max_rows: Optional[int] = None):
+        self.root = Path(root or os.getenv("INFERENCE_LOG_DIR", "data/inference_logs"))
+        self.flush_interval_s = flush_interval_s or float(os.getenv("INFERENCE_LOG_FLUSH_SECONDS", "30"))
+        self.max_rows = max_rows or int(os.getenv("INFERENCE_LOG_MAX_ROWS", "5000"))
+        self._lock = threading.Lock()
+        self._columns = self._empty_columns()
+        self._rows = 0
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"logged": 0, "written": 0, "files": 0, "errors": 0, "dropped": 0}
+
+    @staticmethod
+    def _empty_columns() -> Dict[str, List[Any]]:
+        return {name: [] for name in SCHEMA.names}
+
+    def log(self, **record):
+        self.log_many([record])
+
+    def log_many(self, records: Iterable[Dict[str, Any]]):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for record in records:
+                for name, column in self._columns.items():
+                    column.append(record.get(name, now if name == "ts" else None))
+                self._rows += 1
+                self.counters["logged"] += 1
+            full = self._rows >= self.max_rows
+        if full and self._wakeup is not None:
+            # Sync endpoints (e.g. /rank) log from threadpool threads: asyncio.Event is not thread-safe
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:  # loop already closed (shutdown); stop() flushes what is left
+                pass
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _requeue(self, table: pa.Table):
+        """Puts unwritten rows back in front of the buffer, keeping at most 10x `max_rows` (oldest dropped)."""
+        pending = table.to_pydict()
+        with self._lock:
+            for name in SCHEMA.names:
+                self._columns[name] = pending[name] + self._columns[name]
+            self._rows += table.num_rows
+            excess = self._rows - 10 * self.max_rows
+            if excess > 0:
+                for name in SCHEMA.names:
+                    del self._columns[name][:excess]
+                self._rows -= excess
+                self.counters["dropped"] += excess
+
+    def flush(self) -> int:
+        """
+        Writes pending records; returns how many. Safe to call from any thread.
+        If a write fails, the rows of the partitions not yet written go back to the buffer
+        (retried on the next flush) and the error is re-raised.
+        """
+        with self._flush_lock:
+            with self._lock:
+                columns, self._columns = self._columns, self._empty_columns()
+                self._rows = 0
+            if not columns["ts"]:
+                return 0
+
+            table = pa.Table.from_pydict(columns, schema=SCHEMA)
+            days = pc.strftime(table["ts"], format="%Y-%m-%d")
+            token = f"{datetime.now(timezone.utc):%H%M%S}-{uuid.uuid4().hex[:8]}"
+            pending_days = pc.unique(days).to_pylist()
+            written = 0
+            try:
+                while pending_days:
+                    day = pending_days[0]
+                    partition = self.root / f"dt={day}"
+                    partition.mkdir(parents=True, exist_ok=True)
+                    part = table.filter(pc.equal(days, day))
+                    pq.write_table(part, partition / f"part-{token}.parquet")
+                    pending_days.pop(0)
+                    written += part.num_rows
+                    self.counters["files"] += 1
+            except Exception:
+                self._requeue(table.filter(pc.is_in(days, value_set=pa.array(pending_days))))
+                raise
+            finally:
+                self.counters["written"] += written
+            return written
+
+    async def run(self):
+        """Background flush loop; cancel it (see `stop`) to shut down."""
+        self._wakeup = asyncio.Event()
+        loop = self._loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await loop.run_in_executor(None, self.flush)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"[InferenceLogger] Flush failed: {e}")
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {**self.counters, "pending": self._rows}
+
+
+def get_inference_logger() -> Optional[InferenceLogger]:
+    """Process-wide logger. Disable with INFERENCE_LOG_ENABLED=false."""
+    global _default_logger
+    if os.getenv("INFERENCE_LOG_ENABLED", "true").lower() != "true":
+        return None
+    if _default_logger is None:
+        _default_logger = InferenceLogger()
+    return _default_logger
+
+
+_default_logger: Optional[InferenceLogger] = None
@@ -0,0 +1,77 @@
+import sys
+import os
+from datetime import date
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(__file__))
+
+from data_pipeline.pipe.scoring.ann_index import (
+    IVFIndex, build_vector_index, load_vector_index, pooled_vectors, query_vector, save_vector_index,
+)
+from data_pipeline.pipe.scoring.open_jobs import open_job_ids, sync_open_jobs
+from data_pipeline.pipe.scoring.profile_index import ProfileIndex
+from test_profile_index import RECORDS, _scorers
+
+
+def _clustered(n=3000, dim=32, clusters=30, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(0, clusters, n)] + 0.2 * rng.normal(size=(n, dim))
+    return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_ivf_recall_on_clustered_vectors():
+    vectors = _clustered()
+    index = build_vector_index([str(i) for i in range(len(vectors))], vectors, backend="ivf")
+    rng = np.random.default_rng(1)
+    recall = []
+    for q in vectors[rng.choice(len(vectors), 20, replace=False)]:
+        exact = {str(i) for i in np.argsort(-(vectors @ q))[:10]}
+        recall.append(len(exact & {i for i, _ in index.search(q, 10)}) / 10)
+    assert np.mean(recall) >= 0.9
+
+
+def test_ivf_incremental_updates_and_persistence(tmp_path):
+    vectors = _clustered(n=200)
+    index = IVFIndex.train(vectors, nlist=8)
+    index.add([str(i) for i in range(200)], vectors)
+
+    index.remove(["0"])
+    assert "0" not in index and len(index) == 199
+    assert all(item_id != "0" for item_id, _ in index.search(vectors[0], 5, nprobe=8))
+
+    index.add(["1"], -vectors[1])  # upsert
+    assert len(index) == 199
+    assert index.search(-vectors[1], 1, nprobe=8)[0][0] == "1"
+
+    save_vector_index(index, tmp_path / "ann", source_built_at="v1")
+    assert load_vector_index(tmp_path / "ann", source_built_at="v2") is None
+    loaded = load_vector_index(tmp_path / "ann", source_built_at="v1")
+    assert len(loaded) == 199 and loaded.meta["backend"] == "ivf"
+    assert loaded.search(-vectors[1], 1, nprobe=8)[0][0] == "1"
+
+
+def test_pooled_vectors_match_profile_embeddings(tmp_path):
+    skills, cultural = _scorers(tmp_path)
+    profiles = ProfileIndex.build(tmp_path / "candidates", RECORDS + [{"id": "3", "dados": {}}], skills, cultural)
+
+    ids, vectors = pooled_vectors(profiles, "skills", chunk_size=2)
+    assert ids == ["1", "2"]  # profile without skills is left out
+    for item_id, vector in zip(ids, vectors):
+        np.testing.assert_allclose(vector, query_vector(profiles.embeddings("skills", item_id)), atol=1e-6)
+
+
+def test_open_jobs_sync_is_incremental(tmp_path):
+    skills, cultural = _scorers(tmp_path)
+    jobs = [dict(r, data_final=d) for r, d in zip(RECORDS, [None, date(2024, 6, 30)])]
+    jobs.append({"id": "3", "data_final": date(2024, 1, 31), "dados": {"competencias_tecnicas": ["Java"]}})
+    profiles = ProfileIndex.build(tmp_path / "jobs", jobs, skills, cultural)
+
+    assert sorted(open_job_ids(profiles, date(2024, 1, 1))) == ["1", "2", "3"]
+    ann, added, removed = sync_open_jobs(None, profiles, date(2024, 1, 1))
+    assert sorted(ann.item_ids()) == ["1", "2", "3"] and (added, removed) == (3, 0)
+
+    ann, added, removed = sync_open_jobs(ann, profiles, date(2024, 3, 1))
+    assert sorted(ann.item_ids()) == ["1", "2"] and (added, removed) == (0, 1)
@@ -0,0 +1,61 @@
+import sys
+import os
+import polars as pl
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.pipe.scoring.batch_engine import BatchScoringEngine, explode_phrases
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return BatchScoringEngine()
+
+
+@pytest.fixture
+def df_pairs():
+    return pl.DataFrame({
+        "codigo_candidato": ["1", "2", "3", "4"],
+        "codigo_vaga": ["A", "B", "A", "B"],
+        "job_competencias_tecnicas": [["Python", "SQL"], ["Java"], ["Python", "SQL"], ["Java"]],
+        "job_ferramentas_tecnologicas": [["Docker"], None, ["Docker"], None],
+        "app_competencias_tecnicas": [["Java"], ["Java", "Spring"], [], None],
+        "app_ferramentas_tecnologicas": [["Python"], None, ["SQL"], ["Kotlin"]],
+        "job_competencias_comportamentais": [["Foco"], ["Liderança"], ["Foco"], ["Liderança"]],
+        "app_competencias_comportamentais": [["Foco", "Ética"], [], None, ["Comunicação"]],
+        "job_senioridade_aparente": ["Sênior", "Pleno", None, "Júnior"],
+        "app_senioridade_aparente": ["Pleno", "Sênior", "Júnior", None],
+    })
+
+
+def _as_dict(row, prefix):
+    out = {}
+    for key, value in row.items():
+        if key.startswith(prefix):
+            is_list = "competencias" in key or "ferramentas" in key
+            out[key[len(prefix):]] = value if value is not None else ([] if is_list else "")
+    return out
+
+
+def test_explode_phrases_keeps_row_order():
+    df = pl.DataFrame({"_row": [0, 1], "a": [["X", "Y"], None], "b": ["Z", ""]}).with_columns(pl.col("_row").cast(pl.UInt32))
+    long = explode_phrases(df, ["a", "b", "missing"])
+    assert long.rows() == [(0, "X"), (0, "Y"), (0, "Z")]
+
+
+def test_engine_matches_per_row_scorers(engine, df_pairs):
+    scored = engine.score_cultural(engine.score_skills(df_pairs))
+
+    for row, skills, cultural in zip(df_pairs.to_dicts(), scored["score_skills"], scored["score_cultural"]):
+        job, cand = _as_dict(row, "job_"), _as_dict(row, "app_")
+        assert skills == pytest.approx(engine.skills_scorer.get_total_score(job, cand), abs=1e-5)
+        expected = engine.cultural_scorer.calculate_score(
+            row["job_competencias_comportamentais"], row["app_competencias_comportamentais"])
+        assert cultural == pytest.approx(expected, abs=1e-5)
+
+
+def test_cultural_process_dataframe_contract(engine, df_pairs):
+    out = engine.cultural_scorer.process_dataframe(df_pairs)
+    assert out.columns == ["codigo_candidato", "codigo_vaga", "score_cultural"]
+    assert len(out) == len(df_pairs)
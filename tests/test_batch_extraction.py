@@ -0,0 +1,22 @@
+import sys
+import os
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline')))
+
+from batch_extraction import ExtractionCheckpoint
+
+
+def test_checkpoint_is_seeded_once_from_the_legacy_jsonl(tmp_path):
+    legacy = tmp_path / "extracted_resumes_batch.jsonl"
+    legacy.write_text("".join(json.dumps({"codigo_candidato": cid, "skills": []}) + "\n" for cid in [1, 2, 2]))
+    checkpoint = ExtractionCheckpoint(tmp_path / "extracted_resumes_batch" / "checkpoint.sqlite")
+
+    assert checkpoint.seed_from_jsonl(legacy) == 2
+    assert checkpoint.pending([1, 2, 3]) == [3]
+
+    # Already imported: the file is not read again, shard progress is kept
+    checkpoint.mark_done(3, 0)
+    assert checkpoint.seed_from_jsonl(legacy) == 0
+    assert checkpoint.count() == 3
+    assert checkpoint.seed_from_jsonl(tmp_path / "missing.jsonl") == 0
@@ -0,0 +1,95 @@
+import sys
+import os
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import polars as pl
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.pipe.scoring.behavioral import BehavioralScorer
+from data_pipeline.pipe.scoring.behavioral_features import (
+    OTHER_RECRUITER, build_manifest, group_recruiters, manifest_path, save_manifest
+)
+
+PROFILE_COLS = ["app_ib_local", "app_fei_nivel_ingles"]
+REGEX_POSITIVE = r"(?i)(interessad|gostou)"
+REGEX_NEGATIVE = r"(?i)(desisti|sem\sinteresse)"
+FEATURES_NUM = ["percentual_perfil_completo", "tamanho_cv", "sentimento_comentario_score"]
+FEATURES_CAT = ["p_recrutador_tratado"]
+
+
+def _training_frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    comments = rng.choice(["candidato interessado", "desistiu da vaga", "", None], n).tolist()
+    df = pl.DataFrame({
+        "codigo_candidato": [str(i) for i in range(n)],
+        "codigo_vaga": ["V1"] * n,
+        "p_comentario": comments,
+        "p_recrutador": rng.choice(["Ana", " Raquel ", "Raquel", None, "Rara"], n, p=[.4, .2, .2, .195, .005]).tolist(),
+        "app_cv_pt": ["x" * int(k) for k in rng.integers(0, 500, n)],
+        "app_ib_local": rng.choice(["SP", None], n).tolist(),
+        "app_fei_nivel_ingles": rng.choice(["Básico", None], n).tolist(),
+    })
+    features = group_recruiters(df).with_columns(
+        percentual_perfil_completo=sum(pl.col(c).is_not_null().cast(pl.Float64) for c in PROFILE_COLS) / len(PROFILE_COLS),
+        tamanho_cv=pl.col("app_cv_pt").str.len_chars().fill_null(0),
+        sentimento_comentario_score=pl.when(pl.col("p_comentario").str.contains(REGEX_POSITIVE).fill_null(False)).then(1)
+        .when(pl.col("p_comentario").str.contains(REGEX_NEGATIVE).fill_null(False)).then(-1).otherwise(0),
+    ).to_pandas()
+    y = (features["sentimento_comentario_score"] + rng.normal(0, 0.5, n) > 0).astype(int)
+    return df, features, y
+
+
+def _export(tmp_path):
+    df, features, y = _training_frame()
+    preprocessor = ColumnTransformer([
+        ("num", StandardScaler(), FEATURES_NUM),
+        ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), FEATURES_CAT),
+    ])
+    X = preprocessor.fit_transform(features[FEATURES_NUM + FEATURES_CAT])
+    model = lgb.LGBMClassifier(n_estimators=20, verbose=-1).fit(X, y)
+
+    model_path = tmp_path / "behavioral_model.pkl"
+    joblib.dump(model, model_path)
+    save_manifest(build_manifest(preprocessor, FEATURES_NUM, FEATURES_CAT, PROFILE_COLS, REGEX_POSITIVE, REGEX_NEGATIVE),
+                  manifest_path(model_path))
+    return model_path, model, preprocessor, df, features
+
+
+def test_compiled_pipeline_matches_training_preprocessing(tmp_path):
+    model_path, model, preprocessor, df, features = _export(tmp_path)
+    scorer = BehavioralScorer(model_path=str(model_path))
+
+    expected = model.predict_proba(preprocessor.transform(features[FEATURES_NUM + FEATURES_CAT]))[:, 1]
+    scored = scorer.predict(df)
+    assert scored.columns == ["codigo_candidato", "codigo_vaga", "score_behavioral"]
+    np.testing.assert_allclose(scored["score_behavioral"].to_numpy(), expected, atol=1e-9)
+
+    # Single-row API payload: absent source columns are nulls, unknown recruiters fall into "Outros"
+    row = pl.DataFrame({"codigo_candidato": ["A"], "codigo_vaga": ["V"], "p_comentario": [""], "p_recrutador": ["Fulano"]})
+    assert 0.0 <= scorer.predict(row)["score_behavioral"][0] <= 1.0
+
+
+def test_model_without_manifest_uses_heuristic(tmp_path):
+    model_path, *_ = _export(tmp_path)
+    manifest_path(model_path).unlink()
+    scorer = BehavioralScorer(model_path=str(model_path))
+
+    row = pl.DataFrame({"codigo_candidato": ["A"], "codigo_vaga": ["V"], "p_comentario": ["muito motivado"], "p_recrutador": ["Ana"]})
+    assert scorer.pipeline is None
+    assert scorer.predict(row)["score_behavioral"][0] == 0.9
+
+
+def test_null_and_rare_recruiters_are_encoded_like_training(tmp_path):
+    model_path, model, preprocessor, df, features = _export(tmp_path)
+    assert set(features["p_recrutador_tratado"]) == {"Ana", "Raquel", OTHER_RECRUITER}
+    scorer = BehavioralScorer(model_path=str(model_path))
+
+    rows = df.head(3).with_columns(pl.Series("p_recrutador", [None, " Raquel ", "Rara"], dtype=pl.Utf8))
+    encoded = features.head(3).assign(p_recrutador_tratado=[OTHER_RECRUITER, "Raquel", OTHER_RECRUITER])
+    expected = model.predict_proba(preprocessor.transform(encoded[FEATURES_NUM + FEATURES_CAT]))[:, 1]
+    np.testing.assert_allclose(scorer.predict(rows)["score_behavioral"].to_numpy(), expected, atol=1e-9)
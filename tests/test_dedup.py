@@ -0,0 +1,39 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_pipeline')))
+
+from data_pipeline.pipe.features.dedup import (
+    CAMPOS_TEXTO_CANDIDATO, CAMPOS_TEXTO_VAGA, hash_texto, planejar_deduplicacao
+)
+
+
+def test_hash_ignores_case_and_whitespace():
+    a = {"app_cv_pt": "Analista  de Dados\nPython"}
+    b = {"app_cv_pt": "analista de dados python "}
+    assert hash_texto(a, CAMPOS_TEXTO_CANDIDATO) == hash_texto(b, CAMPOS_TEXTO_CANDIDATO)
+    assert hash_texto(a, CAMPOS_TEXTO_CANDIDATO) != hash_texto({"app_cv_pt": "Java"}, CAMPOS_TEXTO_CANDIDATO)
+
+
+def test_plan_fans_out_identical_texts():
+    rows = [
+        {"codigo_candidato": "1", "app_cv_pt": "Python SQL"},
+        {"codigo_candidato": "2", "app_cv_pt": "python  sql"},
+        {"codigo_candidato": "1", "app_cv_pt": "Python SQL"},  # mesmo ID em outra vaga
+        {"codigo_candidato": "3", "app_cv_pt": ""},
+        {"codigo_candidato": "4", "app_cv_pt": None},
+        {"codigo_candidato": "5", "app_cv_pt": "Java"},
+    ]
+    plano = planejar_deduplicacao(rows, "codigo_candidato", CAMPOS_TEXTO_CANDIDATO)
+
+    assert plano.total_ids == 5
+    assert len(plano.representantes) == 3
+    assert plano.chamadas_economizadas == 2
+    assert sorted(map(sorted, plano.donos.values())) == [["1", "2"], ["3", "4"], ["5"]]
+
+
+def test_job_fields_are_all_part_of_the_key():
+    base = {campo: "texto" for campo in CAMPOS_TEXTO_VAGA}
+    outra = dict(base, job_pv_demais_observacoes="remoto")
+    assert hash_texto(base, CAMPOS_TEXTO_VAGA) != hash_texto(outra, CAMPOS_TEXTO_VAGA)
@@ -0,0 +1,117 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.pipe.ingest import document_parser
+from data_pipeline.pipe.ingest.document_parser import DocumentParser
+
+
+class _FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        return self.text
+
+
+class _FakeEngine:
+    def __init__(self, page_text):
+        self.page_text = page_text
+        self.calls = []
+
+    def extract_page(self, image):
+        self.calls.append(image)
+        return self.page_text
+
+
+@pytest.fixture
+def scanned_pdf(monkeypatch):
+    """A 12-page PDF without a text layer; rasterized pages are their page numbers."""
+    rasterized = []
+
+    def convert_from_bytes(file_bytes, dpi, first_page, last_page):
+        rasterized.append((first_page, last_page, dpi))
+        return list(range(first_page, last_page + 1))
+
+    engine = _FakeEngine("x" * 1000)
+    monkeypatch.setattr(document_parser, "PdfReader", lambda _: type("R", (), {"pages": [_FakePage("")] * 12})())
+    monkeypatch.setattr(document_parser, "convert_from_bytes", convert_from_bytes)
+    monkeypatch.setattr(document_parser, "OCR_WORKERS", 1)
+    monkeypatch.setattr(document_parser, "_engine", engine)
+    monkeypatch.setattr(document_parser, "_engine_ready", True)
+    return rasterized, engine
+
+
+def test_ocr_rasterizes_one_page_at_a_time_up_to_the_page_cap(scanned_pdf, monkeypatch):
+    rasterized, engine = scanned_pdf
+    monkeypatch.setattr(document_parser, "OCR_MAX_PAGES", 3)
+
+    text = document_parser.ocr_pdf_pages(b"%PDF", [1, 2, 3], dpi=150, target_chars=0)
+    assert list(text) == [1, 2, 3]
+    assert rasterized == [(1, 1, 150), (2, 2, 150), (3, 3, 150)]
+
+    rasterized.clear()
+    DocumentParser.extract_text_from_pdf_bytes(b"%PDF")
+    assert [first for first, _, _ in rasterized] == [1, 2, 3]
+
+
+def test_ocr_stops_once_enough_text_was_extracted(scanned_pdf):
+    rasterized, engine = scanned_pdf
+    text = document_parser.ocr_pdf_pages(b"%PDF", list(range(1, 13)), target_chars=2500)
+    assert list(text) == [1, 2, 3]
+    assert engine.calls == [1, 2, 3]
+
+
+def test_ocr_engine_is_built_once_per_process(monkeypatch):
+    built = []
+
+    class FakeAdapter:
+        def __init__(self):
+            built.append(self)
+
+    monkeypatch.setattr(document_parser, "PaddleOCR", object())
+    monkeypatch.setattr(document_parser, "PaddleOCRAdapter", FakeAdapter)
+    monkeypatch.setattr(document_parser, "_engine", None)
+    monkeypatch.setattr(document_parser, "_engine_ready", False)
+
+    assert DocumentParser.get_ocr_provider() is DocumentParser.get_ocr_provider()
+    assert len(built) == 1
+
+
+def test_only_pages_without_text_layer_are_ocrd(scanned_pdf, monkeypatch):
+    rasterized, engine = scanned_pdf
+    engine.page_text = "scanned page"
+    layer = "texto extraído da camada de texto " * 3
+    pages = [_FakePage(layer), _FakePage(""), _FakePage(layer), _FakePage("  "), _FakePage(layer)]
+    monkeypatch.setattr(document_parser, "PdfReader", lambda _: type("R", (), {"pages": pages})())
+
+    text = DocumentParser.extract_text_from_pdf_bytes(b"%PDF")
+    assert [first for first, _, _ in rasterized] == [2, 4]
+    assert text == "".join(t + "\n" for t in [layer, "scanned page", layer, "scanned page", layer])
+
+    # Text-only documents never reach the rasterizer; force_ocr OCRs every page
+    rasterized.clear()
+    monkeypatch.setattr(document_parser, "PdfReader", lambda _: type("R", (), {"pages": [pages[0]] * 3})())
+    assert DocumentParser.extract_text_from_pdf_bytes(b"%PDF") == (layer + "\n") * 3
+    assert rasterized == []
+    DocumentParser.extract_text_from_pdf_bytes(b"%PDF", force_ocr=True)
+    assert [first for first, _, _ in rasterized] == [1, 2, 3]
+
+
+def test_page_whose_text_layer_fails_is_ocrd_and_later_pages_are_kept(scanned_pdf, monkeypatch):
+    rasterized, engine = scanned_pdf
+    engine.page_text = "scanned page"
+    layer = "texto extraído da camada de texto " * 3
+
+    class BrokenPage:
+        def extract_text(self):
+            raise KeyError("/Font")
+
+    pages = [_FakePage(layer), BrokenPage(), _FakePage(layer)]
+    monkeypatch.setattr(document_parser, "PdfReader", lambda _: type("R", (), {"pages": pages})())
+
+    text = DocumentParser.extract_text_from_pdf_bytes(b"%PDF")
+    assert [first for first, _, _ in rasterized] == [2]
+    assert text == "".join(t + "\n" for t in [layer, "scanned page", layer])
@@ -0,0 +1,95 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import polars as pl
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dags')))
+
+from utils.drift_sketches import DatasetSketch, drift_summary, psi, update_daily_sketches, window_sketch
+
+
+def _frame(n, shift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return pl.DataFrame({
+        "score_skills": rng.normal(shift, 1, n),
+        "endpoint": rng.choice(["/predict", "/rank"], n, p=[0.8 - shift / 4, 0.2 + shift / 4]).tolist(),
+        "n_candidate_skills": rng.integers(0, 20, n),
+    })
+
+
+def test_sketches_merge_exactly_and_detect_shift(tmp_path):
+    reference = DatasetSketch.fit(_frame(5000))
+
+    day1, day2 = _frame(1000, seed=1), _frame(1000, seed=2)
+    merged = reference.sketch(day1).merge(reference.sketch(day2))
+    whole = reference.sketch(pl.concat([day1, day2]))
+    for name, sketch in whole.columns.items():
+        np.testing.assert_array_equal(merged.columns[name].distribution(), sketch.distribution())
+
+    stable = drift_summary(reference, merged)
+    assert not stable["dataset_drift"] and stable["number_of_drifted_columns"] == 0
+
+    shifted = drift_summary(reference, reference.sketch(_frame(2000, shift=1.0, seed=3).lazy()))
+    assert shifted["columns"]["score_skills"]["drifted"] and shifted["columns"]["endpoint"]["drifted"]
+    assert not shifted["columns"]["n_candidate_skills"]["drifted"]
+    assert psi(np.array([10, 10]), np.array([10, 10])) == 0.0
+
+    reference.save(tmp_path / "ref.json")
+    loaded = DatasetSketch.load(tmp_path / "ref.json")
+    assert drift_summary(loaded, merged) == stable
+
+
+def test_daily_sketches_are_built_per_partition(tmp_path):
+    reference = DatasetSketch.fit(_frame(2000))
+    today = datetime.now(timezone.utc).date()
+    for offset in (0, 2, 30):
+        partition = tmp_path / "logs" / f"dt={today - timedelta(days=offset)}"
+        partition.mkdir(parents=True)
+        _frame(100, seed=offset).write_parquet(partition / "part-0.parquet")
+
+    paths = update_daily_sketches(reference, tmp_path / "logs", tmp_path / "sketches", days=7)
+    assert len(paths) == 2  # partition from 30 days ago is outside the window
+    assert window_sketch(paths).rows == 200
+
+
+def test_daily_sketches_follow_a_rebuilt_reference(tmp_path):
+    today = datetime.now(timezone.utc).date()
+    partition = tmp_path / "logs" / f"dt={today - timedelta(days=2)}"
+    partition.mkdir(parents=True)
+    _frame(300, seed=2).write_parquet(partition / "part-0.parquet")
+
+    old_reference = DatasetSketch.fit(_frame(2000, shift=1.0, seed=5), bins=10)
+    update_daily_sketches(old_reference, tmp_path / "logs", tmp_path / "sketches", days=7)
+
+    # Reference rebuilt (other edges and bucket count): the cached past day is re-sketched
+    new_reference = DatasetSketch.fit(_frame(2000, seed=1))
+    paths = update_daily_sketches(new_reference, tmp_path / "logs", tmp_path / "sketches", days=7)
+    fresh = new_reference.sketch(_frame(300, seed=2))
+    assert window_sketch(paths).reference == new_reference.bucket_fingerprint()
+    assert drift_summary(new_reference, window_sketch(paths)) == drift_summary(new_reference, fresh)
+
+    # A stale sketch whose logs are gone is left out of the window
+    (partition / "part-0.parquet").unlink()
+    assert update_daily_sketches(old_reference, tmp_path / "logs", tmp_path / "sketches", days=7) == []
+
+
+def test_day_sketched_before_its_logs_were_complete_is_resketched(tmp_path):
+    reference = DatasetSketch.fit(_frame(2000))
+    today = datetime.now(timezone.utc).date()
+    partition = tmp_path / "logs" / f"dt={today - timedelta(days=1)}"
+    partition.mkdir(parents=True)
+    _frame(10, seed=1).write_parquet(partition / "part-0.parquet")
+    paths = update_daily_sketches(reference, tmp_path / "logs", tmp_path / "sketches", days=7)
+    assert window_sketch(paths).rows == 10
+
+    # The API kept logging to that day after the run that sketched it
+    _frame(500, seed=2).write_parquet(partition / "part-1.parquet")
+    paths = update_daily_sketches(reference, tmp_path / "logs", tmp_path / "sketches", days=7)
+    assert window_sketch(paths).rows == 510
+
+    # Unchanged partition: the cached sketch is reused
+    mtime = paths[0].stat().st_mtime_ns
+    update_daily_sketches(reference, tmp_path / "logs", tmp_path / "sketches", days=7)
+    assert paths[0].stat().st_mtime_ns == mtime
@@ -0,0 +1,89 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.pipe.scoring.embedding_store import EmbeddingStore, normalize_phrase
+
+
+class CountingEncoder:
+    """Deterministic fake encoder that records every phrase it encodes."""
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        vecs = np.stack([np.random.default_rng(abs(hash(t)) % 2**32).normal(size=self.dim) for t in texts])
+        return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_normalize_phrase_collapses_whitespace():
+    assert normalize_phrase("  PYTHON   3 ") == "PYTHON 3"
+
+
+def test_memory_tier_avoids_reencoding(tmp_path):
+    encoder = CountingEncoder()
+    store = EmbeddingStore(root=tmp_path, persist=False)
+
+    first = store.encode(encoder, "m", ["PYTHON", "SQL", "PYTHON"])
+    second = store.encode(encoder, "m", ["SQL", " PYTHON"])
+
+    assert encoder.calls == [["PYTHON", "SQL"]]
+    np.testing.assert_allclose(first[0], first[2])
+    np.testing.assert_allclose(second[1], first[0])
+    assert store.stats()["misses"] == 2
+    assert store.stats()["memory_hits"] == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    encoder = CountingEncoder()
+    store = EmbeddingStore(root=tmp_path, flush_every=1)
+    original = store.encode(encoder, "model/a", ["PROATIVIDADE", "LIDERANÇA"])
+
+    # New process: empty LRU, same directory
+    restarted = EmbeddingStore(root=tmp_path)
+    reloaded = restarted.encode(encoder, "model/a", ["LIDERANÇA", "PROATIVIDADE"])
+
+    assert len(encoder.calls) == 1
+    np.testing.assert_allclose(reloaded, original[::-1])
+    assert restarted.stats()["disk_hits"] == 2
+
+    # Appending more phrases keeps earlier rows valid
+    restarted.encode(encoder, "model/a", ["COMUNICAÇÃO"])
+    restarted.flush()
+    third = EmbeddingStore(root=tmp_path)
+    third.encode(encoder, "model/a", ["PROATIVIDADE", "COMUNICAÇÃO"])
+    assert third.stats()["disk_hits"] == 2
+
+
+def test_disk_tier_is_refreshed_once_per_batch_and_survives_a_replaced_file(tmp_path, monkeypatch):
+    encoder = CountingEncoder()
+    EmbeddingStore(root=tmp_path, flush_every=1).encode(encoder, "m", ["PYTHON", "SQL", "GO"])
+
+    store = EmbeddingStore(root=tmp_path)
+    disk = store._disk_tier("m")
+    refreshes = []
+    original_refresh = disk.refresh
+    monkeypatch.setattr(disk, "refresh", lambda: refreshes.append(1) or original_refresh())
+    store.encode(encoder, "m", ["PYTHON", "SQL", "GO"])
+    assert len(refreshes) == 1 and store.stats()["disk_hits"] == 3
+
+    # Another process grows the matrix; its file vanishes between our index stat and the mmap
+    EmbeddingStore(root=tmp_path, flush_every=1).encode(encoder, "m", ["JAVA"])
+    real_load = np.load
+
+    def vanished(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(np, "load", vanished)
+    disk.refresh()
+    assert disk.lookup("PYTHON") is not None and disk.lookup("JAVA") is None
+
+    monkeypatch.setattr(np, "load", real_load)
+    disk.refresh()
+    assert disk.lookup("JAVA") is not None
@@ -0,0 +1,61 @@
+import sys
+import os
+import asyncio
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from serving.encoder_batcher import EncoderBatcher
+
+
+class RecordingEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_share_one_encode():
+    encoder = RecordingEncoder()
+    batcher = EncoderBatcher(encoder, max_batch_size=100, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.encode(["python", "sql"]),
+            batcher.encode(["sql"]),
+            batcher.encode(["docker", "python", "aws"]),
+        )
+
+    first, second, third = asyncio.run(run())
+
+    assert encoder.calls == [["python", "sql", "docker", "aws"]]
+    np.testing.assert_array_equal(first[:, 0], [6, 3])
+    np.testing.assert_array_equal(second[:, 0], [3])
+    np.testing.assert_array_equal(third[:, 0], [6, 6, 3])
+
+
+def test_flushes_at_max_batch_size():
+    encoder = RecordingEncoder()
+    batcher = EncoderBatcher(encoder, max_batch_size=2, max_wait_ms=1000)
+
+    async def run():
+        return await asyncio.gather(*(batcher.encode([f"s{i}", f"t{i}"]) for i in range(3)))
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert len(encoder.calls) == 3
+    assert [len(r) for r in results] == [2, 2, 2]
+
+
+def test_encode_errors_reach_every_waiter():
+    def failing(texts):
+        raise RuntimeError("model crashed")
+
+    batcher = EncoderBatcher(failing, max_wait_ms=1)
+
+    async def run():
+        return await asyncio.gather(batcher.encode(["a"]), batcher.encode(["b"]), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
@@ -0,0 +1,36 @@
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("onnxruntime")
+
+from data_pipeline.pipe.scoring.encoders import OnnxSentenceEncoder, export_onnx, load_encoder, parity_check
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    return export_onnx("all-MiniLM-L6-v2", tmp_path_factory.mktemp("onnx"), quantize=True)
+
+
+def test_onnx_int8_matches_torch(exported):
+    from sentence_transformers import SentenceTransformer
+
+    onnx_encoder = OnnxSentenceEncoder(exported, intra_op_threads=1)
+    deviation = parity_check(SentenceTransformer("all-MiniLM-L6-v2", device="cpu"), onnx_encoder)
+    assert deviation < 0.05
+
+    embeddings = onnx_encoder.encode(["Python", "Comunicação assertiva com clientes"])
+    assert embeddings.shape == (2, onnx_encoder.get_sentence_embedding_dimension())
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-5)
+
+
+def test_backend_selection(exported, monkeypatch):
+    monkeypatch.setenv("ENCODER_BACKEND", "onnx")
+    monkeypatch.setenv("ENCODER_ONNX_DIR", str(exported.parent))
+    monkeypatch.setattr("data_pipeline.pipe.scoring.encoders._model_slug", lambda name: exported.name)
+    encoder = load_encoder("all-MiniLM-L6-v2")
+    assert isinstance(encoder, OnnxSentenceEncoder)
+    assert encoder.store_key == "all-MiniLM-L6-v2@onnx-int8"
@@ -0,0 +1,47 @@
+import sys
+import os
+import polars as pl
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.pipe.features.feature_store import (
+    FeatureStoreWriter, scan_feature_store, read_manifest, resolve_feature_store_path
+)
+
+
+def _row(i, skills=None):
+    return {"codigo_candidato": str(i), "codigo_vaga": "V1", "job_competencias_tecnicas": skills, "nota": None}
+
+
+def test_writer_flushes_row_groups_and_commits_manifest(tmp_path):
+    dataset = tmp_path / "resultado_final"
+    with FeatureStoreWriter(dataset, row_group_size=2) as writer:
+        writer.extend([_row(0, ["PYTHON"]), _row(1, []), _row(2), _row(3, ["SQL"]), _row(4)])
+        # Two full row groups committed while the fifth row is still buffered
+        assert read_manifest(dataset)["parts"] == ["part-00000.parquet", "part-00001.parquet"]
+
+    manifest = read_manifest(dataset)
+    assert manifest["rows"] == 5
+    assert len(manifest["parts"]) == 3
+
+    df = scan_feature_store(dataset).collect()
+    assert df["codigo_candidato"].to_list() == ["0", "1", "2", "3", "4"]
+    assert df.schema["job_competencias_tecnicas"] == pl.List(pl.Utf8)
+    assert resolve_feature_store_path(dataset) == dataset
+
+
+def test_resume_skips_committed_keys_and_drops_orphans(tmp_path):
+    dataset = tmp_path / "resultado_final"
+    with FeatureStoreWriter(dataset) as writer:
+        writer.extend([_row(0), _row(1)])
+
+    # Simulated crash: a part file was written but never committed
+    (dataset / "part-00001.parquet").write_bytes(b"partial")
+
+    writer = FeatureStoreWriter(dataset)
+    assert not (dataset / "part-00001.parquet").exists()
+    assert writer.committed_keys() == {("0", "V1"), ("1", "V1")}
+
+    writer.append(_row(2))
+    writer.close()
+    assert len(scan_feature_store(dataset).collect()) == 3
@@ -0,0 +1,65 @@
+import sys
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import polars as pl
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline')))
+
+from pipe.features.cleanning_and_accurate import gerar_features, gerar_features_lazy
+
+
+def _joined_frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    texto = lambda valores: rng.choice(np.array(valores, dtype=object), n).tolist()
+    datas = lambda: [None if rng.random() < 0.1 else date(2021, 1, 1) + timedelta(days=int(d)) for d in rng.integers(0, 365, n)]
+    return pl.DataFrame({
+        "codigo_vaga": [str(i % 17) for i in range(n)],
+        "codigo_candidato": [str(i) for i in range(n)],
+        "p_nome": texto(["Ana", "Bia"]),
+        "p_data_candidatura": datas(),
+        "app_ib_telefone": texto(["1199", "", None]),
+        "app_ib_email": texto(["a@b.com", None]),
+        "app_ip_url_linkedin": texto(["in/x", ""]),
+        "app_ip_endereco": texto(["Rua A, São Paulo", "Campinas", "", None]),
+        "app_ip_facebook": texto([None, "fb"]),
+        "app_ib_local": texto(["São Paulo", "Rio de Janeiro", None]),
+        "app_ip_pcd": texto(["Sim", "", None]),
+        "app_ib_data_criacao": datas(),
+        "app_ib_data_atualizacao": datas(),
+        "job_pv_estado": texto(["São Paulo", "Minas Gerais", None]),
+        "job_pv_cidade": texto(["Campinas", "Belo Horizonte", ""]),
+        "job_pv_bairro": texto([None, "Centro"]),
+        "job_pv_regiao": texto([None, "Sudeste"]),
+        "job_pv_local_trabalho": texto(["2000", "Remoto", None]),
+        "job_pv_vaga_especifica_para_pcd": texto(["SIM", "NÃO"]),
+        "job_ib_prioridade_vaga": texto(["Alta", "média", None, "baixa"]),
+        "job_ib_tipo_contratacao": texto(["CLT Full, PJ/Autônomo", "", None]),
+        "job_pv_areas_atuacao": texto(["TI - Desenvolvimento", None]),
+        "job_ib_data_inicial": datas(),
+        "job_ib_data_final": datas(),
+        "job_ib_data_requicisao": datas(),
+        "job_ib_limite_esperado_para_contratacao": datas(),
+        "job_b_valor_venda": texto(["", "100", None]),
+        "job_b_valor_compra_1": texto([None, "50"]),
+        "job_b_valor_compra_2": texto([None, "10"]),
+    })
+
+
+def test_lazy_plan_matches_eager_and_prunes_projection(tmp_path):
+    df = _joined_frame()
+    eager = gerar_features(df)
+    assert "app_ip_cpf" not in eager.columns and "p_nome" not in eager.columns
+    assert eager["ind_mesma_localidade"].any()
+
+    path = tmp_path / "joined.parquet"
+    df.write_parquet(path)
+    colunas = ["codigo_candidato", "ind_mesma_localidade", "job_ib_prioridade_vaga", "tempo_vaga_aberta", "match_pcd"]
+    plano = gerar_features_lazy(pl.scan_parquet(path).filter(pl.col("codigo_vaga") != "0"), colunas=colunas)
+    lazy = plano.collect(streaming=True)
+
+    esperado = eager.filter(pl.col("codigo_vaga") != "0").select(colunas)
+    assert lazy.sort("codigo_candidato").to_dicts() == esperado.sort("codigo_candidato").to_dicts()
+    # Projection pushdown: the scan reads only the columns the selected features depend on
+    assert "app_ip_cpf" not in plano.explain() and "job_b_valor_venda" not in plano.explain()
@@ -0,0 +1,117 @@
+import sys
+import os
+import polars as pl
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline')))
+
+from data_pipeline.pipe.features.feature_store import scan_feature_store
+from pipe.features.cleanning_and_accurate import aplicar_features_de_referencia
+from data_pipeline.pipe.features.incremental_store import (
+    FP_CANDIDATO, FP_PROSPECT, FP_VAGA, IncrementalFeatureStore, with_fingerprint
+)
+
+
+def _fonte(jobs, applicants, prospects):
+    jobs = with_fingerprint(pl.DataFrame(jobs), FP_VAGA)
+    applicants = with_fingerprint(pl.DataFrame(applicants), FP_CANDIDATO)
+    prospects = with_fingerprint(pl.DataFrame(prospects), FP_PROSPECT)
+    return prospects.join(applicants, on="codigo_candidato").join(jobs, on="codigo_vaga")
+
+
+JOBS = {"codigo_vaga": ["V1", "V2"], "titulo": ["Dev Python", "Analista SQL"]}
+APPLICANTS = {"codigo_candidato": ["C1", "C2", "C3"], "cv": ["python", "sql", None]}
+PROSPECTS = {"codigo_candidato": ["C1", "C2", "C3", "C1"], "codigo_vaga": ["V1", "V1", "V2", "V2"],
+             "situacao": ["a", "b", "c", "d"]}
+
+
+def _upsert_all(store, fonte, delta):
+    linhas = fonte.join(delta.alterados.select("codigo_candidato", "codigo_vaga"),
+                        on=["codigo_candidato", "codigo_vaga"], how="semi")
+    return store.upsert(linhas.with_columns(pl.col("titulo").str.to_uppercase().alias("feature")), delta.removidos)
+
+
+def test_plan_detects_new_changed_and_removed_pairs(tmp_path):
+    store = IncrementalFeatureStore(tmp_path / "store", n_buckets=4)
+    fonte = _fonte(JOBS, APPLICANTS, PROSPECTS)
+
+    delta = store.plan(fonte)
+    assert len(delta) == 4 and delta.removidos.height == 0
+    assert _upsert_all(store, fonte, delta) == 1
+
+    # Nothing changed: empty delta, version unchanged
+    delta = store.plan(fonte)
+    assert len(delta) == 0 and delta.removidos.height == 0
+    assert _upsert_all(store, fonte, delta) == 1
+
+    # V2 edited, C3 unchanged, prospect (C2, V1) dropped, (C3, V1) added
+    jobs = dict(JOBS, titulo=["Dev Python", "Analista SQL Sr"])
+    prospects = {"codigo_candidato": ["C1", "C3", "C1", "C3"], "codigo_vaga": ["V1", "V2", "V2", "V1"],
+                 "situacao": ["a", "c", "d", "e"]}
+    fonte = _fonte(jobs, APPLICANTS, prospects)
+    delta = store.plan(fonte)
+
+    alterados = set(delta.alterados.select("codigo_candidato", "codigo_vaga").iter_rows())
+    assert alterados == {("C3", "V2"), ("C1", "V2"), ("C3", "V1")}
+    assert set(delta.removidos.iter_rows()) == {("C2", "V1")}
+    assert delta.vagas_alteradas == {"V2"}
+    assert delta.candidatos_alterados == set()
+
+    assert _upsert_all(store, fonte, delta) == 2
+    df = scan_feature_store(store.dataset_dir).collect().sort("codigo_candidato", "codigo_vaga")
+    assert list(df.select("codigo_candidato", "codigo_vaga").iter_rows()) == [
+        ("C1", "V1"), ("C1", "V2"), ("C3", "V1"), ("C3", "V2")]
+    assert df.filter(pl.col("codigo_vaga") == "V2")["feature"].to_list() == ["ANALISTA SQL SR"] * 2
+
+    # changed_since only returns rows rewritten after the given version
+    mudou = store.changed_since(1).collect()
+    assert set(mudou.select("codigo_candidato", "codigo_vaga").iter_rows()) == alterados
+    assert store.changed_since(2).collect().height == 0
+
+
+def test_reopen_keeps_committed_buckets_and_drops_orphans(tmp_path):
+    store = IncrementalFeatureStore(tmp_path / "store", n_buckets=4)
+    fonte = _fonte(JOBS, APPLICANTS, PROSPECTS)
+    _upsert_all(store, fonte, store.plan(fonte))
+
+    orphan = store.dataset_dir / "bucket_000" / "part-v000099.parquet"
+    orphan.parent.mkdir(exist_ok=True)
+    orphan.write_bytes(b"partial")
+
+    reopened = IncrementalFeatureStore(store.dataset_dir, n_buckets=8)
+    assert not orphan.exists()
+    assert reopened.version == 1 and reopened.n_buckets == 4
+    assert reopened.scan().collect().height == 4
+    assert len(reopened.plan(fonte)) == 0
+
+
+def test_new_prospect_advancing_the_reference_date_only_rewrites_its_pair(tmp_path):
+    store = IncrementalFeatureStore(tmp_path / "store", n_buckets=4)
+    jobs = dict(JOBS, job_ib_data_requicisao=[date(2021, 1, 1), date(2021, 1, 20)],
+                job_ib_data_final=[date(2021, 2, 15), None])
+    prospects = dict(PROSPECTS, p_data_candidatura=[date(2021, 2, 1)] * 4)
+    store.upsert(_fonte(jobs, APPLICANTS, prospects))
+
+    # A new application on a later date moves the base's reference date
+    prospects = {col: values + [novo] for (col, values), novo in
+                 zip(prospects.items(), ["C2", "V2", "e", date(2021, 3, 1)])}
+    fonte = _fonte(jobs, APPLICANTS, prospects)
+    delta = store.plan(fonte)
+    assert set(delta.chaves().iter_rows()) == {("C2", "V2")}
+    store.upsert(fonte.join(delta.chaves(), on=["codigo_candidato", "codigo_vaga"], how="semi"))
+    assert set(store.changed_since(1).collect().select("codigo_candidato", "codigo_vaga").iter_rows()) == {("C2", "V2")}
+
+    # Reference-dependent features are derived at read time from the raw dates, for every row
+    lidas = aplicar_features_de_referencia(store.scan()).collect()
+    assert set(lidas["dias_desde_requisicao"].to_list()) == {59, 40}
+    assert set(lidas["vaga_em_aberto_no_momento"].to_list()) == {0, -1}
+    assert lidas.height == 5
+
+
+def test_fingerprints_survive_a_round_trip_through_row_dicts(tmp_path):
+    store = IncrementalFeatureStore(tmp_path / "store", n_buckets=4)
+    fonte = _fonte(JOBS, APPLICANTS, PROSPECTS)
+    # processar_dataframe rebuilds the rows from dicts: fingerprints must not become floats
+    store.upsert(pl.DataFrame(fonte.to_dicts(), infer_schema_length=None))
+    assert len(store.plan(fonte)) == 0
@@ -0,0 +1,95 @@
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import polars as pl
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'dags')))
+
+from serving.inference_logger import InferenceLogger
+from utils.drift_detection import load_production_data
+
+
+def _record(i, **extra):
+    return {"endpoint": "/predict", "job_id": f"V{i}", "candidate_skills": ["Python", "SQL"],
+            "n_candidate_skills": 2, "score_skills": 0.1 * i, **extra}
+
+
+def test_flush_writes_date_partitions_and_load_prunes_old_ones(tmp_path):
+    logger = InferenceLogger(root=tmp_path / "inference_logs")
+    now = datetime.now(timezone.utc)
+    logger.log_many([_record(i) for i in range(3)])
+    logger.log(**_record(9, ts=now - timedelta(days=30)))
+    assert len(logger) == 4
+
+    assert logger.flush() == 4 and len(logger) == 0
+    partitions = sorted(p.name for p in (tmp_path / "inference_logs").iterdir())
+    assert partitions == [f"dt={(now - timedelta(days=30)):%Y-%m-%d}", f"dt={now:%Y-%m-%d}"]
+    assert logger.flush() == 0
+
+    df = load_production_data(days=7, data_path=str(tmp_path))
+    assert sorted(df["job_id"]) == ["V0", "V1", "V2"]
+    assert "candidate_skills" not in df.columns and "n_candidate_skills" in df.columns
+
+
+def test_background_task_flushes_when_buffer_is_full(tmp_path):
+    logger = InferenceLogger(root=tmp_path, flush_interval_s=60, max_rows=2)
+
+    async def scenario():
+        logger.start()
+        await asyncio.sleep(0)
+        logger.log_many([_record(i) for i in range(2)])
+        for _ in range(100):
+            if logger.counters["written"]:
+                break
+            await asyncio.sleep(0.01)
+        logger.log(**_record(5))
+        await logger.stop()
+
+    asyncio.run(scenario())
+    assert logger.counters["written"] == 3 and logger.counters["files"] == 2
+    assert load_production_data(days=1, data_path=str(tmp_path.parent / "missing")).empty
+
+
+def test_full_buffer_logged_from_a_worker_thread_wakes_the_flush_loop(tmp_path):
+    logger = InferenceLogger(root=tmp_path, flush_interval_s=60, max_rows=2)
+
+    async def scenario():
+        logger.start()
+        await asyncio.sleep(0)
+        # Sync endpoints (e.g. /rank) log from the threadpool
+        await asyncio.get_running_loop().run_in_executor(None, logger.log_many, [_record(i) for i in range(2)])
+        for _ in range(100):
+            if logger.counters["written"]:
+                break
+            await asyncio.sleep(0.01)
+        written = logger.counters["written"]
+        await logger.stop()
+        return written
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_failed_write_requeues_rows(tmp_path, monkeypatch):
+    import serving.inference_logger as module
+
+    logger = InferenceLogger(root=tmp_path)
+    logger.log_many([_record(i) for i in range(3)])
+    original = module.pq.write_table
+
+    def failing(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(module.pq, "write_table", failing)
+    with pytest.raises(OSError):
+        logger.flush()
+    assert len(logger) == 3 and logger.counters["written"] == 0
+
+    monkeypatch.setattr(module.pq, "write_table", original)
+    logger.log(**_record(7))
+    assert logger.flush() == 4
+    written = pl.concat([pl.read_parquet(f) for f in tmp_path.glob("dt=*/*.parquet")])
+    assert sorted(written["job_id"].to_list()) == ["V0", "V1", "V2", "V7"]
@@ -0,0 +1,162 @@
+import sys
+import os
+import time
+import asyncio
+import threading
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.infra.llm_cache import LLMCache
+from data_pipeline.pipe.features import prompts
+
+
+class CountingProvider:
+    """Fake gateway adapter that records every prompt it generates for."""
+    def __init__(self, response='{"competencias_tecnicas": ["PYTHON"]}'):
+        self.response = response
+        self.calls = []
+
+    def generate(self, prompt, model_name=None, **kwargs):
+        self.calls.append(prompt)
+        return self.response
+
+    async def agenerate(self, prompt, model_name=None, **kwargs):
+        return self.generate(prompt, model_name, **kwargs)
+
+
+def test_key_depends_on_model_and_options():
+    base = LLMCache.make_key("OllamaAdapter", "gemma3:1b", "prompt")
+    assert base == LLMCache.make_key("OllamaAdapter", "gemma3:1b", "prompt")
+    assert base != LLMCache.make_key("OllamaAdapter", "gemma3:4b", "prompt")
+    assert base != LLMCache.make_key("OllamaAdapter", "gemma3:1b", "prompt", {"temperature": 0.5})
+
+
+def test_key_uses_the_adapter_effective_model_and_options(monkeypatch):
+    from data_pipeline.infra.llm_gateway import OllamaAdapter
+
+    monkeypatch.delenv("LLM_MODEL_NAME", raising=False)
+    adapter = OllamaAdapter()
+    default = prompts._chave_cache(adapter, "prompt", None)
+    assert default[1] == "gemma3:1b"
+    assert default == prompts._chave_cache(adapter, "prompt", "gemma3:1b")
+    assert default != prompts._chave_cache(adapter, "prompt", "gemma3:4b")
+
+    # A new adapter default (model or generation options) must not serve old entries
+    monkeypatch.setenv("LLM_MODEL_NAME", "gemma3:4b")
+    assert prompts._chave_cache(adapter, "prompt", None) != default
+    monkeypatch.delenv("LLM_MODEL_NAME")
+    real_payload = adapter._payload
+    monkeypatch.setattr(adapter, "_payload", lambda prompt, model_name, **kw: real_payload(
+        prompt, model_name, **{"temperature": 0.7, **kw}))
+    assert prompts._chave_cache(adapter, "prompt", None) != default
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite", ttl_seconds=60, max_entries=2)
+    for i in range(3):
+        cache.put(f"k{i}", "p", "m", f"raw{i}", {"i": i})
+        time.sleep(0.01)
+    assert cache.get("k0").parsed == {"i": 0}  # k0 vira o mais recente
+
+    cache.evict()
+    assert len(cache) == 2
+    assert cache.get("k1") is None
+
+    cache.ttl_seconds = 0
+    assert cache.get("k2") is None
+
+
+def test_chamar_llm_served_from_cache(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite")
+    provider = CountingProvider()
+    with patch.object(prompts, "get_llm_provider", return_value=provider), \
+         patch.object(prompts, "get_llm_cache", return_value=cache):
+        first = prompts.chamar_llm("CV Python", model_name="gemma3:1b")
+        second = asyncio.run(prompts.achamar_llm("CV Python", model_name="gemma3:1b"))
+        prompts.chamar_llm("CV Python", model_name="gemma3:1b", use_cache=False)
+
+    assert first == second
+    assert provider.calls == ["CV Python", "CV Python"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_unparseable_response_is_not_cached(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite")
+    provider = CountingProvider(response="desculpe, não consegui")
+    with patch.object(prompts, "get_llm_provider", return_value=provider), \
+         patch.object(prompts, "get_llm_cache", return_value=cache):
+        prompts.chamar_llm("CV vazio")
+        prompts.chamar_llm("CV vazio")
+
+    assert len(provider.calls) == 2
+    assert len(cache) == 0
+
+
+class SequenceProvider(CountingProvider):
+    """Returns the given responses in order (last one repeats)."""
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+
+    def generate(self, prompt, model_name=None, **kwargs):
+        self.calls.append(prompt)
+        return self.responses[min(len(self.calls), len(self.responses)) - 1]
+
+
+def test_retry_overwrites_schema_invalid_cached_answer(tmp_path):
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline')))
+    from pydantic import BaseModel
+    from pipe.features import free_text_transform as ft
+    from pipe.features import prompts as ft_prompts
+
+    class Schema(BaseModel):
+        competencias_tecnicas: list[str]
+
+    cache = LLMCache(tmp_path / "cache.sqlite")
+    provider = SequenceProvider(['{"competencias_tecnicas": "PYTHON"}', '{"competencias_tecnicas": ["PYTHON"]}'])
+    with patch.object(ft_prompts, "get_llm_provider", return_value=provider), \
+         patch.object(ft_prompts, "get_llm_cache", return_value=cache):
+        for _ in range(2):
+            _, dados = ft.chamar_llm_com_retry(lambda row: "CV", {}, Schema, "candidato", "1", [], delay=0)
+            assert dados == {"competencias_tecnicas": ["PYTHON"]}
+
+    # Second run: valid answer served from cache on the first attempt
+    assert len(provider.calls) == 2
+
+
+def test_async_call_does_not_touch_sqlite_on_the_event_loop(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite")
+    loop_threads = []
+    original_get = cache.get
+
+    def get(key):
+        loop_threads.append(threading.current_thread() is threading.main_thread())
+        return original_get(key)
+
+    cache.get = get
+    with patch.object(prompts, "get_llm_provider", return_value=CountingProvider()), \
+         patch.object(prompts, "get_llm_cache", return_value=cache):
+        asyncio.run(prompts.achamar_llm("CV"))
+    assert loop_threads == [False]
+
+
+def test_async_client_is_closed_per_event_loop(capsys):
+    from data_pipeline.infra.llm_gateway import OllamaAdapter
+
+    adapter = OllamaAdapter()
+
+    async def use(close=True):
+        _, client = adapter._async.get()
+        if close:
+            await adapter.aclose()
+        return client
+
+    first, second = asyncio.run(use()), asyncio.run(use())
+    assert first is not second and first.is_closed and second.is_closed
+    assert "not closed" not in capsys.readouterr().out
+
+    # A loop that ends without aclose leaks its pool: the next loop reports it
+    asyncio.run(use(close=False))
+    asyncio.run(use())
+    assert "not closed" in capsys.readouterr().out
@@ -0,0 +1,35 @@
+import sys
+import os
+
+import numpy as np
+import polars as pl
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline')))
+
+from pipe.features.cleanning_and_accurate import (
+    LOCAIS_CANDIDATO, LOCAIS_VAGA, comparar_locais_com_fuzzy, indicador_mesma_localidade,
+)
+
+LOCAIS = ["São Paulo", "SAO PAULO - SP", "Rio de Janeiro", "rio", "Campinas", "Belo Horizonte",
+          "Zona Sul", "", None, "Curitiba, PR", "Remoto"]
+
+
+def test_matches_row_by_row_fuzzy_comparison():
+    rng = np.random.default_rng(0)
+    n = 300
+    df = pl.DataFrame({c: rng.choice(np.array(LOCAIS, dtype=object), n).tolist() for c in LOCAIS_CANDIDATO + LOCAIS_VAGA},
+                      schema={c: pl.Utf8 for c in LOCAIS_CANDIDATO + LOCAIS_VAGA})
+
+    esperado = [
+        comparar_locais_com_fuzzy([row[c] for c in LOCAIS_CANDIDATO], [row[c] for c in LOCAIS_VAGA], threshold=70)
+        for row in df.to_dicts()
+    ]
+    obtido = indicador_mesma_localidade(df, threshold=70)
+    assert obtido.name == "ind_mesma_localidade"
+    assert obtido.to_list() == esperado
+    assert any(esperado) and not all(esperado)
+
+
+def test_rows_without_locations():
+    df = pl.DataFrame({c: [None, ""] for c in LOCAIS_CANDIDATO + LOCAIS_VAGA}, schema={c: pl.Utf8 for c in LOCAIS_CANDIDATO + LOCAIS_VAGA})
+    assert indicador_mesma_localidade(df).to_list() == [False, False]
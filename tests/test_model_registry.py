@@ -0,0 +1,52 @@
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.pipe.scoring.model_registry import ModelRegistry
+from data_pipeline.pipe.scoring.skills import SkillsScorer
+from data_pipeline.pipe.scoring.cultural import CulturalScorer
+
+
+class FakeModel:
+    loads = 0
+
+    def __init__(self, name):
+        FakeModel.loads += 1
+        self.name = name
+
+
+def test_each_model_loaded_once_across_threads():
+    FakeModel.loads = 0
+    registry = ModelRegistry()
+    with patch("sentence_transformers.SentenceTransformer", FakeModel):
+        threads = [threading.Thread(target=registry.get, args=("shared-model",)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert FakeModel.loads == 1
+    assert registry.status() == {"shared-model": "loaded"}
+    assert registry.is_ready(["shared-model"])
+
+
+def test_warm_up_reports_failures():
+    registry = ModelRegistry()
+    with patch("sentence_transformers.SentenceTransformer", side_effect=OSError("offline")):
+        registry.warm_up(["missing-model"])
+    assert registry.status() == {"missing-model": "failed"}
+    assert not registry.is_ready(["missing-model"])
+
+
+def test_scorers_share_registry_instance():
+    registry = ModelRegistry()
+    model = FakeModel("multilingual")
+    registry.register("multilingual", model)
+    with patch("data_pipeline.pipe.scoring.skills.get_model_registry", return_value=registry), \
+         patch("data_pipeline.pipe.scoring.cultural.get_model_registry", return_value=registry):
+        skills = SkillsScorer(model_name="multilingual")
+        cultural = CulturalScorer(model_name="multilingual")
+        assert skills.model is cultural.model is model
@@ -1,6 +1,6 @@
 import sys
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 import json
 from fastapi.testclient import TestClient
 import pytest
@@ -26,7 +26,7 @@ def test_health():
 
 def test_predict_legacy_resume_text():
     # Mock LLM calls to avoid cost/latency
-    with patch('serving.api.chamar_llm') as mock_llm:
+    with patch('serving.api.achamar_llm', new_callable=AsyncMock) as mock_llm:
         mock_llm.return_value = '```json\n{"competencias_tecnicas": ["Python"], "experiencia_anos": "5-8 anos"}\n```'
         
         payload = {
@@ -42,7 +42,7 @@ def test_predict_legacy_resume_text():
 def test_predict_zero_shot_structured():
     # Phase 3: Zero-shot with structured payload
     # Should NOT call LLM for extraction
-    with patch('serving.api.chamar_llm') as mock_llm:
+    with patch('serving.api.achamar_llm', new_callable=AsyncMock) as mock_llm:
         # Valid V2 Schema Payload
         payload = {
             "candidate_data": {
@@ -121,7 +121,7 @@ def test_predict_file_with_structured_data(mock_parse):
         'job_data': json.dumps(j_payload)
     }
     
-    with patch('serving.api.chamar_llm') as mock_llm:
+    with patch('serving.api.achamar_llm', new_callable=AsyncMock) as mock_llm:
          response = client.post("/predict_file?use_ocr=false", files=files, data=data)
          assert response.status_code == 200
          resp = response.json()
@@ -134,6 +134,142 @@ def test_predict_file_with_structured_data(mock_parse):
          # Verify LLM was NOT called (Zero-shot should skip LLM)
          mock_llm.assert_not_called()
 
+def test_rank_structured_candidates():
+    payload = {
+        "job_data": {
+            "requirements": {
+                "required_tech_skills": ["Rust"],
+                "required_soft_skills": ["Foco"]
+            }
+        },
+        "candidates": [
+            {"skills": {"technical_skills": ["Java"], "soft_skills": []}},
+            {"skills": {"technical_skills": ["Rust", "C++"], "soft_skills": ["Foco"]}},
+            {}
+        ],
+        "candidate_ids": ["UNKNOWN_ID"],
+        "top_k": 2
+    }
+    response = client.post("/rank", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["not_found"] == ["UNKNOWN_ID"]
+    assert len(data["ranking"]) == 2
+    # Exact skill match must rank first
+    assert data["ranking"][0]["payload_index"] == 1
+    assert data["ranking"][0]["scores"]["skills"] > 0.99
+
+    # Batch scores must match the single-pair endpoint
+    single = client.post("/predict", json={
+        "candidate_data": payload["candidates"][1],
+        "job_data": payload["job_data"]
+    }).json()
+    assert abs(single["scores"]["skills"] - data["ranking"][0]["scores"]["skills"]) < 1e-5
+    assert abs(single["scores"]["cultural"] - data["ranking"][0]["scores"]["cultural"]) < 1e-5
+
+def test_rank_requires_job():
+    response = client.post("/rank", json={"candidates": [{}]})
+    assert response.status_code == 400
+
+class FakeVectorIndex:
+    """Stands in for the ANN indexes: returns fixed hits regardless of the query vector."""
+    def __init__(self, hits, pooling="mean"):
+        self.hits = hits
+        self.meta = {"pooling": pooling}
+        self.queries = []
+
+    def search(self, query, k):
+        self.queries.append((query, k))
+        return self.hits[:k]
+
+    def __len__(self):
+        return len(self.hits)
+
+RUST_JOB = {"requirements": {"required_tech_skills": ["Rust"], "required_soft_skills": ["Foco"]}}
+
+def test_candidates_for_job_without_index_is_unavailable():
+    with patch('serving.api.candidate_ann', None):
+        response = client.post("/candidates_for_job", json={"job_data": RUST_JOB})
+    assert response.status_code == 503
+
+def test_candidates_for_job_requires_job_skills():
+    with patch('serving.api.candidate_ann', FakeVectorIndex([("C1", 0.9)])):
+        response = client.post("/candidates_for_job", json={"job_data": {"requirements": {"required_soft_skills": ["Foco"]}}})
+    assert response.status_code == 400
+
+def test_candidates_for_job_reranks_the_retrieved_shortlist():
+    ann = FakeVectorIndex([("C_JAVA", 0.9), ("C_RUST", 0.8), ("C_GO", 0.7)])
+    processed = {
+        "C_JAVA": {"competencias_tecnicas": ["Java"], "competencias_comportamentais": []},
+        "C_RUST": {"competencias_tecnicas": ["Rust"], "competencias_comportamentais": ["Foco"]},
+        "C_GO": {"competencias_tecnicas": ["Go"], "competencias_comportamentais": []},
+    }
+    with patch('serving.api.candidate_ann', ann), patch('serving.api.candidate_index', None), \
+         patch('serving.api.processed_candidates', processed), patch('serving.api._log_inference') as log:
+        response = client.post("/candidates_for_job", json={"job_data": RUST_JOB, "top_n": 3, "top_k": 2})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["retrieved"] == 3 and ann.queries[0][1] == 3
+    assert data["ranking"][0]["candidate_id"] == "C_RUST"
+    assert len(data["ranking"]) == 2
+    assert data["ranking"][0]["retrieval_similarity"] == 0.8
+    assert data["ranking"][0]["scores"]["skills"] > 0.99
+    # Inference log rows are labelled with the endpoint that served them
+    assert {row["endpoint"] for row in log.call_args[0][0]} == {"/candidates_for_job"}
+
+class FakeJobIndex:
+    """Job profiles without stored embeddings: the scorers encode the job phrases."""
+    def __init__(self, skills_by_job):
+        self.skills_by_job = skills_by_job
+
+    def profile(self, job_id):
+        return {"skills": self.skills_by_job[job_id], "soft_skills": [], "titulo": f"Vaga {job_id}"}
+
+    def embeddings(self, field, job_id):
+        return None
+
+    def __contains__(self, job_id):
+        return False
+
+OPEN_JOBS = {f"V{i}": ["Java"] for i in range(6)} | {"V_RUST": ["Rust"]}
+
+def _open_jobs_patches():
+    ann = FakeVectorIndex([(job_id, 0.5) for job_id in OPEN_JOBS])
+    return patch('serving.api.open_jobs_ann', ann), patch('serving.api.job_index', FakeJobIndex(OPEN_JOBS))
+
+def test_predict_without_job_recommends_open_jobs():
+    candidate = {"skills": {"technical_skills": ["Rust"], "soft_skills": []}}
+    with patch('serving.api.open_jobs_ann', None):
+        response = client.post("/predict", json={"candidate_data": candidate, "top_k_jobs": 2})
+    assert response.status_code == 503
+
+    ann_patch, index_patch = _open_jobs_patches()
+    with ann_patch, index_patch:
+        response = client.post("/predict", json={"candidate_data": candidate, "top_k_jobs": 2})
+    assert response.status_code == 200
+    recommended = response.json()["recommended_jobs"]
+    assert len(recommended) == 2
+    assert recommended[0]["job_id"] == "V_RUST" and recommended[0]["titulo"] == "Vaga V_RUST"
+    assert recommended[0]["scores"]["skills"] > 0.99
+
+@patch('serving.api.DocumentParser.parse_file')
+def test_predict_file_recommends_jobs_only_when_top_k_is_sent(mock_parse):
+    mock_parse.return_value = "Desenvolvedor Rust"
+    files = {'file': ('resume.pdf', b'%PDF-1.4', 'application/pdf')}
+    with patch('serving.api.achamar_llm', new_callable=AsyncMock) as mock_llm:
+        mock_llm.return_value = '{"competencias_tecnicas": ["Rust"]}'
+        # No open-jobs index and no top_k: a plain upload still scores instead of failing with 503
+        with patch('serving.api.open_jobs_ann', None):
+            response = client.post("/predict_file", files=files)
+        assert response.status_code == 200 and "recommended_jobs" not in response.json()
+
+        ann_patch, index_patch = _open_jobs_patches()
+        with ann_patch, index_patch:
+            response = client.post("/predict_file?top_k=1", files=files)
+        assert [job["job_id"] for job in response.json()["recommended_jobs"]] == ["V_RUST"]
+
 if __name__ == "__main__":
     print("Running manual tests...")
     # Manual execution of tests if not using pytest
@@ -0,0 +1,103 @@
+import sys
+import os
+import hashlib
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_pipeline.pipe.scoring.embedding_store import EmbeddingStore
+from data_pipeline.pipe.scoring.profile_index import ProfileIndex, load_profile_index
+from data_pipeline.pipe.scoring.skills import SkillsScorer
+from data_pipeline.pipe.scoring.cultural import CulturalScorer
+
+
+class HashEncoder:
+    """Deterministic unit vectors per phrase; counts encoded phrases."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        self.encoded += len(texts)
+        rows = []
+        for text in texts:
+            seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+            v = np.random.default_rng(seed).normal(size=16)
+            rows.append(v / np.linalg.norm(v))
+        return np.asarray(rows, dtype=np.float32)
+
+
+def _scorers(tmp_path):
+    store = EmbeddingStore(root=tmp_path / "emb", persist=False)
+    return (SkillsScorer(model_name="fake-skills", embedding_store=store, model=HashEncoder()),
+            CulturalScorer(model_name="fake-cultural", embedding_store=store, model=HashEncoder()))
+
+
+RECORDS = [
+    {"id": "1", "titulo": "Dev Python", "dados": {
+        "competencias_tecnicas": ["Python", "SQL"], "ferramentas_tecnologicas": ["Docker"],
+        "competencias_comportamentais": ["Comunicação"], "senioridade_aparente": "Pleno"}},
+    {"id": "2", "titulo": "Analista", "dados": {
+        "competencias_tecnicas": ["SQL"], "competencias_comportamentais": []}},
+]
+
+
+def test_build_and_lookup(tmp_path):
+    skills, cultural = _scorers(tmp_path)
+    ProfileIndex.build(tmp_path / "jobs", RECORDS, skills, cultural)
+    index = load_profile_index(tmp_path / "jobs", "fake-skills", "fake-cultural")
+
+    assert len(index) == 2 and "1" in index and "3" not in index
+    profile = index.profile("1")
+    assert profile["skills"] == ["Python", "SQL", "Docker"]
+    assert profile["soft_skills"] == ["Comunicação"]
+    assert profile["titulo"] == "Dev Python"
+    assert profile["senioridade_aparente"] == "Pleno"
+
+    emb = index.embeddings("skills", "1")
+    np.testing.assert_allclose(emb, skills.encode(["Python", "SQL", "Docker"]), atol=1e-6)
+    assert index.embeddings("soft_skills", "2").shape[0] == 0
+
+
+def test_precomputed_job_embeddings_match_encoding(tmp_path):
+    skills, cultural = _scorers(tmp_path)
+    index = ProfileIndex.build(tmp_path / "jobs", RECORDS, skills, cultural)
+    candidates = [["python", "SQL"], [], ["Docker", "Kubernetes"]]
+
+    expected = skills.calculate_embedding_scores(index.profile("1")["skills"], candidates)
+    encoded_before = skills.model.encoded
+    got = skills.calculate_embedding_scores(index.profile("1")["skills"], candidates,
+                                            job_emb=index.embeddings("skills", "1"))
+    np.testing.assert_allclose(got, expected, atol=1e-6)
+    assert skills.model.encoded == encoded_before
+
+    vocab_emb, flat_idx, offsets = index.segments("skills", [1, 0])
+    assert offsets.tolist() == [0, 1, 4]
+    np.testing.assert_allclose(vocab_emb[flat_idx], skills.encode(["SQL", "Python", "SQL", "Docker"]), atol=1e-6)
+
+
+def test_incompatible_models_are_ignored(tmp_path):
+    skills, cultural = _scorers(tmp_path)
+    ProfileIndex.build(tmp_path / "jobs", RECORDS, skills, cultural)
+    assert load_profile_index(tmp_path / "jobs", "other-model", "fake-cultural") is None
+    assert load_profile_index(tmp_path / "missing", "fake-skills", "fake-cultural") is None
+
+
+def test_candidate_segments_skip_candidate_encode(tmp_path):
+    skills, cultural = _scorers(tmp_path)
+    index = ProfileIndex.build(tmp_path / "candidates", RECORDS, skills, cultural)
+    job = ["Python", "Kubernetes"]
+    rows = [index.row_of["2"], index.row_of["1"]]
+
+    expected_skills = skills.calculate_embedding_scores(job, [index.profile("2")["skills"], index.profile("1")["skills"]])
+    expected_cult = cultural.calculate_scores(["Comunicação"], [[], ["Comunicação"]])
+
+    encoded_before = skills.model.encoded, cultural.model.encoded
+    got_skills = skills.calculate_embedding_scores(job, [[], []], job_emb=skills.encode(job),
+                                                   candidate_segments=index.segments("skills", rows))
+    got_cult = cultural.calculate_scores(["Comunicação"], [[], []], job_emb=cultural.encode(["Comunicação"]),
+                                         candidate_segments=index.segments("soft_skills", rows))
+    np.testing.assert_allclose(got_skills, expected_skills, atol=1e-6)
+    np.testing.assert_allclose(got_cult, expected_cult, atol=1e-6)
+    assert (skills.model.encoded, cultural.model.encoded) == encoded_before
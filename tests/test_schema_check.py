@@ -0,0 +1,62 @@
+import sys
+import os
+from typing import Literal, Optional
+
+import polars as pl
+import pytest
+from pydantic import BaseModel, ValidationError
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline')))
+
+from pipe.validation.schema_check import assert_valid_schema, find_invalid_rows, validate_schema
+from pipe.validation.schemas_curated.curated_prospects_schema import CuratedProspectRecord
+
+
+class Record(BaseModel):
+    codigo: str
+    nome: Optional[str]
+    idade: Optional[int]
+    nota: float
+    modalidade: Optional[Literal["CLT", "PJ"]]
+    ativo: Optional[bool] = None
+
+
+def _per_row(df, model):
+    invalid = []
+    for i, row in enumerate(df.to_dicts()):
+        try:
+            model(**row)
+        except ValidationError:
+            invalid.append(i)
+    return invalid
+
+
+def test_vectorized_validation_matches_per_row_pydantic():
+    df = pl.DataFrame({
+        "codigo": ["1", None, "3", "4", "5", "6", "7"],
+        "nome": ["a", "b", None, "d", "e", "f", "g"],
+        "idade": ["30", "x", None, " 41 ", "2.0", "7", "8"],
+        "nota": [1.0, 2.0, 3.0, None, 5.0, 6.0, 7.5],
+        "modalidade": ["CLT", "PJ", None, "CLT", "Estágio", "PJ", "CLT"],
+        "extra": list(range(7)),
+    })
+    expected = _per_row(df, Record)
+    assert [i for i, _, _ in find_invalid_rows(df, Record)] == expected
+    assert expected == [1, 3, 4]
+    assert validate_schema(df, Record)[0].startswith("Linha 1:")
+
+
+def test_missing_required_column_fails_every_row():
+    df = pl.DataFrame({"codigo": ["1", "2"], "nome": ["a", "b"]})
+    assert len(validate_schema(df, Record)) == 2
+    assert len(validate_schema(df.with_columns(pl.lit(1.0).alias("nota"), pl.lit(None).alias("idade"),
+                                               pl.lit(None).alias("modalidade")), Record)) == 0
+
+
+def test_assert_valid_schema_on_curated_prospects():
+    fields = list(CuratedProspectRecord.model_fields)
+    df = pl.DataFrame({f: ["x", "y"] for f in fields})
+    assert_valid_schema(df, CuratedProspectRecord, label="prospects", id_field="codigo_vaga")
+    with pytest.raises(ValueError):
+        assert_valid_schema(df.with_columns(pl.Series("codigo_vaga", ["x", None])), CuratedProspectRecord,
+                            label="prospects", id_field="codigo_vaga")
@@ -0,0 +1,93 @@
+import io
+import sys
+import os
+import json
+
+import polars as pl
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_pipeline')))
+
+from pipe.ingest import stream_raw
+from pipe.ingest.stream_raw import (
+    _ChunkedJsonReader, iter_json_records, iter_parquet_parts, read_parquet_parts, scan_parquet_parts,
+    stream_json_to_parquet,
+)
+from pipe.validation.quality_rules import check_duplicates, check_required_columns
+from pipe.transform.curated_transform import flatten_struct_columns
+
+PROSPECTS = {
+    "4530": {"titulo": "Dev Python", "modalidade": "", "prospects": [
+        {"nome": "Ana", "codigo": "1", "situacao_candidado": "Contratado"},
+        {"nome": "Bia", "codigo": "2", "situacao_candidado": "Desistiu"},
+    ]},
+    "4531": {"titulo": "Analista", "modalidade": "CLT", "prospects": []},
+    "4532": {"titulo": "Dados \"Sênior\"", "modalidade": None, "prospects": [{"nome": "Caio", "codigo": "3", "situacao_candidado": None}]},
+    "4533": {"titulo": "Sem prospects", "modalidade": "PJ", "prospects": []},
+}
+
+
+def _load_json_to_df(path, id_field):
+    with path.open(encoding="utf-8") as f:
+        data = json.load(f)
+    return pl.from_dicts([{id_field: k, **v} for k, v in data.items()])
+
+
+def test_chunked_reader_yields_records_across_tiny_blocks(tmp_path):
+    path = tmp_path / "prospects.json"
+    path.write_text(json.dumps(PROSPECTS, ensure_ascii=False, indent=2), encoding="utf-8")
+    with path.open(encoding="utf-8") as f:
+        items = list(_ChunkedJsonReader(f, block_chars=7).items())
+    assert items == list(PROSPECTS.items())
+
+    (tmp_path / "numbers.json").write_text("[1234567, 2.5, {\"a\": []}]")
+    with (tmp_path / "numbers.json").open() as f:
+        assert [v for _, v in _ChunkedJsonReader(f, block_chars=3).items()] == [1234567, 2.5, {"a": []}]
+
+
+@pytest.mark.parametrize("block_chars", [1, 2, 3, 5, 8])
+def test_chunked_reader_numbers_cut_at_block_boundary(block_chars):
+    doc = '[0.25, -1.5e-3, 12E+2, 7, 1e5, {"v": 3.125}, [0.5, 10], -0, 2.0]'
+    items = [v for _, v in _ChunkedJsonReader(io.StringIO(doc), block_chars=block_chars).items()]
+    assert items == json.loads(doc)
+
+    doc = '{"a": 0.75, "b": 100, "c": 1e-7}'
+    items = dict(_ChunkedJsonReader(io.StringIO(doc), block_chars=block_chars).items())
+    assert items == json.loads(doc)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
+def test_streamed_parquet_matches_full_load(tmp_path, monkeypatch, batch_size):
+    monkeypatch.setattr(stream_raw, "ijson", None)
+    path = tmp_path / "prospects.json"
+    path.write_text(json.dumps(PROSPECTS, ensure_ascii=False), encoding="utf-8")
+
+    out = stream_json_to_parquet(path, "codigo_vaga", tmp_path / "staging", batch_size=batch_size,
+                                 transform=flatten_struct_columns)
+    streamed = read_parquet_parts(out)
+    expected = flatten_struct_columns(_load_json_to_df(path, "codigo_vaga"))
+
+    assert sorted(streamed.columns) == sorted(expected.columns)
+    assert streamed.select(expected.columns).to_dicts() == expected.to_dicts()
+    assert not (tmp_path / "staging.tmp").exists()
+    assert next(iter_json_records(path, "codigo_vaga"))["codigo_vaga"] == "4530"
+
+
+def test_staged_parts_are_checked_lazily_and_one_part_at_a_time(tmp_path):
+    path = tmp_path / "prospects.json"
+    path.write_text(json.dumps(PROSPECTS, ensure_ascii=False), encoding="utf-8")
+    out = stream_json_to_parquet(path, "codigo_vaga", tmp_path / "staging", batch_size=1,
+                                 transform=flatten_struct_columns)
+    lazy, eager = scan_parquet_parts(out), read_parquet_parts(out)
+    assert isinstance(lazy, pl.LazyFrame)
+
+    # Parts without prospects lack the p_* columns: each part is aligned to the union schema
+    parts = list(iter_parquet_parts(out))
+    assert all(part.schema == eager.schema for part in parts)
+    assert pl.concat(parts).to_dicts() == eager.to_dicts()
+
+    for frame in (lazy, eager):
+        assert check_required_columns(frame, ["codigo_vaga", "p_codigo", "ausente"]) == [
+            "Coluna p_codigo contém 2 valores inválidos (nulo, vazio, '-', espaço)", "Coluna obrigatória ausente: ausente"]
+        assert check_duplicates(frame, ["codigo_vaga"]) == [
+            "[DUPLICATE] 2 registros duplicados encontrados com base nas colunas ['codigo_vaga']."]